@@ -2,13 +2,21 @@
 
 from __future__ import annotations
 
-from typing import List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import chain
+from typing import Dict, Iterator, List, Sequence, Tuple
+import multiprocessing
 import re
 
-from core.emotion_model import analyze_emotions
+from core import emotion_model
+from core.emotion_model import analyze_emotions_batch
 from core.memory_manager import MemoryManager
 from core.memory_entry import MemoryEntry
 from dreaming.dream_engine import DreamEngine
+from encoding import encoder
+from encoding.encoder import encode_texts
+from reconstruction.reconstructor import _load_config
 
 
 _PROCEDURE_PAT = re.compile(
@@ -23,8 +31,108 @@ _EVENT_PAT = re.compile(
 )
 
 
+def _model_settings() -> Dict[str, object]:
+    """Snapshot the encoder and emotion backend choices for worker processes."""
+    return {
+        "model_name": encoder.get_model_name(),
+        "encoder_backend": (encoder.get_backend(), encoder._onnx_path),
+        "emotion_backend": (emotion_model.get_backend(), emotion_model._onnx_path),
+        "cache_path": encoder.get_cache_path(),
+    }
+
+
+def _init_worker(settings: Dict[str, object]) -> None:
+    encoder.set_model_name(settings["model_name"])
+    encoder.set_backend(*settings["encoder_backend"])
+    emotion_model.set_backend(*settings["emotion_backend"])
+    # Each worker opens its own connection to the persistent cache
+    encoder.set_cache_path(settings["cache_path"])
+
+
+def _analyze_chunk(texts: List[str]):
+    """Embed and emotion-score one chunk of ``texts``."""
+    return encode_texts(texts), analyze_emotions_batch(texts)
+
+
+def _analyze(
+    texts: Sequence[str], *, workers: int | None, chunk_size: int | None
+) -> Iterator[Tuple[int, List[str], object, List[List[Tuple[str, float]]]]]:
+    """Yield ``(start, chunk, embeddings, emotions)`` for ``texts`` in order.
+
+    With more than one worker the chunks are processed in a process pool;
+    ``map`` hands results back in input order, so the caller can write each
+    chunk as soon as it is ready while later chunks are still running.
+    """
+    cfg = _load_config().get("ingest", {})
+    if workers is None:
+        workers = int(cfg.get("workers", 1))
+    if chunk_size is None:
+        chunk_size = int(cfg.get("chunk_size", 256))
+    chunk_size = max(1, chunk_size)
+    starts = range(0, len(texts), chunk_size)
+    chunks = [list(texts[i : i + chunk_size]) for i in starts]
+    if workers > 1 and len(chunks) > 1:
+        # Spawned rather than forked: a fork would share the encoder's SQLite
+        # cache connection and could copy a model lock held by a warm-up thread
+        pool = ProcessPoolExecutor(
+            max_workers=min(workers, len(chunks)),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(_model_settings(),),
+        )
+        try:
+            for start, chunk, (embeddings, emotions) in zip(
+                starts, chunks, pool.map(_analyze_chunk, chunks)
+            ):
+                yield start, chunk, embeddings, emotions
+        finally:
+            # Drop chunks not started yet if the caller stops early
+            pool.shutdown(cancel_futures=True)
+    else:
+        for start, chunk in zip(starts, chunks):
+            embeddings, emotions = _analyze_chunk(chunk)
+            yield start, chunk, embeddings, emotions
+
+
+@contextmanager
+def _undo_on_error(
+    manager: MemoryManager,
+    *,
+    episodic: Sequence[MemoryEntry] = (),
+    semantic: Sequence[MemoryEntry] = (),
+    procedural: Sequence[MemoryEntry] = (),
+) -> Iterator[None]:
+    """Undo every entry an import created, in the database and in memory, if it fails.
+
+    The import commits chunk by chunk so the writer is only held while a
+    chunk is written, never while workers are still analyzing; the lists
+    collect what was created so far so a failure can remove all of it.
+    """
+    try:
+        yield
+    except BaseException:
+        try:
+            # One commit for the undo; rows of a chunk that failed mid-write
+            # were already rolled back, so their deletes match nothing
+            with manager.db.transaction():
+                for entry in episodic:
+                    manager.db.delete(entry.id)
+                for entry in semantic:
+                    manager.db.delete_semantic(entry.id)
+                for entry in procedural:
+                    manager.db.delete_procedural(entry.id)
+        finally:
+            manager.discard(chain(episodic, semantic, procedural))
+        raise
+
+
 def ingest_transcript(
-    text: str, manager: MemoryManager, *, summarize: bool = False
+    text: str,
+    manager: MemoryManager,
+    *,
+    summarize: bool = False,
+    workers: int | None = None,
+    chunk_size: int | None = None,
 ) -> List[MemoryEntry]:
     """Store dialogue transcript lines as episodic memories.
 
@@ -40,6 +148,11 @@ def ingest_transcript(
     summarize:
         When ``True``, generate a semantic summary using
         :class:`~dreaming.dream_engine.DreamEngine` after ingesting the lines.
+    workers:
+        Processes used to embed and classify the lines (default:
+        ``ingest.workers`` in the config). ``1`` keeps everything in-process.
+    chunk_size:
+        Lines per unit of work (default: ``ingest.chunk_size``).
 
     Returns
     -------
@@ -47,7 +160,8 @@ def ingest_transcript(
         List of the created episodic entries.
     """
 
-    entries: List[MemoryEntry] = []
+    contents: List[str] = []
+    all_metadata: List[dict] = []
     lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
     for line in lines:
         speaker = None
@@ -56,19 +170,28 @@ def ingest_transcript(
             parts = line.split(":", 1)
             if len(parts) == 2:
                 speaker, content = parts[0].strip(), parts[1].strip()
-        emotions = analyze_emotions(content)
-        labels = [e[0] for e in emotions]
-        scores = {lbl: score for lbl, score in emotions}
         metadata = {"source": "transcript"}
         if speaker:
             metadata["speaker"] = speaker
-        entry = manager.add(
-            content,
-            emotions=labels,
-            emotion_scores=scores,
-            metadata=metadata,
-        )
-        entries.append(entry)
+        contents.append(content)
+        all_metadata.append(metadata)
+
+    # Embed and classify the lines in batched chunks and write each in order
+    # as it arrives, with one bulk insert per chunk
+    entries: List[MemoryEntry] = []
+    with _undo_on_error(manager, episodic=entries):
+        for start, chunk, embeddings, emotions in _analyze(
+            contents, workers=workers, chunk_size=chunk_size
+        ):
+            entries.extend(
+                manager.add_many(
+                    chunk,
+                    emotions=[[e[0] for e in pairs] for pairs in emotions],
+                    emotion_scores=[{lbl: score for lbl, score in pairs} for pairs in emotions],
+                    metadata=all_metadata[start : start + len(chunk)],
+                    embeddings=embeddings,
+                )
+            )
 
     if summarize and entries:
         engine = DreamEngine()
@@ -78,7 +201,11 @@ def ingest_transcript(
 
 
 def ingest_biography(
-    text: str, manager: MemoryManager
+    text: str,
+    manager: MemoryManager,
+    *,
+    workers: int | None = None,
+    chunk_size: int | None = None,
 ) -> Tuple[List[MemoryEntry], List[MemoryEntry], List[MemoryEntry]]:
     """Parse biography text into semantic, episodic and procedural memories.
 
@@ -92,6 +219,8 @@ def ingest_biography(
         Biography text to ingest.
     manager:
         :class:`MemoryManager` that receives the new entries.
+    workers, chunk_size:
+        As for :func:`ingest_transcript`.
 
     Returns
     -------
@@ -102,38 +231,49 @@ def ingest_biography(
     semantic_entries: List[MemoryEntry] = []
     episodic_entries: List[MemoryEntry] = []
     procedural_entries: List[MemoryEntry] = []
-    sentences = re.split(r"[.!?]+\s*", text)
-    for sent in sentences:
-        sentence = sent.strip()
-        if not sentence:
-            continue
-        emotions = analyze_emotions(sentence)
-        labels = [e[0] for e in emotions]
-        scores = {lbl: score for lbl, score in emotions}
-        metadata = {"source": "biography"}
-        if _PROCEDURE_PAT.search(sentence):
-            entry = manager.add_procedural(
-                sentence,
-                emotions=labels,
-                emotion_scores=scores,
-                metadata=metadata,
-            )
-            procedural_entries.append(entry)
-        elif _EVENT_PAT.search(sentence):
-            entry = manager.add(
-                sentence,
-                emotions=labels,
-                emotion_scores=scores,
-                metadata=metadata,
-            )
-            episodic_entries.append(entry)
-        else:
-            entry = manager.add_semantic(
-                sentence,
-                emotions=labels,
-                emotion_scores=scores,
-                metadata=metadata,
-            )
-            semantic_entries.append(entry)
+    sentences = [s.strip() for s in re.split(r"[.!?]+\s*", text) if s.strip()]
+    with _undo_on_error(
+        manager,
+        episodic=episodic_entries,
+        semantic=semantic_entries,
+        procedural=procedural_entries,
+    ):
+        analyzed = _analyze(sentences, workers=workers, chunk_size=chunk_size)
+        for _, chunk, embeddings, all_emotions in analyzed:
+            # One commit per chunk instead of one per sentence
+            with manager.db.transaction():
+                for i, sentence in enumerate(chunk):
+                    embedding = embeddings[i]
+                    emotions = all_emotions[i]
+                    labels = [e[0] for e in emotions]
+                    scores = {lbl: score for lbl, score in emotions}
+                    metadata = {"source": "biography"}
+                    if _PROCEDURE_PAT.search(sentence):
+                        entry = manager.add_procedural(
+                            sentence,
+                            emotions=labels,
+                            emotion_scores=scores,
+                            metadata=metadata,
+                            embedding=embedding,
+                        )
+                        procedural_entries.append(entry)
+                    elif _EVENT_PAT.search(sentence):
+                        entry = manager.add(
+                            sentence,
+                            emotions=labels,
+                            emotion_scores=scores,
+                            metadata=metadata,
+                            embedding=embedding,
+                        )
+                        episodic_entries.append(entry)
+                    else:
+                        entry = manager.add_semantic(
+                            sentence,
+                            emotions=labels,
+                            emotion_scores=scores,
+                            metadata=metadata,
+                            embedding=embedding,
+                        )
+                        semantic_entries.append(entry)
 
     return semantic_entries, episodic_entries, procedural_entries
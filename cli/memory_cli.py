@@ -110,13 +110,12 @@ def edit_memory(
         emotion_scores=scores,
         metadata={"tags": tags},
     )
-    db.update(ts, updated)
+    db.update(entries[0].id, updated)
     logger.info("Memory updated.")
 
 
 def delete_memory(db: Database, timestamp: str, *, assume_yes: bool = False) -> None:
     """Remove a memory entry by ``timestamp``."""
-    ts = datetime.fromisoformat(timestamp)
     entries = [m for m in db.load_all() if m.timestamp.isoformat() == timestamp]
     if not entries:
         logger.warning("Entry not found.")
@@ -126,7 +125,7 @@ def delete_memory(db: Database, timestamp: str, *, assume_yes: bool = False) ->
         if ans not in {"y", "yes"}:
             logger.warning("Aborted.")
             return
-    db.delete(ts)
+    db.delete(entries[0].id)
     logger.info("Memory deleted.")
 
 
@@ -166,13 +165,12 @@ def edit_sem(db: Database, timestamp: str, text: str, *, assume_yes: bool = Fals
         emotion_scores=existing.emotion_scores,
         metadata=existing.metadata,
     )
-    db.update_semantic(ts, updated)
+    db.update_semantic(entries[0].id, updated)
     logger.info("Semantic memory updated.")
 
 
 def delete_sem(db: Database, timestamp: str, *, assume_yes: bool = False) -> None:
     """Delete a semantic memory entry by timestamp."""
-    ts = datetime.fromisoformat(timestamp)
     entries = [m for m in db.load_all_semantic() if m.timestamp.isoformat() == timestamp]
     if not entries:
         logger.warning("Entry not found.")
@@ -182,7 +180,7 @@ def delete_sem(db: Database, timestamp: str, *, assume_yes: bool = False) -> Non
         if ans not in {"y", "yes"}:
             logger.warning("Aborted.")
             return
-    db.delete_semantic(ts)
+    db.delete_semantic(entries[0].id)
     logger.info("Semantic memory deleted.")
 
 
@@ -222,13 +220,12 @@ def edit_proc(db: Database, timestamp: str, text: str, *, assume_yes: bool = Fal
         emotion_scores=existing.emotion_scores,
         metadata=existing.metadata,
     )
-    db.update_procedural(ts, updated)
+    db.update_procedural(entries[0].id, updated)
     logger.info("Procedural memory updated.")
 
 
 def delete_proc(db: Database, timestamp: str, *, assume_yes: bool = False) -> None:
     """Delete a procedural memory entry by timestamp."""
-    ts = datetime.fromisoformat(timestamp)
     entries = [m for m in db.load_all_procedural() if m.timestamp.isoformat() == timestamp]
     if not entries:
         logger.warning("Entry not found.")
@@ -238,27 +235,34 @@ def delete_proc(db: Database, timestamp: str, *, assume_yes: bool = False) -> No
         if ans not in {"y", "yes"}:
             logger.warning("Aborted.")
             return
-    db.delete_procedural(ts)
+    db.delete_procedural(entries[0].id)
     logger.info("Procedural memory deleted.")
 
 
-def import_conversation(path: str, agent: str) -> None:
+def import_conversation(path: str, agent: str, *, workers: int | None = None) -> None:
     """Import dialogue transcript from ``path`` for ``agent``."""
     manager = MemoryManager(f"{agent}.db")
-    with open(path, "r", encoding="utf-8") as fh:
-        text = fh.read()
-    episodic = memory_constructor.ingest_transcript(text, manager)
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            text = fh.read()
+        episodic = memory_constructor.ingest_transcript(text, manager, workers=workers)
+    finally:
+        # Commits queued write-behind rows before the process exits
+        manager.close()
     logger.info(
         f"Added {len(episodic)} episodic, 0 semantic, 0 procedural entries."
     )
 
 
-def import_biography(path: str, agent: str) -> None:
+def import_biography(path: str, agent: str, *, workers: int | None = None) -> None:
     """Import biography text from ``path`` for ``agent``."""
     manager = MemoryManager(f"{agent}.db")
-    with open(path, "r", encoding="utf-8") as fh:
-        text = fh.read()
-    sem, episodic, proc = memory_constructor.ingest_biography(text, manager)
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            text = fh.read()
+        sem, episodic, proc = memory_constructor.ingest_biography(text, manager, workers=workers)
+    finally:
+        manager.close()
     logger.info(
         f"Added {len(episodic)} episodic, {len(sem)} semantic, {len(proc)} procedural entries."
     )
@@ -425,6 +429,7 @@ def main(argv: list[str] | None = None) -> None:
     )
     conv_p.add_argument("file", help="Text file containing transcript")
     conv_p.add_argument("--agent", required=True, help="Agent name")
+    conv_p.add_argument("--workers", type=int, help="Processes used for embedding")
 
     bio_p = sub.add_parser(
         "add-biography",
@@ -432,61 +437,66 @@ def main(argv: list[str] | None = None) -> None:
     )
     bio_p.add_argument("file", help="Text file containing biography")
     bio_p.add_argument("--agent", required=True, help="Agent name")
+    bio_p.add_argument("--workers", type=int, help="Processes used for embedding")
 
     args = parser.parse_args(argv)
 
     db = Database(args.db)
+    manager: MemoryManager | None = None
 
-    if args.cmd == "list":
-        list_memories(db)
-    elif args.cmd == "add":
-        add_memory(db, args.text, model=args.model)
-    elif args.cmd == "query":
-        query_memories(db, args.text, top_k=args.top_k, model=args.model)
-    elif args.cmd == "dream":
-        dream_summary(db)
-    elif args.cmd == "start-dream":
-        manager = MemoryManager(args.db)
-        llm_backend = args.dream_llm or args.llm
-        start_dream(manager, interval=args.interval, llm=llm_backend)
-    elif args.cmd == "stop-dream":
-        manager = MemoryManager(args.db)
-        stop_dream(manager)
-    elif args.cmd == "start-think":
-        manager = MemoryManager(args.db)
-        llm_backend = args.think_llm or args.llm
-        start_think(manager, interval=args.interval, llm_name=llm_backend)
-    elif args.cmd == "stop-think":
-        manager = MemoryManager(args.db)
-        stop_think(manager)
-    elif args.cmd == "reset":
-        reset_database(db)
-    elif args.cmd == "edit":
-        edit_memory(db, args.timestamp, args.text)
-    elif args.cmd == "delete":
-        delete_memory(db, args.timestamp)
-    elif args.cmd == "list-sem":
-        list_sem(db)
-    elif args.cmd == "add-sem":
-        add_sem(db, args.text)
-    elif args.cmd == "edit-sem":
-        edit_sem(db, args.timestamp, args.text)
-    elif args.cmd == "delete-sem":
-        delete_sem(db, args.timestamp)
-    elif args.cmd == "list-proc":
-        list_proc(db)
-    elif args.cmd == "add-proc":
-        add_proc(db, args.text)
-    elif args.cmd == "edit-proc":
-        edit_proc(db, args.timestamp, args.text)
-    elif args.cmd == "delete-proc":
-        delete_proc(db, args.timestamp)
-    elif args.cmd == "add-conversation":
-        import_conversation(args.file, args.agent)
-    elif args.cmd == "add-biography":
-        import_biography(args.file, args.agent)
-
-    db.close()
+    try:
+        if args.cmd == "list":
+            list_memories(db)
+        elif args.cmd == "add":
+            add_memory(db, args.text, model=args.model)
+        elif args.cmd == "query":
+            query_memories(db, args.text, top_k=args.top_k, model=args.model)
+        elif args.cmd == "dream":
+            dream_summary(db)
+        elif args.cmd == "start-dream":
+            manager = MemoryManager(args.db)
+            llm_backend = args.dream_llm or args.llm
+            start_dream(manager, interval=args.interval, llm=llm_backend)
+        elif args.cmd == "stop-dream":
+            manager = MemoryManager(args.db)
+            stop_dream(manager)
+        elif args.cmd == "start-think":
+            manager = MemoryManager(args.db)
+            llm_backend = args.think_llm or args.llm
+            start_think(manager, interval=args.interval, llm_name=llm_backend)
+        elif args.cmd == "stop-think":
+            manager = MemoryManager(args.db)
+            stop_think(manager)
+        elif args.cmd == "reset":
+            reset_database(db)
+        elif args.cmd == "edit":
+            edit_memory(db, args.timestamp, args.text)
+        elif args.cmd == "delete":
+            delete_memory(db, args.timestamp)
+        elif args.cmd == "list-sem":
+            list_sem(db)
+        elif args.cmd == "add-sem":
+            add_sem(db, args.text)
+        elif args.cmd == "edit-sem":
+            edit_sem(db, args.timestamp, args.text)
+        elif args.cmd == "delete-sem":
+            delete_sem(db, args.timestamp)
+        elif args.cmd == "list-proc":
+            list_proc(db)
+        elif args.cmd == "add-proc":
+            add_proc(db, args.text)
+        elif args.cmd == "edit-proc":
+            edit_proc(db, args.timestamp, args.text)
+        elif args.cmd == "delete-proc":
+            delete_proc(db, args.timestamp)
+        elif args.cmd == "add-conversation":
+            import_conversation(args.file, args.agent, workers=args.workers)
+        elif args.cmd == "add-biography":
+            import_biography(args.file, args.agent, workers=args.workers)
+    finally:
+        if manager is not None:
+            manager.close()
+        db.close()
 
 
 if __name__ == "__main__":
@@ -2,32 +2,61 @@
 
 from __future__ import annotations
 
-from typing import List
+from typing import List, Tuple
 
+from core import emotion_model
 from core.emotion_model import analyze_emotions
-from core.memory_manager import MemoryManager
+from core.memory_entry import MemoryEntry
+from core.memory_manager import MemoryManager, _flag
 from retrieval.cue_builder import build_cue
+from encoding import encoder
 from encoding.tagging import tag_text
-from retrieval.retriever import Retriever
-from reconstruction.reconstructor import Reconstructor
+from reconstruction.reconstructor import Reconstructor, _load_config
 from llm import llm_router
+from ms_utils.warmup import ModelWarmup
 
 
 class Agent:
     """Minimal conversational agent."""
 
-    def __init__(self, llm_name: str = "local", db_path: str | None = None) -> None:
+    def __init__(
+        self,
+        llm_name: str = "local",
+        db_path: str | None = None,
+        *,
+        warm_up: bool | None = None,
+    ) -> None:
+        """Create the agent.
+
+        With ``warm_up`` (default: ``models.warm_up`` in the config) the
+        embedding and emotion models start loading in background threads
+        right away; ``self.warmup.wait()`` returns their load times.
+        """
         self.llm_name = llm_name
         self.memory = MemoryManager(db_path=db_path or "memory.db")
         self.llm = llm_router.get_llm(llm_name)
         self.mood = "neutral"
+        if warm_up is None:
+            warm_up = _flag(_load_config().get("models", {}).get("warm_up", False))
+        self.warmup: ModelWarmup | None = None
+        if warm_up:
+            loaders = {"encoder": encoder._load_model}
+            if emotion_model.get_backend() != "lexicon":
+                loaders["emotion"] = emotion_model._load_classifier
+            self.warmup = ModelWarmup(loaders)
 
     def working_memory(self) -> List[str]:
         """Return contents of working memory as plain strings."""
         return [m.content for m in self.memory.working.contents()]
 
-    def receive(self, text: str) -> str:
-        """Process user input and return LLM response."""
+    def receive(
+        self, text: str, *, with_context: bool = False
+    ) -> str | Tuple[str, List[MemoryEntry]]:
+        """Process user input and return LLM response.
+
+        With ``with_context=True`` a ``(response, retrieved)`` tuple is
+        returned so callers can show the memories used without querying again.
+        """
         emotions = analyze_emotions(text)
         if emotions:
             self.mood = emotions[0][0]
@@ -41,12 +70,7 @@ class Agent:
 
         tags = tag_text(text)
         cue = build_cue(text, tags=tags, state={"mood": self.mood})
-        retriever = Retriever(
-            self.memory.all(),
-            semantic=self.memory.semantic.all(),
-            procedural=self.memory.procedural.all(),
-        )
-        retrieved = retriever.query(cue, top_k=5, mood=self.mood, tags=tags)
+        retrieved = self.memory.retriever.query(cue, top_k=5, mood=self.mood, tags=tags)
         reconstructor = Reconstructor()
         context = reconstructor.build_context(retrieved, mood=self.mood)
 
@@ -63,4 +87,6 @@ class Agent:
             emotion_scores={lbl: score for lbl, score in resp_emotions},
             metadata={"role": "assistant", "tags": resp_tags},
         )
+        if with_context:
+            return response, retrieved
         return response
@@ -0,0 +1,127 @@
+"""Columnar float32 storage for dense memory embeddings."""
+
+from __future__ import annotations
+
+import threading
+from typing import Dict, List
+
+try:  # pragma: no cover - optional dependency
+    import numpy as np
+except Exception:  # pragma: no cover - numpy may not be installed
+    np = None
+
+from core.memory_entry import MemoryEntry
+from encoding.encoder import is_dense
+
+
+class EmbeddingStore:
+    """Pack dense embeddings into fixed-size ``float32`` chunks.
+
+    :meth:`assign` copies an entry's vector into a free row and replaces
+    ``entry.embedding`` with a view of that row, so each memory holds a small
+    array header instead of hundreds of boxed floats. Chunks are never
+    reallocated, which keeps earlier views valid as the store grows. Token
+    embeddings, vectors of a different dimension and installs without NumPy
+    are left as they are.
+
+    With ``bind=False`` the vector is only copied in, for callers that score
+    rows through :meth:`dot` without owning the entry.
+
+    Row bookkeeping is guarded by a lock, since the chat thread and the
+    thinking and dreaming schedulers add and remove memories concurrently.
+    """
+
+    def __init__(self, chunk_rows: int = 1024) -> None:
+        self.chunk_rows = chunk_rows
+        self.dim: int | None = None
+        self._chunks: List["np.ndarray"] = []
+        self._rows: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def row(self, entry_id: str) -> int | None:
+        """Return the row holding ``entry_id``'s vector, if stored."""
+        with self._lock:
+            return self._rows.get(entry_id)
+
+    def vector(self, row: int) -> "np.ndarray":
+        """Return a view of ``row``."""
+        return self._chunks[row // self.chunk_rows][row % self.chunk_rows]
+
+    def dot(self, queries, rows) -> "np.ndarray":
+        """Return ``queries @ vectors[rows].T`` straight from the chunks.
+
+        ``queries`` is one vector or a 2-D batch. Chunks that most of
+        ``rows`` fall in are multiplied whole; otherwise only the picked rows
+        are gathered, so no full copy of the stored vectors is made.
+        """
+        q = np.asarray(queries, dtype=np.float32)
+        rows = np.asarray(rows, dtype=np.intp)
+        out = np.zeros(q.shape[:-1] + (len(rows),), dtype=np.float32)
+        if not len(rows):
+            return out
+        with self._lock:
+            chunks, used = list(self._chunks), self._next
+        chunk_ids = rows // self.chunk_rows
+        offsets = rows % self.chunk_rows
+        for c in np.unique(chunk_ids):
+            picked = np.flatnonzero(chunk_ids == c)
+            chunk = chunks[c]
+            if 2 * len(picked) >= min(self.chunk_rows, used - c * self.chunk_rows):
+                out[..., picked] = (q @ chunk.T)[..., offsets[picked]]
+            else:
+                out[..., picked] = q @ chunk[offsets[picked]].T
+        return out
+
+    def assign(self, entry: MemoryEntry, *, bind: bool = True) -> None:
+        """Move ``entry.embedding`` into the store, reusing the entry's row."""
+        if np is None:
+            return
+        if not is_dense(entry.embedding):
+            self.release(entry, bind=bind)
+            return
+        vec = np.asarray(entry.embedding, dtype=np.float32).ravel()
+        with self._lock:
+            if self.dim is None:
+                self.dim = vec.shape[0]
+            if vec.shape[0] != self.dim:
+                self._release_locked(entry, bind)
+                if bind:
+                    entry.embedding = vec
+                return
+            row = self._rows.get(entry.id)
+            if row is None:
+                row = self._free.pop() if self._free else self._grow()
+                self._rows[entry.id] = row
+            view = self.vector(row)
+            view[:] = vec
+            if bind:
+                entry.embedding = view
+
+    def release(self, entry: MemoryEntry, *, bind: bool = True) -> None:
+        """Free ``entry``'s row, leaving a bound entry with its own copy."""
+        with self._lock:
+            self._release_locked(entry, bind)
+
+    def _release_locked(self, entry: MemoryEntry, bind: bool) -> None:
+        row = self._rows.pop(entry.id, None)
+        if row is None:
+            return
+        if bind:
+            entry.embedding = np.array(entry.embedding)
+        self._free.append(row)
+
+    def _grow(self) -> int:
+        """Return a new row at the end, adding a chunk when full (lock held)."""
+        row = self._next
+        if row // self.chunk_rows == len(self._chunks):
+            self._chunks.append(np.zeros((self.chunk_rows, self.dim), dtype=np.float32))
+        self._next += 1
+        return row
+
+
+__all__ = ["EmbeddingStore"]
@@ -1,26 +1,54 @@
-"""Minimal emotion analyzer using a transformer model."""
+"""Minimal emotion analyzer using a transformer model or a word lexicon."""
 
 from __future__ import annotations
 
-from typing import List, Tuple
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Sequence, Tuple
 
 _classifier = None
+# Held while loading so concurrent first uses (e.g. a warm-up thread) load once
+_classifier_lock = threading.Lock()
+
+BACKENDS = ("transformer", "lexicon", "onnx")
+_backend = "transformer"
+_onnx_path: str | None = None
+
+# Memo of results keyed on (backend, text hash); see ``_cache_owner``
+_cache: "OrderedDict[Tuple[str, str], Tuple[Tuple[str, float], ...]]" = OrderedDict()
+_cache_size = 1024
+_cache_lock = threading.Lock()
+_cache_owner = None
+_cache_hits = 0
+_cache_misses = 0
 
 
 def _load_classifier():
     """Load emotion classifier lazily."""
     global _classifier
-    if _classifier is None:  # pragma: no cover - heavy dependency may be missing
-        try:
-            from transformers import pipeline
-
-            _classifier = pipeline(
-                "text-classification",
-                model="j-hartmann/emotion-english-distilroberta-base",
-                return_all_scores=True,
-            )
-        except Exception:  # pragma: no cover - optional dependency
-            _classifier = None
+    if _classifier is not None:
+        return _classifier
+    with _classifier_lock:
+        if _classifier is None and _backend == "onnx":
+            try:
+                from encoding.onnx_models import OnnxClassifier
+
+                _classifier = OnnxClassifier(_onnx_path)
+            except Exception:  # pragma: no cover - optional dependency
+                _classifier = None
+        elif _classifier is None:  # pragma: no cover - heavy dependency may be missing
+            try:
+                from transformers import pipeline
+
+                _classifier = pipeline(
+                    "text-classification",
+                    model="j-hartmann/emotion-english-distilroberta-base",
+                    return_all_scores=True,
+                )
+            except Exception:  # pragma: no cover - optional dependency
+                _classifier = None
     return _classifier
 
 
@@ -53,25 +81,224 @@ def _canonical(label: str) -> str:
     return _LABEL_MAP.get(label.lower(), label.lower())
 
 
-def analyze_emotions(text: str) -> List[Tuple[str, float]]:
-    """Return a list of detected emotion ``(label, score)`` pairs."""
-    clf = _load_classifier()
-    if clf is None:
-        return [("neutral", 0.0)]
+# Cue words for the lexicon backend, in the canonical label space above
+_LEXICON_WORDS = {
+    "happy": (
+        "happy glad joy joyful delighted cheerful excited thrilled great wonderful "
+        "awesome fantastic yay fun smile laugh celebrate hopeful optimistic"
+    ),
+    "sad": (
+        "sad unhappy sorrow grief grieving depressed miserable lonely cry crying "
+        "tears heartbroken disappointed upset gloomy regret miss"
+    ),
+    "angry": (
+        "angry mad furious annoyed irritated rage hate outraged frustrated "
+        "frustrating resent resentful livid"
+    ),
+    "disgust": "disgust disgusted disgusting gross revolting nasty yuck vile sickening",
+    "fear": (
+        "afraid scared fear fearful terrified nervous anxious worried worry panic "
+        "frightened dread uneasy"
+    ),
+    "love": "love loved loving adore beloved darling affection caring cherish dear",
+    "surprise": "surprise surprised surprising amazed astonished shocked unexpected wow whoa",
+    "embarrassed": "embarrassed embarrassing ashamed awkward humiliated mortified shy",
+    "pleasure": (
+        "pleased pleasure enjoy enjoyed satisfying satisfied admire approve proud "
+        "relaxed comfortable nice"
+    ),
+}
+_LEXICON: Dict[str, str] = {
+    word: label for label, words in _LEXICON_WORDS.items() for word in words.split()
+}
+_LEXICON.update({word: label for word, label in _LABEL_MAP.items() if label != "neutral"})
+_NEGATIONS = {"not", "no", "never", "nothing", "hardly", "don't", "didn't", "isn't", "wasn't"}
+_WORD_RE = re.compile(r"[a-z']+")
 
-    try:
-        result = clf(text)
-    except Exception:  # pragma: no cover - runtime issues
-        return [("neutral", 0.0)]
 
-    if not result:
-        return [("neutral", 0.0)]
+def _lexicon_emotions(text: str) -> List[Tuple[str, float]]:
+    """Score ``text`` by counting lexicon cue words, skipping negated ones."""
+    counts: Dict[str, int] = {}
+    previous = ""
+    for word in _WORD_RE.findall(text.lower()):
+        label = _LEXICON.get(word)
+        if label is not None and previous not in _NEGATIONS:
+            counts[label] = counts.get(label, 0) + 1
+        previous = word
+    total = sum(counts.values())
+    if not total:
+        return [("neutral", 1.0)]
+    pairs = [(label, count / total) for label, count in counts.items()]
+    pairs.sort(key=lambda x: x[1], reverse=True)
+    return pairs
 
-    preds = result[0] if isinstance(result[0], list) else result
+
+def set_backend(name: str, onnx_path: str | None = None) -> None:
+    """Select the ``"transformer"`` (default), ``"lexicon"`` or ``"onnx"`` backend.
+
+    The ONNX backend runs the exported classifier at ``onnx_path`` through
+    :class:`encoding.onnx_models.OnnxClassifier`.
+    """
+    global _backend, _onnx_path, _classifier
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown emotion backend: {name}")
+    if name == "onnx" and not onnx_path:
+        raise ValueError("The onnx emotion backend needs an onnx_path")
+    path = str(onnx_path) if name == "onnx" else None
+    if (name, path) != (_backend, _onnx_path):
+        with _classifier_lock:
+            _backend, _onnx_path = name, path
+            _classifier = None
+
+
+def get_backend() -> str:
+    """Return the name of the emotion backend in use."""
+    return _backend
+
+
+def set_cache_size(size: int) -> None:
+    """Bound the result cache to ``size`` entries (``0`` disables it)."""
+    global _cache_size
+    with _cache_lock:
+        _cache_size = max(0, int(size))
+        while len(_cache) > _cache_size:
+            _cache.popitem(last=False)
+
+
+def cache_stats() -> Dict[str, int]:
+    """Return hit/miss counters and current size of the result cache."""
+    with _cache_lock:
+        return {"hits": _cache_hits, "misses": _cache_misses, "size": len(_cache)}
+
+
+def clear_cache() -> None:
+    """Empty the result cache and reset its counters."""
+    global _cache_hits, _cache_misses
+    with _cache_lock:
+        _cache.clear()
+        _cache_hits = 0
+        _cache_misses = 0
+
+
+def _cache_key(text: str) -> Tuple[str, str]:
+    return _backend, hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _cache_get(key: Tuple[str, str], owner) -> List[Tuple[str, float]] | None:
+    global _cache_hits, _cache_misses, _cache_owner
+    with _cache_lock:
+        if owner is not _cache_owner:
+            # Results from a previously loaded classifier no longer apply
+            _cache.clear()
+            _cache_owner = owner
+        pairs = _cache.get(key)
+        if pairs is not None:
+            _cache.move_to_end(key)
+            _cache_hits += 1
+            return list(pairs)
+        _cache_misses += 1
+        return None
+
+
+def _cache_put(key: Tuple[str, str], pairs: List[Tuple[str, float]]) -> None:
+    with _cache_lock:
+        if _cache_size:
+            _cache[key] = tuple(pairs)
+            _cache.move_to_end(key)
+            while len(_cache) > _cache_size:
+                _cache.popitem(last=False)
+
+
+def _pairs(preds) -> List[Tuple[str, float]]:
+    """Convert pipeline predictions for one text into sorted pairs."""
+    if isinstance(preds, dict):
+        preds = [preds]
     pairs = []
     for item in preds:
         label = _canonical(str(item.get("label", "")))
         score = float(item.get("score", 0.0))
         pairs.append((label, score))
     pairs.sort(key=lambda x: x[1], reverse=True)
+    return pairs or [("neutral", 0.0)]
+
+
+def _classify(clf, text: str) -> List[Tuple[str, float]] | None:
+    try:
+        result = clf(text)
+    except Exception:  # pragma: no cover - runtime issues
+        return None
+
+    if not result:
+        return None
+
+    preds = result[0] if isinstance(result[0], list) else result
+    return _pairs(preds)
+
+
+def analyze_emotions(text: str) -> List[Tuple[str, float]]:
+    """Return a list of detected emotion ``(label, score)`` pairs.
+
+    Results are memoized per backend and text hash (see
+    :func:`set_cache_size`).
+    """
+    if _backend == "lexicon":
+        key = _cache_key(text)
+        pairs = _cache_get(key, "lexicon")
+        if pairs is None:
+            pairs = _lexicon_emotions(text)
+            _cache_put(key, pairs)
+        return pairs
+
+    clf = _load_classifier()
+    if clf is None:
+        return [("neutral", 0.0)]
+
+    key = _cache_key(text)
+    pairs = _cache_get(key, clf)
+    if pairs is not None:
+        return pairs
+    pairs = _classify(clf, text)
+    if pairs is None:
+        return [("neutral", 0.0)]
+    _cache_put(key, pairs)
     return pairs
+
+
+def analyze_emotions_batch(
+    texts: Sequence[str], batch_size: int = 32
+) -> List[List[Tuple[str, float]]]:
+    """Return :func:`analyze_emotions` results for many ``texts`` at once.
+
+    The texts go through the pipeline in batches of ``batch_size`` with
+    truncation and padding, so tokenizer and model overhead is paid per batch
+    instead of per text. Cached texts are not classified again.
+    """
+    texts = list(texts)
+    if not texts:
+        return []
+    if _backend == "lexicon":
+        return [analyze_emotions(text) for text in texts]
+    clf = _load_classifier()
+    if clf is None:
+        return [[("neutral", 0.0)] for _ in texts]
+
+    keys = [_cache_key(text) for text in texts]
+    found = [_cache_get(key, clf) for key in keys]
+    missing = [i for i, pairs in enumerate(found) if pairs is None]
+    if not missing:
+        return found
+    pending = [texts[i] for i in missing]
+    try:
+        results = clf(pending, batch_size=batch_size, truncation=True, padding=True)
+    except Exception:  # pragma: no cover - runtime issues
+        results = None
+    if not results or len(results) != len(pending):
+        # Classify one by one so a single bad input does not sink the batch
+        results = None
+    for j, i in enumerate(missing):
+        if results is None:
+            found[i] = analyze_emotions(texts[i])
+        else:
+            found[i] = _pairs(results[j])
+            _cache_put(keys[i], found[i])
+    return found
@@ -3,11 +3,19 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import List, Dict, Any
+from uuid import uuid4
 
 
-@dataclass
+@dataclass(slots=True, eq=False)
 class MemoryEntry:
-    """Single piece of stored memory."""
+    """Single piece of stored memory.
+
+    Entries compare by identity; ``embedding`` may be a NumPy array (usually
+    a row view into the owning store's
+    :class:`~core.embedding_store.EmbeddingStore`), which has no usable
+    ``==``. ``id`` is a UUID hex string that serves as the row's primary key
+    in storage. Slots keep the per-entry footprint small.
+    """
 
     content: str
     embedding: List[str] | List[float]
@@ -15,3 +23,4 @@ class MemoryEntry:
     emotions: List[str] = field(default_factory=list)
     emotion_scores: Dict[str, float] = field(default_factory=dict)
     metadata: Dict[str, Any] = field(default_factory=dict)
+    id: str = field(default_factory=lambda: uuid4().hex)
@@ -2,49 +2,250 @@
 
 from __future__ import annotations
 
-from typing import Iterable, List
+import heapq
+import threading
+from itertools import repeat
+from typing import Iterable, Iterator, List, Sequence, Tuple
 
 from pathlib import Path
 
+from core import emotion_model
+from core.embedding_store import EmbeddingStore
 from core.memory_entry import MemoryEntry
 from core.memory_types.episodic import EpisodicMemory
 from core.memory_types.semantic import SemanticMemory
 from core.memory_types.procedural import ProceduralMemory
 from core.working_memory import WorkingMemory
 from reconstruction.reconstructor import _load_config
+from retrieval.retriever import Retriever
 from dreaming.dream_engine import DreamEngine
 from thinking.thinking_engine import ThinkingEngine
 from ms_utils.scheduler import Scheduler
 import time
-from storage.db_interface import Database
+from storage.db_interface import DEFAULT_PRAGMAS, Database
+from storage.faiss_index import FaissIndex
+from encoding.encoder import is_dense, set_backend, set_cache_path, set_cache_size
+
+
+def _flag(value) -> bool:
+    """Interpret a config value as a boolean (the fallback parser yields strings)."""
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return bool(value)
 
 
 class MemoryManager:
     """Coordinator for different memory systems."""
 
-    def __init__(self, db_path: str | Path = "memory.db") -> None:
-        self.db = Database(db_path)
+    def __init__(self, db_path: str | Path = "memory.db", *, lazy: bool | None = None) -> None:
+        """Open ``db_path`` and load its memories.
+
+        With ``lazy`` (default: ``memory.lazy_load`` in the config) only the
+        working-memory window and the saved vector index are read at startup.
+        The full stores and the retriever are hydrated page by page the first
+        time they are needed.
+        """
         cfg = _load_config()
+        store_cfg = cfg.get("storage", {})
+        self.db = Database(
+            db_path,
+            embedding_dtype=store_cfg.get("embedding_dtype", "float32"),
+            write_behind=_flag(store_cfg.get("write_behind", False)),
+            flush_interval=float(store_cfg.get("flush_interval", 1.0)),
+            pragmas={k: store_cfg[k] for k in DEFAULT_PRAGMAS if k in store_cfg},
+            max_readers=int(store_cfg.get("max_readers", 4)),
+        )
         working_size = cfg.get("memory", {}).get("working_size", 10)
-        self.episodic = EpisodicMemory()
-        self.semantic = SemanticMemory()
-        self.procedural = ProceduralMemory()
+        enc_cfg = cfg.get("encoding", {})
+        set_backend(enc_cfg.get("backend", "sentence_transformers"), enc_cfg.get("onnx_path"))
+        set_cache_size(enc_cfg.get("cache_size", 1024))
+        if enc_cfg.get("cache_path"):
+            set_cache_path(enc_cfg["cache_path"])
+        emo_cfg = cfg.get("emotion", {})
+        emotion_model.set_backend(emo_cfg.get("backend", "transformer"), emo_cfg.get("onnx_path"))
+        emotion_model.set_cache_size(emo_cfg.get("cache_size", 1024))
+        # One packed vector store backs all three stores and the retriever
+        self.embeddings = EmbeddingStore()
+        self.episodic = EpisodicMemory(self.embeddings)
+        self.semantic = SemanticMemory(self.embeddings)
+        self.procedural = ProceduralMemory(self.embeddings)
         self.working = WorkingMemory(working_size)
+        self.working.attach(self.episodic)
 
         self._next_think_time: float | None = None
         self._think_end_time: float | None = None
         self._next_dream_time: float | None = None
         self._dream_end_time: float | None = None
 
-        # Load any existing memories from the database into memory stores
-        episodic = self.db.load_all()
-        self.episodic._entries.extend(episodic)
-        semantic = self.db.load_all_semantic()
-        self.semantic._entries.extend(semantic)
-        procedural = self.db.load_all_procedural()
-        self.procedural._entries.extend(procedural)
-        if episodic:
-            self.working.load(self.episodic.all())
+        retrieval_cfg = cfg.get("retrieval", {})
+        self._index_options = {
+            k: retrieval_cfg[k] for k in Retriever.INDEX_OPTIONS if k in retrieval_cfg
+        }
+        self._persist_index = _flag(store_cfg.get("persist_index", True))
+        if lazy is None:
+            lazy = _flag(cfg.get("memory", {}).get("lazy_load", False))
+        self._retriever: Retriever | None = None
+        # Bumped by every add, update, delete, prune and discard so callers
+        # can spot changes even when the count stays the same
+        self.generation = 0
+        # id -> entry and id -> "episodic"/"semantic"/"procedural"
+        self._by_id: dict[str, MemoryEntry] = {}
+        self._types: dict[str, str] = {}
+        self._hydrated = False
+        self._hydrate_lock = threading.Lock()
+        self._saved_index: Tuple[FaissIndex, dict] | None = None
+        if lazy:
+            self.working.load(self.db.load_recent(working_size))
+            if self._persist_index:
+                self._saved_index = self._read_index()
+        else:
+            self._hydrate()
+
+    @property
+    def retriever(self) -> Retriever:
+        """Long-lived retriever kept in sync with every write below."""
+        self._hydrate()
+        return self._retriever
+
+    def _hydrate(self) -> None:
+        """Load all stored memories into the stores and build the retriever."""
+        if self._hydrated:
+            return
+        with self._hydrate_lock:
+            if self._hydrated:
+                return
+            sources = (
+                ("episodic", self.episodic, self.db.iter_all()),
+                ("semantic", self.semantic, self.db.iter_all_semantic()),
+                ("procedural", self.procedural, self.db.iter_all_procedural()),
+            )
+            for kind, store, rows in sources:
+                # Keep the objects for entries added before hydration
+                fresh, store._entries = store._entries, {}
+                store.load(fresh.pop(entry.id, entry) for entry in rows)
+                store.load(fresh.values())
+                for entry in store.all():
+                    self._by_id[entry.id] = entry
+                    self._types[entry.id] = kind
+            self.working.load(self.episodic.recent(self.working.max_size))
+            index = self._open_index() if self._persist_index else None
+            self._retriever = Retriever(
+                self.episodic.all(),
+                semantic=self.semantic.all(),
+                procedural=self.procedural.all(),
+                index_options=self._index_options,
+                index=index,
+                embeddings=self.embeddings,
+            )
+            self._hydrated = True
+        if index is None and self._persist_index:
+            self.save_index()
+
+    @property
+    def index_path(self) -> Path | None:
+        """File the vector index is saved to, or ``None`` for in-memory databases."""
+        if str(self.db.path) == ":memory:":
+            return None
+        return self.db.path.with_name(self.db.path.name + ".faiss")
+
+    def _read_index(self) -> Tuple[FaissIndex, dict] | None:
+        """Read the saved vector index file and its header, if still current."""
+        path = self.index_path
+        if path is None:
+            return None
+        header = FaissIndex.read_header(path)
+        if header is None or header.get("generation") != self.db.generation():
+            return None
+        index = FaissIndex.open(path, **self._index_options)
+        return None if index is None else (index, header)
+
+    def _open_index(self) -> FaissIndex | None:
+        """Label the saved vector index and append rows written since it was saved.
+
+        Returns ``None`` (so the retriever rebuilds) when there is no usable
+        file or rows were updated or deleted after it was written.
+        """
+        saved, self._saved_index = self._saved_index or self._read_index(), None
+        if saved is None:
+            return None
+        index, header = saved
+        if header.get("generation") != self.db.generation():
+            # Changed by another writer since a lazy start read the file
+            return None
+        dense = [m for m in self._by_id.values() if is_dense(m.embedding)]
+        if not index.attach(dense):
+            return None
+        new = (self._by_id.get(i) for i in self.db.ids_since(header.get("watermark", {})))
+        index.add([m for m in new if m is not None and is_dense(m.embedding)])
+        if len(index) != len(dense):
+            return None
+        return index
+
+    def save_index(self) -> None:
+        """Persist the retriever's vector index next to the database."""
+        path = self.index_path
+        if path is None or not self._hydrated:
+            return
+        index = self._retriever.vector_index
+        if not isinstance(index, FaissIndex):
+            # Nothing built, or a built-in fallback index that is cheap to rebuild
+            return
+        index.save(path, watermark=self.db.watermark(), generation=self.db.generation())
+
+    def close(self) -> None:
+        """Stop background tasks, save the vector index and close the database."""
+        self.stop_thinking()
+        self.stop_dreaming()
+        if self._persist_index:
+            self.save_index()
+        self.db.close()
+
+    def _index(self, entries: Iterable[MemoryEntry], memory_type: str) -> None:
+        """Register new ``entries`` and add them to the retriever once it exists."""
+        self.generation += 1
+        for entry in entries:
+            self._by_id[entry.id] = entry
+            self._types[entry.id] = memory_type
+            if self._retriever is not None:
+                self._retriever.add(entry, memory_type)
+
+    def _forget(self, entry: MemoryEntry) -> None:
+        self.generation += 1
+        self._by_id.pop(entry.id, None)
+        self._types.pop(entry.id, None)
+        self.retriever.remove(entry)
+
+    def discard(self, entries: Iterable[MemoryEntry]) -> None:
+        """Drop ``entries`` from the in-memory stores without touching the database.
+
+        Used to undo adds whose writes were rolled back, e.g. by a failed
+        :meth:`Database.transaction` block.
+        """
+        stores = {"episodic": self.episodic, "semantic": self.semantic, "procedural": self.procedural}
+        self.generation += 1
+        for entry in entries:
+            if self._by_id.get(entry.id) is not entry:
+                continue
+            stores[self._types[entry.id]].remove(entry)
+            self._by_id.pop(entry.id)
+            self._types.pop(entry.id)
+            if self._retriever is not None:
+                self._retriever.remove(entry)
+        if not self._hydrated:
+            # The episodic store only holds new entries, so backfill from disk
+            self.working.load(self.db.load_recent(self.working.max_size))
+
+    def get(self, entry_id: str) -> MemoryEntry | None:
+        """Return the memory with ``entry_id`` from any store."""
+        self._hydrate()
+        return self._by_id.get(entry_id)
+
+    def memory_type(self, entry: MemoryEntry) -> str | None:
+        """Return ``"episodic"``, ``"semantic"`` or ``"procedural"`` for ``entry``."""
+        self._hydrate()
+        if self._by_id.get(entry.id) is not entry:
+            return None
+        return self._types[entry.id]
 
     def add(
         self,
@@ -53,8 +254,48 @@ class MemoryManager:
         emotions: Iterable[str] | None = None,
         emotion_scores: dict[str, float] | None = None,
         metadata: dict | None = None,
+        embedding: List[str] | List[float] | None = None,
     ) -> MemoryEntry:
         """Add content to episodic memory and update working memory."""
+        entry = self.episodic.add(
+            content,
+            emotions=emotions,
+            emotion_scores=emotion_scores,
+            metadata=self._tagged(content, metadata),
+            embedding=embedding,
+        )
+        self.db.save(entry)
+        self._index([entry], "episodic")
+        return entry
+
+    def add_many(
+        self,
+        contents: Sequence[str],
+        *,
+        emotions: Sequence[Iterable[str] | None] | None = None,
+        emotion_scores: Sequence[dict[str, float] | None] | None = None,
+        metadata: Sequence[dict | None] | None = None,
+        embeddings: Sequence | None = None,
+    ) -> List[MemoryEntry]:
+        """Add several episodic memories, embedding them in one batch."""
+        metas = [
+            self._tagged(content, metadata[i] if metadata else None)
+            for i, content in enumerate(contents)
+        ]
+        entries = self.episodic.add_many(
+            contents,
+            emotions=emotions,
+            emotion_scores=emotion_scores,
+            metadata=metas,
+            embeddings=embeddings,
+        )
+        self.db.bulk_save(entries)
+        self._index(entries, "episodic")
+        return entries
+
+    @staticmethod
+    def _tagged(content: str, metadata: dict | None) -> dict:
+        """Return a copy of ``metadata`` with keyword tags for ``content`` merged in."""
         from encoding.tagging import tag_text
 
         tags = tag_text(content)
@@ -64,22 +305,15 @@ class MemoryManager:
             if tag not in meta_tags:
                 meta_tags.append(tag)
         meta["tags"] = meta_tags
-
-        entry = self.episodic.add(
-            content,
-            emotions=emotions,
-            emotion_scores=emotion_scores,
-            metadata=meta,
-        )
-        self.db.save(entry)
-        self.working.load(self.episodic.all())
-        return entry
+        return meta
 
     def all(self) -> List[MemoryEntry]:
+        self._hydrate()
         return self.episodic.all()
 
     def all_memories(self) -> List[MemoryEntry]:
         """Return episodic, semantic and procedural memories sorted by timestamp."""
+        self._hydrate()
         entries = (
             list(self.episodic.all())
             + list(self.semantic.all())
@@ -87,29 +321,66 @@ class MemoryManager:
         )
         return sorted(entries, key=lambda m: m.timestamp)
 
+    def count(self) -> int:
+        """Return how many memories are stored, without hydrating the stores."""
+        if self._hydrated:
+            return len(self.episodic) + len(self.semantic) + len(self.procedural)
+        return self.db.count()
+
+    def iter_memories(self, page_size: int = 500) -> Iterator[Tuple[str, MemoryEntry]]:
+        """Yield ``(memory_type, entry)`` for every memory in timestamp order.
+
+        Before hydration the rows are paged straight from the database, so
+        browsing a lazily opened store neither loads it nor builds the
+        retriever. The entries are then copies of the stored rows.
+        """
+        # heapq.merge needs each source already in timestamp order
+        if self._hydrated:
+            stores = (
+                ("episodic", self.episodic),
+                ("semantic", self.semantic),
+                ("procedural", self.procedural),
+            )
+            sources = tuple(
+                (kind, sorted(store.all(), key=lambda m: m.timestamp)) for kind, store in stores
+            )
+        else:
+            sources = (
+                ("episodic", self.db.iter_all(page_size, by_time=True)),
+                ("semantic", self.db.iter_all_semantic(page_size, by_time=True)),
+                ("procedural", self.db.iter_all_procedural(page_size, by_time=True)),
+            )
+        return heapq.merge(
+            *(zip(repeat(kind), rows) for kind, rows in sources),
+            key=lambda item: item[1].timestamp,
+        )
+
     def prune(self, max_entries: int) -> None:
         """Remove oldest episodic memories beyond ``max_entries``."""
-        self.episodic.prune(max_entries)
-        self.working.load(self.episodic.all())
+        self._hydrate()
+        for entry in self.episodic.prune(max_entries):
+            self._forget(entry)
 
     def delete(self, entry: MemoryEntry) -> None:
         """Remove ``entry`` from memory and persistent storage."""
-        if entry in self.episodic._entries:
-            self.episodic._entries.remove(entry)
-            self.db.delete(entry.timestamp)
-            self.working.load(self.episodic.all())
+        if self.memory_type(entry) == "episodic":
+            self.episodic.remove(entry)
+            self.db.delete(entry.id)
+            self._forget(entry)
 
     def update(self, entry: MemoryEntry, new_content: str) -> None:
         """Modify the content of ``entry`` and persist the change."""
-        if entry in self.episodic._entries:
+        if self.memory_type(entry) == "episodic":
             entry.content = new_content
             from encoding.encoder import encode_text
             from encoding.tagging import tag_text
 
             entry.embedding = encode_text(new_content)
+            self.embeddings.assign(entry)
             entry.metadata["tags"] = tag_text(new_content)
-            self.db.update(entry.timestamp, entry)
-            self.working.load(self.episodic.all())
+            self.db.update(entry.id, entry)
+            self.retriever.update(entry)
+            self.generation += 1
 
     # --- Semantic memory helpers ---
     def add_semantic(
@@ -119,28 +390,35 @@ class MemoryManager:
         emotions: Iterable[str] | None = None,
         emotion_scores: dict[str, float] | None = None,
         metadata: dict | None = None,
+        embedding: List[str] | List[float] | None = None,
     ) -> MemoryEntry:
         entry = self.semantic.add(
             content,
             emotions=emotions,
             emotion_scores=emotion_scores,
             metadata=metadata,
+            embedding=embedding,
         )
         self.db.save_semantic(entry)
+        self._index([entry], "semantic")
         return entry
 
     def delete_semantic(self, entry: MemoryEntry) -> None:
-        if entry in self.semantic._entries:
-            self.semantic._entries.remove(entry)
-            self.db.delete_semantic(entry.timestamp)
+        if self.memory_type(entry) == "semantic":
+            self.semantic.remove(entry)
+            self.db.delete_semantic(entry.id)
+            self._forget(entry)
 
     def update_semantic(self, entry: MemoryEntry, new_content: str) -> None:
-        if entry in self.semantic._entries:
+        if self.memory_type(entry) == "semantic":
             entry.content = new_content
             from encoding.encoder import encode_text
 
             entry.embedding = encode_text(new_content)
-            self.db.update_semantic(entry.timestamp, entry)
+            self.embeddings.assign(entry)
+            self.db.update_semantic(entry.id, entry)
+            self.retriever.update(entry)
+            self.generation += 1
 
     # --- Procedural memory helpers ---
     def add_procedural(
@@ -150,28 +428,35 @@ class MemoryManager:
         emotions: Iterable[str] | None = None,
         emotion_scores: dict[str, float] | None = None,
         metadata: dict | None = None,
+        embedding: List[str] | List[float] | None = None,
     ) -> MemoryEntry:
         entry = self.procedural.add(
             content,
             emotions=emotions,
             emotion_scores=emotion_scores,
             metadata=metadata,
+            embedding=embedding,
         )
         self.db.save_procedural(entry)
+        self._index([entry], "procedural")
         return entry
 
     def delete_procedural(self, entry: MemoryEntry) -> None:
-        if entry in self.procedural._entries:
-            self.procedural._entries.remove(entry)
-            self.db.delete_procedural(entry.timestamp)
+        if self.memory_type(entry) == "procedural":
+            self.procedural.remove(entry)
+            self.db.delete_procedural(entry.id)
+            self._forget(entry)
 
     def update_procedural(self, entry: MemoryEntry, new_content: str) -> None:
-        if entry in self.procedural._entries:
+        if self.memory_type(entry) == "procedural":
             entry.content = new_content
             from encoding.encoder import encode_text
 
             entry.embedding = encode_text(new_content)
-            self.db.update_procedural(entry.timestamp, entry)
+            self.embeddings.assign(entry)
+            self.db.update_procedural(entry.id, entry)
+            self.retriever.update(entry)
+            self.generation += 1
 
     def start_dreaming(
         self,
@@ -0,0 +1,100 @@
+"""Shared implementation of the in-memory stores."""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Sequence
+
+from core.embedding_store import EmbeddingStore
+from core.memory_entry import MemoryEntry
+from encoding.encoder import encode_text, encode_texts
+
+
+class MemoryStore:
+    """Dict-backed store of :class:`MemoryEntry` objects keyed by id.
+
+    ``embeddings`` packs the dense vectors and may be shared by several
+    stores. Subclasses may override :meth:`_stored` and :meth:`_dropped` to
+    react to entries entering or leaving the store.
+    """
+
+    def __init__(self, embeddings: EmbeddingStore | None = None) -> None:
+        # Keyed by entry id; dict order keeps insertion (chronological) order
+        self._entries: Dict[str, MemoryEntry] = {}
+        # May be shared with other stores (ids are unique across them)
+        self.embeddings = embeddings if embeddings is not None else EmbeddingStore()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, entry: MemoryEntry) -> bool:
+        return self._entries.get(entry.id) is entry
+
+    def _stored(self, entry: MemoryEntry) -> None:
+        """Hook called after ``entry`` is added."""
+
+    def _dropped(self, entry: MemoryEntry) -> None:
+        """Hook called after ``entry`` is removed."""
+
+    def add(
+        self,
+        content: str,
+        *,
+        emotions: Iterable[str] | None = None,
+        emotion_scores: dict[str, float] | None = None,
+        metadata: dict | None = None,
+        embedding: List[str] | List[float] | None = None,
+    ) -> MemoryEntry:
+        entry = MemoryEntry(
+            content=content,
+            embedding=embedding if embedding is not None else encode_text(content),
+            emotions=list(emotions or []),
+            emotion_scores=emotion_scores or {},
+            metadata=metadata or {},
+        )
+        self.load([entry])
+        return entry
+
+    def add_many(
+        self,
+        contents: Sequence[str],
+        *,
+        emotions: Sequence[Iterable[str] | None] | None = None,
+        emotion_scores: Sequence[dict[str, float] | None] | None = None,
+        metadata: Sequence[dict | None] | None = None,
+        embeddings: Sequence | None = None,
+    ) -> List[MemoryEntry]:
+        """Add several entries, encoding their contents in one batch."""
+        if embeddings is None:
+            embeddings = encode_texts(contents)
+        entries = []
+        for i, content in enumerate(contents):
+            entries.append(
+                MemoryEntry(
+                    content=content,
+                    embedding=embeddings[i],
+                    emotions=list((emotions[i] if emotions else None) or []),
+                    emotion_scores=(emotion_scores[i] if emotion_scores else None) or {},
+                    metadata=(metadata[i] if metadata else None) or {},
+                )
+            )
+        self.load(entries)
+        return entries
+
+    def load(self, entries: Iterable[MemoryEntry]) -> None:
+        """Append existing ``entries`` (e.g. rows read from the database)."""
+        for entry in entries:
+            self.embeddings.assign(entry)
+            self._entries[entry.id] = entry
+            self._stored(entry)
+
+    def get(self, entry_id: str) -> MemoryEntry | None:
+        return self._entries.get(entry_id)
+
+    def remove(self, entry: MemoryEntry) -> None:
+        """Drop ``entry`` if present."""
+        if self._entries.pop(entry.id, None) is not None:
+            self.embeddings.release(entry)
+            self._dropped(entry)
+
+    def all(self) -> List[MemoryEntry]:
+        return list(self._entries.values())
@@ -2,40 +2,43 @@
 
 from __future__ import annotations
 
-from typing import Iterable, List
+from itertools import islice
+from typing import List
 
+from core.embedding_store import EmbeddingStore
 from core.memory_entry import MemoryEntry
-from encoding.encoder import encode_text
-
-
-class EpisodicMemory:
-    """Simple list-based episodic memory."""
-
-    def __init__(self) -> None:
-        self._entries: List[MemoryEntry] = []
-
-    def add(
-        self,
-        content: str,
-        *,
-        emotions: Iterable[str] | None = None,
-        emotion_scores: dict[str, float] | None = None,
-        metadata: dict | None = None,
-    ) -> MemoryEntry:
-        entry = MemoryEntry(
-            content=content,
-            embedding=encode_text(content),
-            emotions=list(emotions or []),
-            emotion_scores=emotion_scores or {},
-            metadata=metadata or {},
-        )
-        self._entries.append(entry)
-        return entry
-
-    def all(self) -> List[MemoryEntry]:
-        return list(self._entries)
-
-    def prune(self, max_entries: int) -> None:
-        """Drop oldest entries beyond ``max_entries``."""
+from core.memory_types.base import MemoryStore
+
+
+class EpisodicMemory(MemoryStore):
+    """Simple dict-backed episodic memory."""
+
+    def __init__(self, embeddings: EmbeddingStore | None = None) -> None:
+        super().__init__(embeddings)
+        self._watchers: List = []
+
+    def _stored(self, entry: MemoryEntry) -> None:
+        for watcher in self._watchers:
+            watcher.push(entry)
+
+    def _dropped(self, entry: MemoryEntry) -> None:
+        for watcher in self._watchers:
+            watcher.evict(entry)
+
+    def watch(self, watcher) -> None:
+        """Send ``push(entry)``/``evict(entry)`` events to ``watcher``."""
+        self._watchers.append(watcher)
+
+    def recent(self, n: int) -> List[MemoryEntry]:
+        """Return the ``n`` newest entries, oldest first."""
+        return list(islice(reversed(self._entries.values()), n))[::-1]
+
+    def prune(self, max_entries: int) -> List[MemoryEntry]:
+        """Drop oldest entries beyond ``max_entries`` and return them."""
         if len(self._entries) > max_entries:
-            self._entries = self._entries[-max_entries:]
+            cut = len(self._entries) - max_entries
+            removed = list(islice(self._entries.values(), cut))
+            for entry in removed:
+                self.remove(entry)
+            return removed
+        return []
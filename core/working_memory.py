@@ -2,20 +2,45 @@
 
 from __future__ import annotations
 
-from typing import Iterable, List
+from collections import deque
+from typing import Deque, Iterable, List
 
 from core.memory_entry import MemoryEntry
 
 
 class WorkingMemory:
-    """Maintain a limited-size list of active memories."""
+    """Maintain a limited-size window of active memories.
+
+    The window is a bounded deque. After :meth:`attach`, the episodic store
+    sends it ``push`` and ``evict`` events, so each write costs O(1) instead of
+    reloading the whole history.
+    """
 
     def __init__(self, max_size: int = 10) -> None:
         self.max_size = max_size
-        self._entries: List[MemoryEntry] = []
+        self._entries: Deque[MemoryEntry] = deque(maxlen=max_size)
+        self._source = None
+
+    def attach(self, store) -> None:
+        """Follow ``store``'s additions and removals."""
+        self._source = store
+        store.watch(self)
 
     def load(self, memories: Iterable[MemoryEntry]) -> None:
-        self._entries = list(memories)[-self.max_size :]
+        self._entries = deque(memories, maxlen=self.max_size)
+
+    def push(self, entry: MemoryEntry) -> None:
+        """Append ``entry``, dropping the oldest once the window is full."""
+        self._entries.append(entry)
+
+    def evict(self, entry: MemoryEntry) -> None:
+        """Drop ``entry`` and backfill the window from the attached store."""
+        if not any(m is entry for m in self._entries):
+            return
+        if self._source is not None:
+            self.load(self._source.recent(self.max_size))
+        else:
+            self._entries = deque((m for m in self._entries if m is not entry), maxlen=self.max_size)
 
     def contents(self) -> List[MemoryEntry]:
         return list(self._entries)
@@ -2,14 +2,41 @@
 
 from __future__ import annotations
 
+import hashlib
+import numbers
 import re
-from typing import List
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+try:  # pragma: no cover - optional dependency
+    import numpy as np
+except Exception:  # pragma: no cover - numpy may not be installed
+    np = None
 
 _TOKEN_RE = re.compile(r"\w+")
 
 _model = None
 _model_failed = False
 _model_name = "all-MiniLM-L6-v2"
+BACKENDS = ("sentence_transformers", "onnx")
+_backend = "sentence_transformers"
+_onnx_path: str | None = None
+# Held while loading so concurrent first uses (e.g. a warm-up thread) load once
+_model_lock = threading.Lock()
+
+# Content-addressed embedding cache keyed on (model name, text hash). Values
+# are read-only float32 arrays (tuples without NumPy) shared by every hit.
+_cache: "OrderedDict[Tuple[str, str], Sequence[float]]" = OrderedDict()
+_cache_size = 1024
+_cache_lock = threading.Lock()
+_cache_hits = 0
+_cache_misses = 0
+_disk_conn: sqlite3.Connection | None = None
+_cache_path: str | None = None
 
 
 def set_model_name(name: str) -> None:
@@ -19,6 +46,179 @@ def set_model_name(name: str) -> None:
         _model_name = name
         _model = None
         _model_failed = False
+        with _cache_lock:
+            _cache.clear()
+
+
+def set_backend(name: str, onnx_path: str | Path | None = None) -> None:
+    """Select ``"sentence_transformers"`` (default) or ``"onnx"`` inference.
+
+    The ONNX backend runs the exported model at ``onnx_path`` through
+    :class:`encoding.onnx_models.OnnxEncoder`.
+    """
+    global _model, _model_failed, _backend, _onnx_path
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown encoder backend: {name}")
+    if name == "onnx" and not onnx_path:
+        raise ValueError("The onnx encoder backend needs an onnx_path")
+    path = str(onnx_path) if name == "onnx" else None
+    if (name, path) != (_backend, _onnx_path):
+        with _model_lock:
+            _backend, _onnx_path = name, path
+            _model = None
+            _model_failed = False
+        with _cache_lock:
+            _cache.clear()
+
+
+def get_backend() -> str:
+    """Return the name of the encoder backend in use."""
+    return _backend
+
+
+def get_model_name() -> str:
+    """Return the name of the sentence-transformers model in use."""
+    return _model_name
+
+
+def is_dense(embedding) -> bool:
+    """Return ``True`` if ``embedding`` is a numeric vector rather than tokens."""
+    return len(embedding) > 0 and isinstance(embedding[0], numbers.Real)
+
+
+def set_cache_size(size: int) -> None:
+    """Bound the in-memory embedding cache to ``size`` entries (``0`` disables it)."""
+    global _cache_size
+    with _cache_lock:
+        _cache_size = max(0, int(size))
+        while len(_cache) > _cache_size:
+            _cache.popitem(last=False)
+
+
+def set_cache_path(path: str | Path | None) -> None:
+    """Persist cached embeddings in an SQLite file at ``path`` (``None`` disables)."""
+    global _disk_conn, _cache_path
+    with _cache_lock:
+        if _disk_conn is not None:
+            _disk_conn.close()
+            _disk_conn = None
+        _cache_path = None if path is None else str(path)
+        if path is None:
+            return
+        conn = sqlite3.connect(str(path), check_same_thread=False)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (model TEXT, key TEXT, vector BLOB, PRIMARY KEY (model, key))"
+        )
+        conn.commit()
+        _disk_conn = conn
+
+
+def get_cache_path() -> str | None:
+    """Return the file backing the persistent embedding cache, if any."""
+    return _cache_path
+
+
+def cache_stats() -> Dict[str, int]:
+    """Return hit/miss counters and current size of the embedding cache."""
+    with _cache_lock:
+        return {"hits": _cache_hits, "misses": _cache_misses, "size": len(_cache)}
+
+
+def clear_cache() -> None:
+    """Empty the in-memory cache and reset its counters."""
+    global _cache_hits, _cache_misses
+    with _cache_lock:
+        _cache.clear()
+        _cache_hits = 0
+        _cache_misses = 0
+
+
+def _cache_key(text: str) -> Tuple[str, str]:
+    # ONNX exports are keyed by file so their vectors never mix with PyTorch's
+    return (_onnx_path or _model_name), hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _freeze(vec) -> Sequence[float]:
+    """Return ``vec`` as an immutable ``float32`` vector for the cache."""
+    if np is None:
+        return tuple(array("f", vec))
+    frozen = np.array(vec, dtype=np.float32)
+    frozen.flags.writeable = False
+    return frozen
+
+
+def _thaw(vec: Sequence[float]) -> List[float]:
+    return vec.tolist() if np is not None and isinstance(vec, np.ndarray) else list(vec)
+
+
+def _cache_get(key: Tuple[str, str]) -> Sequence[float] | None:
+    global _cache_hits, _cache_misses
+    with _cache_lock:
+        vec = _cache.get(key)
+        if vec is not None:
+            _cache.move_to_end(key)
+            _cache_hits += 1
+            return vec
+        conn = _disk_conn
+    row = None
+    if conn is not None:
+        # Query outside the lock so a disk read doesn't stall memory hits
+        try:
+            row = conn.execute(
+                "SELECT vector FROM embeddings WHERE model=? AND key=?", key
+            ).fetchone()
+        except sqlite3.ProgrammingError:
+            # Closed by set_cache_path meanwhile
+            row = None
+    with _cache_lock:
+        if row is None:
+            _cache_misses += 1
+            return None
+        if np is not None:
+            # A view of the immutable blob, so already read-only
+            vec = np.frombuffer(row[0], dtype=np.float32)
+        else:
+            vec = tuple(array("f", row[0]))
+        _cache_put_locked(key, vec, persist=False)
+        _cache_hits += 1
+        return vec
+
+
+def _cache_put_locked(key: Tuple[str, str], vec: Sequence[float], *, persist: bool = True) -> None:
+    if _cache_size:
+        _cache[key] = vec
+        _cache.move_to_end(key)
+        while len(_cache) > _cache_size:
+            _cache.popitem(last=False)
+    if persist:
+        _persist_locked([(key, vec)])
+
+
+def _persist_locked(items: Sequence[Tuple[Tuple[str, str], Sequence[float]]]) -> None:
+    """Write frozen ``items`` to the disk tier under a single commit."""
+    if _disk_conn is None or not items:
+        return
+    _disk_conn.executemany(
+        "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)",
+        [(*key, array("f", vec).tobytes() if np is None else vec.tobytes()) for key, vec in items],
+    )
+    _disk_conn.commit()
+
+
+def _cache_put(key: Tuple[str, str], vec: Sequence[float]) -> Sequence[float]:
+    vec = _freeze(vec)
+    with _cache_lock:
+        _cache_put_locked(key, vec)
+    return vec
+
+
+def _cache_put_many(items: Sequence[Tuple[Tuple[str, str], Sequence[float]]]) -> None:
+    """Cache several vectors, committing them to disk once."""
+    items = [(key, _freeze(vec)) for key, vec in items]
+    with _cache_lock:
+        for key, vec in items:
+            _cache_put_locked(key, vec, persist=False)
+        _persist_locked(items)
 
 
 def _load_model():
@@ -26,12 +226,23 @@ def _load_model():
     global _model, _model_failed
     if _model is not None or _model_failed:
         return _model
-    try:
-        from sentence_transformers import SentenceTransformer
-    except Exception:  # pragma: no cover - optional dependency may not exist
-        _model_failed = True
-        return None
-    _model = SentenceTransformer(_model_name)
+    with _model_lock:
+        if _model is not None or _model_failed:
+            return _model
+        if _backend == "onnx":
+            try:
+                from encoding.onnx_models import OnnxEncoder
+
+                _model = OnnxEncoder(_onnx_path)
+            except Exception:  # pragma: no cover - optional dependency may not exist
+                _model_failed = True
+            return _model
+        try:
+            from sentence_transformers import SentenceTransformer
+        except Exception:  # pragma: no cover - optional dependency may not exist
+            _model_failed = True
+            return None
+        _model = SentenceTransformer(_model_name)
     return _model
 
 
@@ -40,7 +251,8 @@ def encode_text(text: str, model_name: str | None = None) -> List[str] | List[fl
 
     If ``sentence_transformers`` is installed, this returns a vector from a
     small pretrained model. Otherwise a simple token list is returned for use
-    in tests.
+    in tests. Vectors are memoized per model so repeated texts are only
+    encoded once.
     """
 
     if model_name is not None:
@@ -48,6 +260,57 @@ def encode_text(text: str, model_name: str | None = None) -> List[str] | List[fl
 
     model = _load_model()
     if model is not None:
-        vec = model.encode(text)
-        return [float(x) for x in vec]
+        key = _cache_key(text)
+        cached = _cache_get(key)
+        if cached is None:
+            # Stored as float32, so a miss returns what later hits will
+            cached = _cache_put(key, model.encode(text))
+        return _thaw(cached)
     return _TOKEN_RE.findall(text.lower())
+
+
+def encode_texts(
+    texts: Sequence[str],
+    batch_size: int = 32,
+    model_name: str | None = None,
+):
+    """Return embeddings for many ``texts`` at once.
+
+    With ``sentence_transformers`` installed the texts are passed to
+    ``model.encode`` in batches of ``batch_size`` and a ``float32`` array of
+    shape ``(len(texts), dim)`` is returned. Otherwise a list of token lists
+    is returned, one per text, matching :func:`encode_text`. Only texts
+    missing from the embedding cache reach the model.
+    """
+
+    if model_name is not None:
+        set_model_name(model_name)
+
+    texts = list(texts)
+    model = _load_model()
+    if model is None:
+        return [_TOKEN_RE.findall(text.lower()) for text in texts]
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+
+    keys = [_cache_key(text) for text in texts]
+    rows: List[Sequence[float] | None] = [_cache_get(key) for key in keys]
+    missing = [i for i, row in enumerate(rows) if row is None]
+    encoded = None
+    if missing:
+        pending = [texts[i] for i in missing]
+        encoded = np.vstack(
+            [
+                np.asarray(model.encode(pending[i : i + batch_size], batch_size=batch_size), dtype=np.float32)
+                for i in range(0, len(pending), batch_size)
+            ]
+        )
+        _cache_put_many([(keys[i], encoded[j]) for j, i in enumerate(missing)])
+    dim = encoded.shape[1] if encoded is not None else len(rows[0])
+    result = np.empty((len(texts), dim), dtype=np.float32)
+    for i, row in enumerate(rows):
+        if row is not None:
+            result[i] = row
+    if encoded is not None:
+        result[missing] = encoded
+    return result
@@ -0,0 +1,173 @@
+"""ONNX Runtime inference for the embedding and emotion models.
+
+Both classes run an exported (optionally int8-quantized) transformer on the
+CPU through ``onnxruntime`` and tokenize with the ``tokenizers`` library, so
+neither PyTorch nor ``transformers`` is needed at runtime. They keep the
+output contracts of the models they replace:
+
+* :class:`OnnxEncoder` behaves like ``SentenceTransformer.encode`` for
+  mean-pooled, L2-normalized models such as ``all-MiniLM-L6-v2``.
+* :class:`OnnxClassifier` behaves like a ``text-classification`` pipeline
+  created with ``return_all_scores=True``.
+
+``path`` is either an ``.onnx`` file or a directory holding ``model.onnx``;
+``tokenizer.json`` (and ``config.json`` for the classifier's labels) must sit
+beside it. Inputs are truncated like the original models: at
+``max_seq_length`` from ``sentence_bert_config.json`` for the encoder (256
+without it) and at 512 tokens for the classifier. Padding uses the model's
+own pad token. Such a directory is produced by, e.g.,
+``optimum-cli export onnx --model sentence-transformers/all-MiniLM-L6-v2 out/``,
+and :func:`quantize_model` writes an int8 copy of the model file.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+try:  # pragma: no cover - optional dependency
+    import numpy as np
+except Exception:  # pragma: no cover - numpy may not be installed
+    np = None
+
+try:  # pragma: no cover - optional dependency
+    import onnxruntime as ort  # type: ignore
+except Exception:  # pragma: no cover - onnxruntime may not be installed
+    ort = None
+
+try:  # pragma: no cover - optional dependency
+    from tokenizers import Tokenizer  # type: ignore
+except Exception:  # pragma: no cover - tokenizers may not be installed
+    Tokenizer = None
+
+
+def available() -> bool:
+    """Return ``True`` if ``onnxruntime``, ``tokenizers`` and NumPy are installed."""
+    return ort is not None and Tokenizer is not None and np is not None
+
+
+def _model_file(path: str | Path) -> Path:
+    path = Path(path)
+    return path / "model.onnx" if path.is_dir() else path
+
+
+def _read_json(path: Path) -> Dict:
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+class _OnnxModel:
+    """Shared session and tokenizer handling."""
+
+    default_max_length = 512
+
+    def __init__(self, path: str | Path, *, max_length: int | None = None) -> None:
+        if not available():
+            raise RuntimeError("onnxruntime, tokenizers and numpy are required")
+        model_file = _model_file(path)
+        self.directory = model_file.parent
+        self.config = _read_json(self.directory / "config.json")
+        self.max_length = max_length or self._default_length()
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            str(model_file), options, providers=["CPUExecutionProvider"]
+        )
+        self._inputs = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = Tokenizer.from_file(str(self.directory / "tokenizer.json"))
+        self.tokenizer.enable_truncation(self.max_length)
+        if self.tokenizer.padding is None:
+            # The default pad id 0 is "<s>" for RoBERTa-style vocabularies
+            pad_id = self._pad_id()
+            self.tokenizer.enable_padding(
+                pad_id=pad_id, pad_token=self.tokenizer.id_to_token(pad_id) or "[PAD]"
+            )
+
+    def _default_length(self) -> int:
+        return self.default_max_length
+
+    def _pad_id(self) -> int:
+        """Return the pad token id from ``config.json`` or the vocabulary."""
+        if self.config.get("pad_token_id") is not None:
+            return int(self.config["pad_token_id"])
+        for token in ("[PAD]", "<pad>"):
+            token_id = self.tokenizer.token_to_id(token)
+            if token_id is not None:
+                return token_id
+        return 0
+
+    def _run(self, texts: List[str]):
+        """Return the first model output and the attention mask for ``texts``."""
+        encodings = self.tokenizer.encode_batch(texts)
+        mask = np.asarray([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {
+            "input_ids": np.asarray([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": mask,
+            "token_type_ids": np.asarray([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        feeds = {name: arr for name, arr in feeds.items() if name in self._inputs}
+        return self.session.run(None, feeds)[0], mask
+
+
+class OnnxEncoder(_OnnxModel):
+    """Sentence embeddings with ``SentenceTransformer.encode`` semantics."""
+
+    # sentence-transformers' own limit for all-MiniLM-L6-v2
+    default_max_length = 256
+
+    def _default_length(self) -> int:
+        settings = _read_json(self.directory / "sentence_bert_config.json")
+        return int(settings.get("max_seq_length") or self.default_max_length)
+
+    def encode(self, texts: str | Sequence[str], batch_size: int = 32, **_: object):
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        chunks = []
+        for start in range(0, len(batch), batch_size):
+            output, mask = self._run(batch[start : start + batch_size])
+            if output.ndim == 3:
+                # Token states: mean-pool over the real (unpadded) tokens
+                weights = mask[..., None].astype(np.float32)
+                counts = np.clip(weights.sum(axis=1), 1e-9, None)
+                output = (output * weights).sum(axis=1) / counts
+            norms = np.linalg.norm(output, axis=1, keepdims=True)
+            chunks.append(output / np.clip(norms, 1e-12, None))
+        vectors = (
+            np.vstack(chunks).astype(np.float32) if chunks else np.zeros((0, 0), dtype=np.float32)
+        )
+        return vectors[0] if single else vectors
+
+
+class OnnxClassifier(_OnnxModel):
+    """Sequence classifier returning every label's softmax score."""
+
+    def __init__(self, path: str | Path, *, max_length: int | None = None) -> None:
+        super().__init__(path, max_length=max_length)
+        id2label: Dict[str, str] = self.config.get("id2label", {})
+        self.labels = [id2label[str(i)] for i in range(len(id2label))]
+
+    def __call__(self, texts: str | Sequence[str], batch_size: int = 32, **_: object):
+        batch = [texts] if isinstance(texts, str) else list(texts)
+        results = []
+        for start in range(0, len(batch), batch_size):
+            logits, _ = self._run(batch[start : start + batch_size])
+            logits = logits - logits.max(axis=1, keepdims=True)
+            probs = np.exp(logits)
+            probs /= probs.sum(axis=1, keepdims=True)
+            for row in probs:
+                results.append(
+                    [{"label": label, "score": float(p)} for label, p in zip(self.labels, row)]
+                )
+        return results
+
+
+def quantize_model(src: str | Path, dst: str | Path) -> Path:
+    """Write a dynamically int8-quantized copy of the model at ``src`` to ``dst``."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    dst = Path(dst)
+    quantize_dynamic(str(_model_file(src)), str(dst), weight_type=QuantType.QInt8)
+    return dst
+
+
+__all__ = ["OnnxClassifier", "OnnxEncoder", "available", "quantize_model"]
@@ -29,7 +29,6 @@ import sys
 import re
 
 from ms_utils import format_context
-from encoding.tagging import tag_text
 from core.memory_entry import MemoryEntry
 from llm.lmstudio_api import LMStudioBackend
 from llm import llm_router
@@ -92,9 +91,10 @@ class MemoryBrowser(QDialog):
             return
         new_text = self.detail.toPlainText()
         if new_text != self.current.content:
-            if self.current in self.manager.semantic._entries:
+            kind = self.manager.memory_type(self.current)
+            if kind == "semantic":
                 self.manager.update_semantic(self.current, new_text)
-            elif self.current in self.manager.procedural._entries:
+            elif kind == "procedural":
                 self.manager.update_procedural(self.current, new_text)
             else:
                 self.manager.update(self.current, new_text)
@@ -103,9 +103,10 @@ class MemoryBrowser(QDialog):
     def delete_current(self) -> None:
         if self.current is None:
             return
-        if self.current in self.manager.semantic._entries:
+        kind = self.manager.memory_type(self.current)
+        if kind == "semantic":
             self.manager.delete_semantic(self.current)
-        elif self.current in self.manager.procedural._entries:
+        elif kind == "procedural":
             self.manager.delete_procedural(self.current)
         else:
             self.manager.delete(self.current)
@@ -222,7 +223,8 @@ class MemorySystemGUI(QWidget):
             self.scheduler.agent = self.agent
         self._last_dream = None
         self._last_think = None
-        self._mem_count = 0
+        # (manager, generation) seen by the last memory scan
+        self._mem_state = None
         self.init_ui()
 
     def init_ui(self):
@@ -438,11 +440,9 @@ class MemorySystemGUI(QWidget):
         )
         QTimer.singleShot(0, lambda: self._scroll_to_bottom(self.memory_scroll))
 
-    def _memory_type(self, mem: MemoryEntry) -> str:
-        if mem in self.agent.memory.semantic._entries:
-            return "semantic"
-        if mem in self.agent.memory.procedural._entries:
-            return "procedural"
+    def _memory_type(self, mem: MemoryEntry, kind: str | None) -> str:
+        if kind in ("semantic", "procedural"):
+            return kind
         if "introspection" in mem.metadata.get("tags", []):
             return "thought"
         if mem.content.startswith("Dream:"):
@@ -455,11 +455,13 @@ class MemorySystemGUI(QWidget):
         if not self.agent:
             self.table.setRowCount(0)
             return
-        entries = self.agent.memory.all_memories()
+        # Paged from the database until the manager hydrates, so opening the
+        # window does not load every memory or build the retriever
+        entries = list(self.agent.memory.iter_memories())
         self.table.setRowCount(len(entries))
-        for row, mem in enumerate(entries):
+        for row, (kind, mem) in enumerate(entries):
             self.table.setItem(row, 0, QTableWidgetItem(mem.timestamp.isoformat()))
-            self.table.setItem(row, 1, QTableWidgetItem(self._memory_type(mem)))
+            self.table.setItem(row, 1, QTableWidgetItem(self._memory_type(mem, kind)))
             emotion = mem.emotions[0] if mem.emotions else ""
             strength = mem.emotion_scores.get(emotion, 0.0) if emotion else 0.0
             self.table.setItem(row, 2, QTableWidgetItem(emotion))
@@ -482,31 +484,30 @@ class MemorySystemGUI(QWidget):
                 parts.append(f"T:{int(think)}s")
             self.countdown_label.setText(" | ".join(parts))
 
-        dream_entries = [
-            m for m in self.agent.memory.all_memories()
-            if m.content.startswith("Dream:")
-        ]
-        if dream_entries:
-            latest = dream_entries[-1]
-            if latest is not self._last_dream:
-                self.add_dream_message(latest.content)
-                self._last_dream = latest
-
-        think_entries = [
-            m
-            for m in self.agent.memory.all_memories()
-            if "introspection" in m.metadata.get("tags", [])
-        ]
-        if think_entries:
-            latest_think = think_entries[-1]
-            if latest_think is not self._last_think:
-                self.add_thought_message(latest_think.content)
-                self._last_think = latest_think
-
-        entries = self.agent.memory.all_memories()
-        if len(entries) != self._mem_count:
-            self._mem_count = len(entries)
-            self.refresh_memory_table()
+        # Dreams and thoughts only appear as new memories, so the stores are
+        # scanned only when the manager reports a change. The count is no
+        # guide: once dreaming prunes to ``max_entries`` it stays constant.
+        memory = self.agent.memory
+        state = (id(memory), memory.generation)
+        if state == self._mem_state:
+            return
+        self._mem_state = state
+
+        latest = latest_think = None
+        for _, mem in self.agent.memory.iter_memories():
+            if mem.content.startswith("Dream:"):
+                latest = mem
+            if "introspection" in mem.metadata.get("tags", []):
+                latest_think = mem
+        # Compared by id: unhydrated rows are fresh objects on every scan
+        if latest is not None and latest.id != getattr(self._last_dream, "id", None):
+            self.add_dream_message(latest.content)
+            self._last_dream = latest
+        if latest_think is not None and latest_think.id != getattr(self._last_think, "id", None):
+            self.add_thought_message(latest_think.content)
+            self._last_think = latest_think
+
+        self.refresh_memory_table()
 
     def show_settings(self):
         if not self.scheduler:
@@ -526,6 +527,8 @@ class MemorySystemGUI(QWidget):
                     self.agent.llm = llm_router.get_llm(llm_name)
 
                 if str(self.agent.memory.db.path) != db_path:
+                    # Commit the old database's queued writes before switching
+                    self.agent.memory.close()
                     self.agent.memory = MemoryManager(db_path=db_path)
                     self.scheduler.manager = self.agent.memory
 
@@ -618,23 +621,12 @@ class MemorySystemGUI(QWidget):
         self.add_message(user_input, is_user=True)
 
         # Query the agent and update debug panels
-        response = self.agent.receive(user_input) if self.agent else ""
-
-        # Working memory context used by the agent
+        response = ""
+        # Working memory and the memories the agent retrieved for this reply
         context = []
         working = []
         if self.agent:
-            from retrieval.cue_builder import build_cue
-            from retrieval.retriever import Retriever
-
-            tags = tag_text(user_input)
-            cue = build_cue(user_input, tags=tags, state={"mood": self.agent.mood})
-            retriever = Retriever(
-                self.agent.memory.all(),
-                semantic=self.agent.memory.semantic.all(),
-                procedural=self.agent.memory.procedural.all(),
-            )
-            retrieved = retriever.query(cue, top_k=5, mood=self.agent.mood, tags=tags)
+            response, retrieved = self.agent.receive(user_input, with_context=True)
             context = [m.content for m in retrieved]
             working = self.agent.working_memory()
 
@@ -646,9 +638,6 @@ class MemorySystemGUI(QWidget):
         if context:
             mem_text += "\n\nRetrieved:\n" + format_context(context)
         self.add_memory_message(mem_text)
-        self._mem_count = (
-            len(self.agent.memory.all_memories()) if self.agent else 0
-        )
         self.refresh_memory_table()
 
 
@@ -683,6 +672,7 @@ def run_gui(agent=None, scheduler=None):
 
         db_path = cfg.get("db_path")
         if db_path and str(agent.memory.db.path) != db_path:
+            agent.memory.close()
             agent.memory = MemoryManager(db_path=db_path)
             scheduler.manager = agent.memory
 
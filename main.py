@@ -32,6 +32,7 @@ def run_repl(llm_name: str, db_path: str) -> None:
         print()
     finally:
         runner.stop()
+        agent.memory.close()
 
 
 def main(argv: list[str] | None = None) -> None:
@@ -73,6 +74,7 @@ def main(argv: list[str] | None = None) -> None:
             run_gui(agent, scheduler)
         finally:
             runner.stop()
+            agent.memory.close()
     else:  # repl
         run_repl(args.llm, args.db)
 
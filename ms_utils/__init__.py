@@ -3,5 +3,6 @@
 from .helpers import format_context
 from .logger import Logger
 from .scheduler import Scheduler
+from .warmup import ModelWarmup
 
-__all__ = ["format_context", "Logger", "Scheduler"]
+__all__ = ["format_context", "Logger", "ModelWarmup", "Scheduler"]
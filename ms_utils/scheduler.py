@@ -3,7 +3,6 @@
 from __future__ import annotations
 
 import threading
-import time
 from typing import Callable, List
 
 
@@ -18,8 +17,9 @@ class Scheduler:
         """Start executing ``func`` every ``interval`` seconds."""
 
         def loop() -> None:
-            while not self._stop.is_set():
-                time.sleep(interval)
+            # Waiting on the stop event lets ``stop`` return without
+            # sitting out the rest of the interval.
+            while not self._stop.wait(interval):
                 func(*args, **kwargs)
 
         t = threading.Thread(target=loop, daemon=True)
@@ -0,0 +1,54 @@
+"""Load slow resources in background threads ahead of first use."""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Dict
+
+from .logger import Logger
+
+logger = Logger(__name__)
+
+
+class ModelWarmup:
+    """Run each loader in its own daemon thread and time it.
+
+    The loaders are expected to cache what they load behind a lock (as
+    ``encoding.encoder._load_model`` and ``core.emotion_model._load_classifier``
+    do), so code that needs a model before its thread finishes simply blocks
+    on that lock while everything else carries on.
+    """
+
+    def __init__(self, loaders: Dict[str, Callable[[], object]]) -> None:
+        self.timings: Dict[str, float] = {}
+        self._threads: Dict[str, threading.Thread] = {}
+        for name, loader in loaders.items():
+            t = threading.Thread(target=self._run, args=(name, loader), daemon=True)
+            t.start()
+            self._threads[name] = t
+
+    def _run(self, name: str, loader: Callable[[], object]) -> None:
+        start = time.perf_counter()
+        try:
+            loader()
+        except Exception as exc:  # pragma: no cover - log and continue
+            logger.warning(f"Warm-up of {name} failed: {exc}")
+        elapsed = time.perf_counter() - start
+        self.timings[name] = elapsed
+        logger.info(f"Loaded {name} in {elapsed:.2f}s")
+
+    @property
+    def ready(self) -> bool:
+        """``True`` once every loader has finished."""
+        return not any(t.is_alive() for t in self._threads.values())
+
+    def wait(self, timeout: float | None = None) -> Dict[str, float]:
+        """Block until the loaders finish (or ``timeout``) and return timings."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for t in self._threads.values():
+            t.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        return dict(self.timings)
+
+
+__all__ = ["ModelWarmup"]
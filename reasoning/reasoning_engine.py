@@ -5,7 +5,6 @@ from __future__ import annotations
 from typing import Iterable, TYPE_CHECKING
 
 from retrieval.cue_builder import build_cue
-from retrieval.retriever import Retriever
 from reconstruction.reconstructor import Reconstructor
 from llm import llm_router
 from ms_utils.logger import Logger
@@ -47,12 +46,7 @@ class ReasoningEngine:
             The reasoning output from the LLM.
         """
         cue = build_cue(topic)
-        retriever = Retriever(
-            manager.all(),
-            semantic=manager.semantic.all(),
-            procedural=manager.procedural.all(),
-        )
-        memories = retriever.query(cue, top_k=5)
+        memories = manager.retriever.query(cue, top_k=5)
         logger.info("Retrieved: " + ", ".join(str(m.timestamp) for m in memories))
         reconstructor = Reconstructor()
         context = reconstructor.build_context(memories)
@@ -90,12 +84,7 @@ class ReasoningEngine:
         The resulting plan is stored in procedural memory tagged ``plan``.
         """
         cue = build_cue(goal)
-        retriever = Retriever(
-            manager.all(),
-            semantic=manager.semantic.all(),
-            procedural=manager.procedural.all(),
-        )
-        memories = retriever.query(cue, top_k=5)
+        memories = manager.retriever.query(cue, top_k=5)
         reconstructor = Reconstructor()
         context = reconstructor.build_context(memories)
         prompt = (
@@ -2,20 +2,85 @@
 
 from __future__ import annotations
 
+import math
+import threading
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, OrderedDict
 from datetime import datetime
-from typing import Dict, Iterable, List
+from typing import Dict, Iterable, List, Tuple
 
+try:  # pragma: no cover - optional dependency
+    import numpy as np
+except Exception:  # pragma: no cover - numpy may not be installed
+    np = None
+
+from core.embedding_store import EmbeddingStore
 from core.memory_entry import MemoryEntry
-from encoding.encoder import encode_text
+from encoding.encoder import encode_text, encode_texts, is_dense
+from reconstruction.reconstructor import _load_config
 
 try:  # pragma: no cover - optional dependency
     from storage.faiss_index import FaissIndex
 except Exception:  # pragma: no cover - faiss may not be available
     FaissIndex = None
 
+from storage.vector_index import INDEX_CLASSES
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _seconds(ts: datetime) -> float:
+    return (ts - _EPOCH).total_seconds()
+
 
 class Retriever:
-    """In-memory retriever using cosine similarity and recency bias."""
+    """In-memory retriever using cosine similarity and recency bias.
+
+    The retriever can be kept alive across queries and updated incrementally
+    with :meth:`add`, :meth:`remove` and :meth:`update` so that the cost of a
+    query does not include re-indexing every stored memory.
+
+    When NumPy is installed, dense embeddings are scored straight from the
+    rows of an :class:`~core.embedding_store.EmbeddingStore` (the manager's
+    shared ``embeddings``, or a private one), alongside precomputed norms,
+    timestamps, type weights and per-mood emotion scores, so a query is
+    scored in a single vectorized pass without a second copy of the vectors.
+
+    Token embeddings (used when sentence-transformers is unavailable) are
+    kept in an inverted index of term postings with precomputed document
+    norms, so only memories sharing a term with the cue, matching its tags or
+    mood, or among the most recent of their type are scored. ``weighting``
+    selects raw term frequencies (``"tf"``), ``"tfidf"`` or ``"bm25"``.
+
+    With FAISS installed, dense similarity search goes through a
+    :class:`~storage.faiss_index.FaissIndex` built from ``index_options``
+    (``retrieval.index_type`` etc. in the config by default), or the
+    prebuilt ``index`` passed in. Without FAISS, ``fallback_index``
+    (``retrieval.fallback_index``) can select the built-in ``"flat"`` or
+    ``"hnsw"`` index from :mod:`storage.vector_index` instead; the default
+    ``"none"`` keeps the vectorized matrix scoring. Exact index kinds
+    (``flat_ip``, ``flat_l2`` and the ``"flat"`` fallback) are not built
+    while the matrix is in use, as they would only hold another copy of the
+    vectors to repeat the same scan.
+
+    Index queries run in two stages: ``candidate_factor * top_k`` nearest
+    neighbours are fetched from the index, joined with the memories matching
+    the cue's tags or mood and the newest of each type, and then ranked by the
+    same composite score as the brute-force path. A memory counts as matching
+    a mood only when its score for it reaches ``mood_threshold``
+    (``retrieval.mood_threshold``), since classifiers give every label some
+    score and indexing them all would make every query a full scan.
+    """
+
+    WEIGHTINGS = ("tf", "tfidf", "bm25")
+    FALLBACK_INDEXES = ("none", *INDEX_CLASSES)
+    # ``retrieval`` config keys forwarded to :class:`FaissIndex`
+    INDEX_OPTIONS = ("index_type", "nlist", "nprobe", "hnsw_m", "ef_search", "pq_m", "pq_bits")
+    # Index kinds that would only repeat the matrix's exact scan
+    EXACT_INDEXES = ("flat_ip", "flat_l2", "flat")
+    BM25_K1 = 1.5
+    BM25_B = 0.75
 
     def __init__(
         self,
@@ -25,52 +90,475 @@ class Retriever:
         procedural: Iterable[MemoryEntry] | None = None,
         sem_recency: float = 0.02,
         proc_recency: float = 0.02,
+        weighting: str | None = None,
+        index_options: Dict[str, object] | None = None,
+        index: "FaissIndex | None" = None,
+        fallback_index: str | None = None,
+        candidate_factor: int | None = None,
+        cache_size: int | None = None,
+        embeddings: EmbeddingStore | None = None,
+        mood_threshold: float | None = None,
     ) -> None:
-        epis = list(episodic)
-        sem = list(semantic or [])
-        proc = list(procedural or [])
-
-        self._memories = epis + sem + proc
-        self._types: List[str] = ["episodic"] * len(epis) + ["semantic"] * len(sem) + [
-            "procedural"
-        ] * len(proc)
+        cfg = _load_config().get("retrieval", {})
+        if weighting is None:
+            weighting = cfg.get("weighting", "tf")
+        if weighting not in self.WEIGHTINGS:
+            raise ValueError(f"Unknown weighting: {weighting}")
+        self.weighting = weighting
+        if index_options is None:
+            index_options = {k: cfg[k] for k in self.INDEX_OPTIONS if k in cfg}
+        self.index_options = dict(index_options)
+        if fallback_index is None:
+            fallback_index = cfg.get("fallback_index", "none")
+        if fallback_index not in self.FALLBACK_INDEXES:
+            raise ValueError(f"Unknown fallback index: {fallback_index}")
+        self.fallback_index = fallback_index
+        if candidate_factor is None:
+            candidate_factor = int(cfg.get("candidate_factor", 10))
+        self.candidate_factor = max(1, candidate_factor)
+        if cache_size is None:
+            cache_size = int(cfg.get("cache_size", 128))
+        self.cache_size = max(0, cache_size)
+        if mood_threshold is None:
+            mood_threshold = float(cfg.get("mood_threshold", 0.5))
+        self.mood_threshold = mood_threshold
         self._recency_weights = {
             "episodic": 0.1,
             "semantic": sem_recency,
             "procedural": proc_recency,
         }
+        self._lock = threading.RLock()
+        # Bumped by every add/remove/update; part of each result cache key
+        self.generation = 0
+        self._cache: "OrderedDict[tuple, List[MemoryEntry]]" = OrderedDict()
+        self._cache_hits = 0
+        self._cache_misses = 0
+
+        self._memories: List[MemoryEntry] = []
+        self._types: List[str] = []
+        self._tags: List[set[str]] = []
+        self._tag_positions: Dict[str, set[int]] = {}
+        self._positions: Dict[int, int] = {}
+        self._dense_vectors: List[List[float] | None] = []
+        self._mood_positions: Dict[str, set[int]] = {}
+        self._role_positions: Dict[str, set[int]] = {}
+        self._recent: Dict[str, List[Tuple[float, int]]] = {}
+
+        # Inverted index for token embeddings
+        self._term_counts: List[Dict[str, int] | None] = []
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._doc_norms: List[float] = []
+        self._doc_lengths: List[int] = []
+        self._token_docs = 0
+        self._total_length = 0
+
+        # Columnar state for the vectorized dense path
+        self._use_matrix = np is not None
+        self._embeddings = embeddings if embeddings is not None else EmbeddingStore()
+        # Ids this retriever copied into the store itself (entries it was
+        # given that no memory store holds)
+        self._own_rows: set[str] = set()
+        self._dim: int | None = None
+        self._store_rows = None
+        self._norms = None
+        self._stamps = None
+        self._weights = None
+        self._has_row = None
+        self._mood_cols: Dict[str, "np.ndarray"] = {}
 
-        self._tags: List[set[str]] = [set(m.metadata.get("tags", [])) for m in self._memories]
         self._index = None
-        self._dense_vectors: List[List[float]] = []
-        self._vocab: Dict[str, int] = {}
-        self._vectors: List[Dict[int, int]] = []
+        self._index_dirty = False
+
+        for memory in episodic:
+            self._append(memory, "episodic")
+        for memory in semantic or []:
+            self._append(memory, "semantic")
+        for memory in procedural or []:
+            self._append(memory, "procedural")
+        if index is not None and index.available and not self._redundant(index.index_type):
+            # Prebuilt (e.g. loaded from disk) and covering exactly these memories
+            self._index = index
+        else:
+            self._build_index()
+
+    def __len__(self) -> int:
+        return len(self._memories)
+
+    @property
+    def vector_index(self) -> "FaissIndex | None":
+        """Return the up-to-date vector index, rebuilding it if stale."""
+        with self._lock:
+            if self._index_dirty:
+                self._build_index()
+            return self._index
+
+    # --- Result cache ---
+    def cache_stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and current size of the result cache."""
+        with self._lock:
+            return {
+                "hits": self._cache_hits,
+                "misses": self._cache_misses,
+                "size": len(self._cache),
+            }
+
+    def _changed(self) -> None:
+        self.generation += 1
+        self._cache.clear()
+
+    # --- Incremental maintenance ---
+    def add(self, memory: MemoryEntry, memory_type: str = "episodic") -> None:
+        """Index ``memory`` as a ``memory_type`` entry."""
+        with self._lock:
+            self._changed()
+            if id(memory) in self._positions:
+                self._refresh(self._positions[id(memory)])
+                return
+            pos = self._append(memory, memory_type)
+            vec = self._dense_vectors[pos]
+            if vec is None:
+                return
+            if self._index is not None and not self._index_dirty:
+                self._index.add([memory])
+                if self._index.needs_rebuild:
+                    self._index_dirty = True
+            else:
+                self._index_dirty = True
+
+    def remove(self, memory: MemoryEntry) -> None:
+        """Drop ``memory`` from the index if present."""
+        with self._lock:
+            pos = self._positions.pop(id(memory), None)
+            if pos is None:
+                return
+            self._changed()
+            self._drop_from_index(memory)
+            self._release(memory)
+            self._unindex(pos)
+            last = len(self._memories) - 1
+            if pos != last:
+                # Move the last entry into the freed slot to keep removal O(1)
+                self._unindex(last)
+                moved = self._memories[last]
+                self._memories[pos] = moved
+                self._types[pos] = self._types[last]
+                self._dense_vectors[pos] = self._dense_vectors[last]
+                self._term_counts[pos] = self._term_counts[last]
+                self._doc_norms[pos] = self._doc_norms[last]
+                self._doc_lengths[pos] = self._doc_lengths[last]
+                self._positions[id(moved)] = pos
+                self._reindex(pos)
+                self._move_row(last, pos)
+            self._clear_row(last)
+            self._memories.pop()
+            self._types.pop()
+            self._tags.pop()
+            self._dense_vectors.pop()
+            self._term_counts.pop()
+            self._doc_norms.pop()
+            self._doc_lengths.pop()
 
-        if self._memories and self._memories[0].embedding and isinstance(
-            self._memories[0].embedding[0], (float, int)
-        ):
+    def _drop_from_index(self, memory: MemoryEntry) -> None:
+        if self._index is None:
+            return
+        if not self._index.remove([memory]) or self._index.needs_rebuild:
+            self._index_dirty = True
+
+    def update(self, memory: MemoryEntry) -> None:
+        """Re-index ``memory`` after its content or embedding changed."""
+        with self._lock:
+            pos = self._positions.get(id(memory))
+            if pos is not None:
+                self._changed()
+                self._refresh(pos)
+
+    def _append(self, memory: MemoryEntry, memory_type: str) -> int:
+        pos = len(self._memories)
+        self._positions[id(memory)] = pos
+        self._memories.append(memory)
+        self._types.append(memory_type)
+        self._tags.append(set())
+        self._dense_vectors.append(None)
+        self._term_counts.append(None)
+        self._doc_norms.append(0.0)
+        self._doc_lengths.append(0)
+        self._vectorize(pos)
+        return pos
+
+    def _refresh(self, pos: int) -> None:
+        self._unindex(pos)
+        self._drop_from_index(self._memories[pos])
+        self._vectorize(pos)
+        if self._dense_vectors[pos] is None:
+            return
+        if self._index is not None and not self._index_dirty:
+            self._index.add([self._memories[pos]])
+        else:
+            self._index_dirty = True
+
+    def _vectorize(self, pos: int) -> None:
+        memory = self._memories[pos]
+        self._dense_vectors[pos] = None
+        self._term_counts[pos] = None
+        self._doc_norms[pos] = 0.0
+        self._doc_lengths[pos] = 0
+        if is_dense(memory.embedding):
             # numeric embeddings
-            self._dense_vectors = [list(map(float, m.embedding)) for m in self._memories]
-            if FaissIndex is not None:
-                idx = FaissIndex(self._memories)
-                if idx.available:
-                    self._index = idx
+            if self._use_matrix:
+                self._dense_vectors[pos] = memory.embedding
+            else:
+                self._dense_vectors[pos] = list(map(float, memory.embedding))
         else:
             # token-based embeddings
-            for m in self._memories:
-                vec = {}
-                for token in m.embedding:
-                    idx = self._vocab.setdefault(token, len(self._vocab))
-                    vec[idx] = vec.get(idx, 0) + 1
-                self._vectors.append(vec)
-
-    def _cosine(self, vec: Dict[int, int], other: Dict[int, int]) -> float:
-        dot = sum(vec.get(i, 0) * other.get(i, 0) for i in set(vec) | set(other))
-        norm_a = sum(v * v for v in vec.values()) ** 0.5
-        norm_b = sum(v * v for v in other.values()) ** 0.5
-        if norm_a and norm_b:
-            return dot / (norm_a * norm_b)
-        return 0.0
+            counts = dict(Counter(memory.embedding))
+            self._term_counts[pos] = counts
+            self._doc_norms[pos] = math.sqrt(sum(c * c for c in counts.values()))
+            self._doc_lengths[pos] = len(memory.embedding)
+        self._reindex(pos)
+        if self._use_matrix:
+            self._set_row(pos)
+
+    def _reindex(self, pos: int) -> None:
+        """Register ``pos`` in the tag, mood, recency and term indexes."""
+        memory = self._memories[pos]
+        self._tags[pos] = set(memory.metadata.get("tags", []))
+        for tag in self._tags[pos]:
+            self._tag_positions.setdefault(tag, set()).add(pos)
+        for label, score in memory.emotion_scores.items():
+            if score and score >= self.mood_threshold:
+                self._mood_positions.setdefault(label, set()).add(pos)
+        role = memory.metadata.get("role")
+        if role:
+            self._role_positions.setdefault(role, set()).add(pos)
+        insort(
+            self._recent.setdefault(self._types[pos], []),
+            (_seconds(memory.timestamp), id(memory)),
+        )
+        counts = self._term_counts[pos]
+        if counts is not None:
+            for term, count in counts.items():
+                self._postings.setdefault(term, {})[pos] = count
+            self._token_docs += 1
+            self._total_length += self._doc_lengths[pos]
+
+    def _unindex(self, pos: int) -> None:
+        """Remove ``pos`` from the tag, mood, recency and term indexes."""
+        memory = self._memories[pos]
+        for tag in self._tags[pos]:
+            self._tag_positions.get(tag, set()).discard(pos)
+        for positions in self._mood_positions.values():
+            positions.discard(pos)
+        for positions in self._role_positions.values():
+            positions.discard(pos)
+        recent = self._recent.get(self._types[pos], [])
+        key = (_seconds(memory.timestamp), id(memory))
+        i = bisect_left(recent, key)
+        if i < len(recent) and recent[i] == key:
+            recent.pop(i)
+        counts = self._term_counts[pos]
+        if counts is not None:
+            for term in counts:
+                posting = self._postings.get(term)
+                if posting is not None:
+                    posting.pop(pos, None)
+                    if not posting:
+                        del self._postings[term]
+            self._token_docs -= 1
+            self._total_length -= self._doc_lengths[pos]
+
+    # --- Columnar storage helpers ---
+    def _reserve(self, size: int) -> None:
+        capacity = 0 if self._norms is None else self._norms.shape[0]
+        if self._norms is not None and size <= capacity:
+            return
+        new_cap = max(16, capacity * 2, size)
+
+        def grow(arr, shape, dtype):
+            new = np.zeros(shape, dtype=dtype)
+            if arr is not None:
+                new[: arr.shape[0]] = arr
+            return new
+
+        self._store_rows = grow(self._store_rows, (new_cap,), np.intp)
+        self._norms = grow(self._norms, (new_cap,), np.float32)
+        self._stamps = grow(self._stamps, (new_cap,), np.float64)
+        self._weights = grow(self._weights, (new_cap,), np.float32)
+        self._has_row = grow(self._has_row, (new_cap,), bool)
+        for label, col in list(self._mood_cols.items()):
+            self._mood_cols[label] = grow(col, (new_cap,), np.float32)
+
+    def _store_row(self, memory: MemoryEntry) -> int | None:
+        """Return ``memory``'s row in the embedding store, copying it in if absent."""
+        row = self._embeddings.row(memory.id)
+        if row is None or memory.id in self._own_rows:
+            self._embeddings.assign(memory, bind=False)
+            row = self._embeddings.row(memory.id)
+            if row is not None:
+                self._own_rows.add(memory.id)
+        return row
+
+    def _release(self, memory: MemoryEntry) -> None:
+        if memory.id in self._own_rows:
+            self._own_rows.discard(memory.id)
+            self._embeddings.release(memory, bind=False)
+
+    def _set_row(self, pos: int) -> None:
+        memory = self._memories[pos]
+        vec = self._dense_vectors[pos]
+        row = None
+        if vec is not None:
+            row = self._store_row(memory)
+            if row is None or (self._dim is not None and len(vec) != self._dim):
+                # Mixed dimensionalities cannot share a matrix
+                self._disable_matrix()
+                return
+        else:
+            self._release(memory)
+        if self._dim is None:
+            if row is None:
+                return
+            self._dim = len(vec)
+            self._reserve(len(self._memories))
+        self._reserve(pos + 1)
+        self._stamps[pos] = _seconds(memory.timestamp)
+        self._weights[pos] = self._recency_weights[self._types[pos]]
+        for col in self._mood_cols.values():
+            col[pos] = 0.0
+        for label, score in memory.emotion_scores.items():
+            col = self._mood_cols.get(label)
+            if col is None:
+                col = np.zeros(self._norms.shape[0], dtype=np.float32)
+                self._mood_cols[label] = col
+            col[pos] = float(score)
+        if row is None:
+            self._store_rows[pos] = 0
+            self._norms[pos] = 0.0
+            self._has_row[pos] = False
+        else:
+            self._store_rows[pos] = row
+            self._norms[pos] = float(np.linalg.norm(self._embeddings.vector(row)))
+            self._has_row[pos] = True
+
+    def _move_row(self, src: int, dst: int) -> None:
+        if self._dim is None:
+            return
+        self._store_rows[dst] = self._store_rows[src]
+        self._norms[dst] = self._norms[src]
+        self._stamps[dst] = self._stamps[src]
+        self._weights[dst] = self._weights[src]
+        self._has_row[dst] = self._has_row[src]
+        for col in self._mood_cols.values():
+            col[dst] = col[src]
+
+    def _clear_row(self, pos: int) -> None:
+        if self._dim is None:
+            return
+        self._has_row[pos] = False
+        for col in self._mood_cols.values():
+            col[pos] = 0.0
+
+    def _disable_matrix(self) -> None:
+        self._use_matrix = False
+        for memory in self._memories:
+            self._release(memory)
+        self._dim = None
+        self._store_rows = self._norms = self._stamps = None
+        self._weights = self._has_row = None
+        self._mood_cols = {}
+        self._dense_vectors = [
+            list(map(float, v)) if v is not None else None for v in self._dense_vectors
+        ]
+        # An exact index is no longer redundant
+        self._index_dirty = True
+
+    def _redundant(self, kind: str) -> bool:
+        """``True`` if an index of ``kind`` would only repeat the matrix scan."""
+        return self._dim is not None and kind in self.EXACT_INDEXES
+
+    def _build_index(self) -> None:
+        self._index = None
+        self._index_dirty = False
+        use_faiss = FaissIndex is not None and not self._redundant(
+            self.index_options.get("index_type", "flat_ip")
+        )
+        fallback = INDEX_CLASSES.get(self.fallback_index)
+        if self._redundant(self.fallback_index):
+            fallback = None
+        if not use_faiss and fallback is None:
+            return
+        dense = [m for m, v in zip(self._memories, self._dense_vectors) if v is not None]
+        if not dense:
+            return
+        if use_faiss:
+            idx = FaissIndex(dense, **self.index_options)
+            if idx.available:
+                self._index = idx
+                return
+        if fallback is not None:
+            idx = fallback(dense, **self.index_options)
+            if idx.available:
+                self._index = idx
+
+    # --- Scoring ---
+    def _idf(self, term: str) -> float:
+        df = len(self._postings[term])
+        n = self._token_docs
+        if self.weighting == "bm25":
+            return math.log(1 + (n - df + 0.5) / (df + 0.5))
+        return math.log((n + 1) / (df + 1)) + 1
+
+    def _token_similarities(self, tokens: Iterable[str]) -> Dict[int, float]:
+        """Return similarities for memories sharing at least one query term."""
+        q_counts = {
+            t: c for t, c in Counter(tokens).items() if t in self._postings
+        }
+        if not q_counts:
+            return {}
+        sims: Dict[int, float] = {}
+        if self.weighting == "bm25":
+            avg_len = self._total_length / self._token_docs if self._token_docs else 0.0
+            k1, b = self.BM25_K1, self.BM25_B
+            for term, q_count in q_counts.items():
+                idf = self._idf(term)
+                for pos, count in self._postings[term].items():
+                    length = self._doc_lengths[pos]
+                    norm = k1 * (1 - b + b * length / avg_len) if avg_len else k1
+                    sims[pos] = sims.get(pos, 0.0) + q_count * idf * count * (k1 + 1) / (
+                        count + norm
+                    )
+            # Scale into [0, 1] so BM25 mixes with the other score components
+            top = max(sims.values())
+            if top > 0:
+                sims = {pos: val / top for pos, val in sims.items()}
+            return sims
+
+        if self.weighting == "tfidf":
+            q_weights = {t: c * self._idf(t) for t, c in q_counts.items()}
+        else:
+            q_weights = {t: float(c) for t, c in q_counts.items()}
+        q_norm = math.sqrt(sum(w * w for w in q_weights.values()))
+        for term, weight in q_weights.items():
+            for pos, count in self._postings[term].items():
+                sims[pos] = sims.get(pos, 0.0) + weight * count
+        for pos, dot in sims.items():
+            d_norm = self._doc_norms[pos]
+            sims[pos] = dot / (q_norm * d_norm) if q_norm and d_norm else 0.0
+        return sims
+
+    def _recent_positions(self, top_k: int, *, dense: bool = False) -> set[int]:
+        """Return the ``top_k`` most recent token (or ``dense``) memories of each type."""
+        column = self._dense_vectors if dense else self._term_counts
+        found: set[int] = set()
+        for stamps in self._recent.values():
+            taken = 0
+            for _, key in reversed(stamps):
+                if taken >= top_k:
+                    break
+                pos = self._positions.get(key)
+                if pos is not None and column[pos] is not None:
+                    found.add(pos)
+                    taken += 1
+        return found
 
     def _cosine_dense(self, a: List[float], b: List[float]) -> float:
         dot = sum(x * y for x, y in zip(a, b))
@@ -80,6 +568,104 @@ class Retriever:
             return dot / (norm_a * norm_b)
         return 0.0
 
+    def _score_dense(
+        self,
+        i: int,
+        embedding,
+        now: datetime,
+        *,
+        mood: str | None,
+        q_tags: set[str],
+    ) -> float:
+        """Return the composite score of dense memory ``i`` without NumPy."""
+        memory = self._memories[i]
+        sim = self._cosine_dense(embedding, self._dense_vectors[i])
+        recency = 1 / ((now - memory.timestamp).total_seconds() + 1)
+        weight = self._recency_weights[self._types[i]]
+        score = memory.emotion_scores.get(mood, 0.0) if mood else 0.0
+        boost = float(score)
+        tag_score = len(q_tags & self._tags[i]) / len(q_tags) if q_tags else 0.0
+        return sim + tag_score + weight * recency + boost
+
+    def _score_matrix(
+        self,
+        embedding,
+        now: datetime,
+        *,
+        mood: str | None,
+        q_tags: set[str],
+        rows: "np.ndarray | None" = None,
+    ):
+        """Return composite scores for ``rows`` (default: all) of the dense matrix.
+
+        ``embedding`` may also be a 2-D array of cues, giving one row of
+        scores per cue from a single matrix-matrix product.
+        """
+        n = len(self._memories)
+        sel = slice(None) if rows is None else rows
+        q = np.asarray(embedding, dtype=np.float32)
+        q_norm = np.linalg.norm(q, axis=-1, keepdims=True)
+        denom = q_norm * self._norms[:n][sel]
+        sims = np.zeros(denom.shape, dtype=np.float32)
+        dots = self._embeddings.dot(q, self._store_rows[:n][sel])
+        np.divide(dots, denom, out=sims, where=denom > 0)
+        recency = 1.0 / ((_seconds(now) - self._stamps[:n][sel]) + 1.0)
+        scores = sims + self._weights[:n][sel] * recency
+        if mood:
+            col = self._mood_cols.get(mood)
+            if col is not None:
+                scores = scores + col[:n][sel]
+        if q_tags:
+            tag_scores = np.zeros(n, dtype=np.float64)
+            for tag in q_tags:
+                positions = self._tag_positions.get(tag)
+                if positions:
+                    tag_scores[np.fromiter(positions, dtype=np.intp)] += 1.0
+            scores = scores + tag_scores[sel] / len(q_tags)
+        return np.where(self._has_row[:n][sel], scores, -np.inf)
+
+    def _top_k(self, scores, top_k: int) -> List[int]:
+        """Return row positions of the ``top_k`` highest finite ``scores``."""
+        valid = np.flatnonzero(np.isfinite(scores))
+        if top_k <= 0 or not valid.size:
+            return []
+        if valid.size > top_k:
+            part = np.argpartition(-scores[valid], top_k - 1)[:top_k]
+            valid = valid[part]
+        # Sort by score, breaking ties by insertion position like a stable sort
+        order = np.lexsort((valid, -scores[valid]))
+        return [int(i) for i in valid[order]]
+
+    def _candidates(
+        self, hits: Iterable[MemoryEntry], top_k: int, *, mood: str | None, q_tags: set[str]
+    ) -> List[int]:
+        """Return ``hits`` plus every memory tags, mood or recency could lift."""
+        rows = {self._positions[id(m)] for m in hits}
+        for tag in q_tags:
+            rows |= self._tag_positions.get(tag, set())
+        if mood:
+            rows |= self._mood_positions.get(mood, set())
+        rows |= self._recent_positions(top_k, dense=True)
+        return sorted(rows)
+
+    def _rank_matrix(
+        self,
+        queries,
+        top_k: int,
+        now: datetime,
+        *,
+        mood: str | None,
+        q_tags: set[str],
+        rows: List[int] | None = None,
+    ) -> List[List[MemoryEntry]]:
+        """Rank ``rows`` (default: all) of the matrix for each cue in ``queries``."""
+        picked = None if rows is None else np.asarray(rows, dtype=np.intp)
+        scores = self._score_matrix(queries, now, mood=mood, q_tags=q_tags, rows=picked)
+        return [
+            [self._memories[i if rows is None else rows[i]] for i in self._top_k(row, top_k)]
+            for row in np.atleast_2d(scores)
+        ]
+
     def query(
         self,
         text: str,
@@ -87,60 +673,244 @@ class Retriever:
         *,
         mood: str | None = None,
         tags: Iterable[str] | None = None,
+        memory_type: str | Iterable[str] | None = None,
+        require_tags: Iterable[str] | None = None,
+        role: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
     ) -> List[MemoryEntry]:
+        """Return the ``top_k`` best memories for ``text``.
+
+        ``mood`` and ``tags`` boost matching memories. The remaining keywords
+        are hard filters applied before any similarity is computed: only
+        memories of ``memory_type``, carrying every tag in ``require_tags``,
+        with ``metadata["role"] == role`` and timestamped within
+        ``[since, until]`` are scored.
+
+        Results are cached per cue, ``top_k``, mood, tags, filters and
+        :attr:`generation`, so repeating a query before the next write skips
+        encoding and scoring (recency is not re-evaluated for cached cues).
+        """
+        tags = list(tags or [])
+        require_tags = list(require_tags or [])
+        if memory_type is not None and not isinstance(memory_type, str):
+            memory_type = tuple(sorted(memory_type))
+        key = None
+        if self.cache_size:
+            key = (
+                text,
+                top_k,
+                mood,
+                tuple(sorted(set(tags))),
+                memory_type,
+                tuple(sorted(set(require_tags))),
+                role,
+                since,
+                until,
+                self.generation,
+            )
+            with self._lock:
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    self._cache_hits += 1
+                    return list(cached)
+                self._cache_misses += 1
         embedding = encode_text(text)
+        with self._lock:
+            allowed = self._filter_positions(
+                memory_type=memory_type,
+                require_tags=require_tags,
+                role=role,
+                since=since,
+                until=until,
+            )
+            results = self._query(embedding, top_k, mood=mood, tags=tags, allowed=allowed)
+            # A write while encoding changed the generation; don't cache
+            if key is not None and key[-1] == self.generation:
+                self._cache[key] = results
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            return list(results)
+
+    def query_many(
+        self,
+        texts: Iterable[str],
+        top_k: int = 5,
+        *,
+        mood: str | None = None,
+        tags: Iterable[str] | None = None,
+        memory_type: str | Iterable[str] | None = None,
+        require_tags: Iterable[str] | None = None,
+        role: str | None = None,
+        since: datetime | None = None,
+        until: datetime | None = None,
+    ) -> List[List[MemoryEntry]]:
+        """Return :meth:`query` results for each of ``texts``.
+
+        The cues are encoded in one :func:`encode_texts` batch. Dense cues
+        are scored against the matrix with a single matrix-matrix product,
+        or fetched from the vector index with one batched search; token cues
+        are answered one at a time. Filters apply to every cue.
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+        embeddings = encode_texts(texts)
+        with self._lock:
+            allowed = self._filter_positions(
+                memory_type=memory_type,
+                require_tags=require_tags,
+                role=role,
+                since=since,
+                until=until,
+            )
+            batched = (
+                self._dim is not None
+                and is_dense(embeddings[0])
+                and len(embeddings[0]) == self._dim
+                and (allowed is None or allowed)
+            )
+            if not batched:
+                return [
+                    self._query(e, top_k, mood=mood, tags=tags, allowed=allowed)
+                    for e in embeddings
+                ]
+            q_tags = set(tags or [])
+            now = datetime.utcnow()
+            queries = np.asarray(embeddings, dtype=np.float32)
+            if self._index_dirty:
+                self._build_index()
+            if self._index is not None and allowed is None:
+                hit_lists = self._index.query_many(queries, self.candidate_factor * top_k)
+                return [
+                    self._rank_matrix(
+                        q,
+                        top_k,
+                        now,
+                        mood=mood,
+                        q_tags=q_tags,
+                        rows=self._candidates(hits, top_k, mood=mood, q_tags=q_tags),
+                    )[0]
+                    for q, hits in zip(queries, hit_lists)
+                ]
+            rows = None if allowed is None else sorted(allowed)
+            return self._rank_matrix(queries, top_k, now, mood=mood, q_tags=q_tags, rows=rows)
+
+    def _filter_positions(
+        self,
+        *,
+        memory_type: str | Iterable[str] | None,
+        require_tags: Iterable[str] | None,
+        role: str | None,
+        since: datetime | None,
+        until: datetime | None,
+    ) -> set[int] | None:
+        """Return positions passing every filter, or ``None`` when unfiltered."""
+        allowed: set[int] | None = None
+        if memory_type is not None or since is not None or until is not None:
+            if memory_type is None:
+                types = list(self._recent)
+            elif isinstance(memory_type, str):
+                types = [memory_type]
+            else:
+                types = list(memory_type)
+            lo = (_seconds(since),) if since is not None else None
+            hi = (_seconds(until), math.inf) if until is not None else None
+            allowed = set()
+            for kind in types:
+                # Per-type timestamp lists are sorted, so a range is two bisects
+                stamps = self._recent.get(kind, [])
+                start = bisect_left(stamps, lo) if lo is not None else 0
+                end = bisect_right(stamps, hi) if hi is not None else len(stamps)
+                for _, key in stamps[start:end]:
+                    pos = self._positions.get(key)
+                    if pos is not None:
+                        allowed.add(pos)
+        for tag in set(require_tags or []):
+            positions = self._tag_positions.get(tag, set())
+            allowed = set(positions) if allowed is None else allowed & positions
+        if role is not None:
+            positions = self._role_positions.get(role, set())
+            allowed = set(positions) if allowed is None else allowed & positions
+        return allowed
+
+    def _query(
+        self,
+        embedding,
+        top_k: int,
+        *,
+        mood: str | None,
+        tags: Iterable[str] | None,
+        allowed: set[int] | None = None,
+    ) -> List[MemoryEntry]:
         q_tags = set(tags or [])
         now = datetime.utcnow()
+        dense_query = is_dense(embedding)
+        if allowed is not None and not allowed:
+            return []
 
-        if (
-            self._index is not None
-            and embedding
-            and isinstance(embedding[0], (float, int))
-        ):
-            idxs = self._index.query(embedding, top_k)
-            results = [self._memories[i] for i in idxs]
-            if mood:
-                scored = []
-                for i in idxs:
-                    memory = self._memories[i]
-                    vec = self._dense_vectors[i]
-                    sim = self._cosine_dense(embedding, vec)
-                    recency = 1 / ((now - memory.timestamp).total_seconds() + 1)
-                    weight = self._recency_weights[self._types[i]]
-                    score = memory.emotion_scores.get(mood, 0.0)
-                    boost = float(score)
-                    tag_score = (
-                        len(q_tags & self._tags[i]) / len(q_tags) if q_tags else 0.0
-                    )
-                    scored.append((sim + tag_score + weight * recency + boost, memory))
-                scored.sort(key=lambda item: item[0], reverse=True)
-                results = [m for _, m in scored]
-            return results[:top_k]
-
-        if self._dense_vectors and embedding and isinstance(embedding[0], (float, int)):
-            scored = []
-            for i, (memory, vec) in enumerate(zip(self._memories, self._dense_vectors)):
-                sim = self._cosine_dense(embedding, vec)
-                recency = 1 / ((now - memory.timestamp).total_seconds() + 1)
-                weight = self._recency_weights[self._types[i]]
-                score = memory.emotion_scores.get(mood, 0.0) if mood else 0.0
-                boost = float(score)
-                tag_score = (
-                    len(q_tags & self._tags[i]) / len(q_tags) if q_tags else 0.0
+        if dense_query and self._index_dirty:
+            self._build_index()
+
+        fits_matrix = (
+            dense_query and self._dim is not None and len(embedding) == self._dim
+        )
+        # Filtered queries score their (already narrowed) candidates exactly
+        if self._index is not None and dense_query and allowed is None:
+            hits = self._index.query(embedding, self.candidate_factor * top_k)
+            rows = self._candidates(hits, top_k, mood=mood, q_tags=q_tags)
+            # Stage two: the full composite score over the candidates only
+            if fits_matrix:
+                ranked = self._rank_matrix(
+                    embedding, top_k, now, mood=mood, q_tags=q_tags, rows=rows
                 )
-                scored.append((sim + tag_score + weight * recency + boost, memory))
+                return ranked[0]
+            scored = [
+                (self._score_dense(i, embedding, now, mood=mood, q_tags=q_tags), i)
+                for i in rows
+                if self._dense_vectors[i] is not None
+            ]
+            scored.sort(key=lambda item: (-item[0], item[1]))
+            return [self._memories[i] for _, i in scored[:top_k]]
+
+        if fits_matrix:
+            rows = None if allowed is None else sorted(allowed)
+            ranked = self._rank_matrix(embedding, top_k, now, mood=mood, q_tags=q_tags, rows=rows)
+            return ranked[0]
+
+        if dense_query and any(v is not None for v in self._dense_vectors):
+            positions = range(len(self._memories)) if allowed is None else sorted(allowed)
+            scored = [
+                (self._score_dense(i, embedding, now, mood=mood, q_tags=q_tags), self._memories[i])
+                for i in positions
+                if self._dense_vectors[i] is not None
+            ]
             scored.sort(key=lambda item: item[0], reverse=True)
             return [m for _, m in scored[:top_k]]
 
         tokens = embedding  # type: ignore[assignment]
-        q_vec: Dict[int, int] = {}
-        for t in tokens:
-            idx = self._vocab.get(t)
-            if idx is not None:
-                q_vec[idx] = q_vec.get(idx, 0) + 1
+        sims = self._token_similarities(tokens)
+        # Memories outside the postings only score via tags, mood and recency;
+        # recency is monotonic per type so the newest ``top_k`` of each type
+        # bound every memory that could still reach the results (moods below
+        # ``mood_threshold`` are left to that bound).
+        if allowed is not None:
+            # The recency bound below does not hold inside a filtered subset
+            candidates = allowed
+        else:
+            candidates = set(sims)
+            for tag in q_tags:
+                candidates |= self._tag_positions.get(tag, set())
+            if mood:
+                candidates |= self._mood_positions.get(mood, set())
+            candidates |= self._recent_positions(top_k)
         scored = []
-        for i, (memory, vec) in enumerate(zip(self._memories, self._vectors)):
-            sim = self._cosine(q_vec, vec)
+        for i in candidates:
+            memory = self._memories[i]
+            if self._term_counts[i] is None:
+                continue
+            sim = sims.get(i, 0.0)
             recency = 1 / ((now - memory.timestamp).total_seconds() + 1)
             weight = self._recency_weights[self._types[i]]
             score = memory.emotion_scores.get(mood, 0.0) if mood else 0.0
@@ -148,6 +918,7 @@ class Retriever:
             tag_score = (
                 len(q_tags & self._tags[i]) / len(q_tags) if q_tags else 0.0
             )
-            scored.append((sim + tag_score + weight * recency + boost, memory))
-        scored.sort(key=lambda item: item[0], reverse=True)
-        return [m for _, m in scored[:top_k]]
+            scored.append((sim + tag_score + weight * recency + boost, i))
+        # Tie-break on position to match a stable sort over every memory
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [self._memories[i] for _, i in scored[:top_k]]
@@ -2,197 +2,557 @@
 
 from __future__ import annotations
 
+import atexit
+import queue
+import re
 import sqlite3
+import struct
+import sys
 import threading
 import json
+from contextlib import contextmanager
+from array import array
 from datetime import datetime
 from pathlib import Path
-from typing import Iterable, List
+from typing import Iterable, Iterator, List, Tuple
+
+try:  # pragma: no cover - optional dependency
+    import numpy as np
+except Exception:  # pragma: no cover - numpy may not be installed
+    np = None
 
 from core.memory_entry import MemoryEntry
+from encoding.encoder import get_model_name, is_dense
+from ms_utils.logger import Logger
+from ms_utils.scheduler import Scheduler
+
+logger = Logger(__name__)
+
+# Version 1 stores dense embeddings as raw float BLOBs instead of JSON text.
+# Version 2 adds a UUID ``id`` primary key and a timestamp index.
+# Version 3 adds a ``meta`` table holding a generation counter that is bumped
+# by every update and delete (inserts leave it alone).
+SCHEMA_VERSION = 3
+_BUMP = "UPDATE meta SET value = value + 1 WHERE key = 'generation'"
+
+_TABLES = ("memories", "semantic_memories", "procedural_memories")
+_COLUMNS = (
+    ("content", "TEXT"),
+    ("timestamp", "REAL"),
+    ("embedding", "TEXT"),
+    ("emotions", "TEXT"),
+    ("emotion_scores", "TEXT"),
+    ("metadata", "TEXT"),
+    ("embedding_blob", "BLOB"),
+    ("embedding_dim", "INTEGER"),
+    ("embedding_model", "TEXT"),
+)
+_SELECT = "id, content, timestamp, embedding, emotions, emotion_scores, metadata, embedding_blob, embedding_dim"
+_DTYPES = {"float32": "<f4", "float16": "<f2"}
+# WAL lets reader connections run alongside the writer
+DEFAULT_PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "cache_size": -16000,
+    "mmap_size": 268435456,
+}
+_PRAGMA_VALUE = re.compile(r"^-?\w+$")
+
+
+def _encode_embedding(
+    embedding, dtype: str = "float32"
+) -> Tuple[str | None, bytes | None, int | None, str | None]:
+    """Return ``(json, blob, dim, model)`` column values for ``embedding``."""
+    if not is_dense(embedding):
+        return json.dumps(list(embedding)), None, None, None
+    if np is not None:
+        blob = np.asarray(embedding, dtype=_DTYPES[dtype]).tobytes()
+    elif dtype == "float16":
+        blob = struct.pack(f"<{len(embedding)}e", *embedding)
+    else:
+        arr = array("f", embedding)
+        if sys.byteorder == "big":  # pragma: no cover - platform specific
+            arr.byteswap()
+        blob = arr.tobytes()
+    return None, blob, len(embedding), get_model_name()
+
+
+def _decode_embedding(text: str | None, blob: bytes | None, dim: int | None):
+    """Inverse of :func:`_encode_embedding`.
+
+    Dense vectors are returned as a read-only NumPy view over the row's bytes
+    when NumPy is installed, otherwise as a list of floats.
+    """
+    if blob is None:
+        return json.loads(text) if text else []
+    width = len(blob) // dim if dim else 4
+    if np is not None:
+        vec = np.frombuffer(blob, dtype="<f4" if width == 4 else "<f2")
+        return vec if width == 4 else vec.astype(np.float32)
+    if width == 2:
+        return list(struct.unpack(f"<{dim}e", blob))
+    arr = array("f")
+    arr.frombytes(blob)
+    if sys.byteorder == "big":  # pragma: no cover - platform specific
+        arr.byteswap()
+    return arr.tolist()
 
 
 class Database:
-    def __init__(self, path: str | Path = "memory.db") -> None:
+    """SQLite store for episodic, semantic and procedural memories.
+
+    With ``write_behind`` enabled, saves, updates and deletes are queued and
+    committed together every ``flush_interval`` seconds (or on :meth:`flush`)
+    instead of one commit per call. Reads flush pending writes first, and
+    whatever is still queued when the interpreter exits is flushed then.
+
+    Writes share one connection guarded by a lock. Reads check out one of at
+    most ``max_readers`` read-only connections so, with the default WAL
+    journal, background threads never wait on the writer. ``pragmas``
+    overrides entries of :data:`DEFAULT_PRAGMAS`.
+    """
+
+    def __init__(
+        self,
+        path: str | Path = "memory.db",
+        *,
+        embedding_dtype: str = "float32",
+        write_behind: bool = False,
+        flush_interval: float = 1.0,
+        pragmas: dict | None = None,
+        max_readers: int = 4,
+    ) -> None:
+        if embedding_dtype not in _DTYPES:
+            raise ValueError(f"Unsupported embedding dtype: {embedding_dtype}")
         self.path = Path(path)
+        self.embedding_dtype = embedding_dtype
+        self.pragmas = {**DEFAULT_PRAGMAS, **(pragmas or {})}
+        for name, value in self.pragmas.items():
+            if name not in DEFAULT_PRAGMAS or not _PRAGMA_VALUE.match(str(value)):
+                raise ValueError(f"Unsupported pragma: {name}={value}")
         # Allow connection sharing across threads since background dreaming runs
         # in a separate thread and accesses the same database.
         self.conn = sqlite3.connect(self.path, check_same_thread=False)
-        self._lock = threading.Lock()
+        self._apply_pragmas(self.conn)
+        # Reentrant so a transaction can hold the writer while its own
+        # writes and reads take the lock again
+        self._lock = threading.RLock()
+        # An in-memory database is private to its connection, so readers
+        # must share the writer there.
+        self._shared_reads = str(path) == ":memory:"
+        self._local = threading.local()
+        self.max_readers = max(1, int(max_readers))
+        self._readers: List[sqlite3.Connection] = []
+        self._idle_readers: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._readers_lock = threading.Lock()
+        self._pending: List[Tuple[str, list, bool]] = []
         self._setup()
+        self.write_behind = write_behind
+        self._flusher: Scheduler | None = None
+        if write_behind:
+            self._flusher = Scheduler()
+            self._flusher.schedule(flush_interval, self._background_flush)
+            # The flusher thread is a daemon, so it won't run at exit
+            atexit.register(self._background_flush)
 
     def close(self) -> None:
-        """Close the underlying SQLite connection."""
+        """Flush pending writes and close the underlying SQLite connection."""
+        if self._flusher is not None:
+            self._flusher.stop()
+            self._flusher = None
+            atexit.unregister(self._background_flush)
+        self.flush()
+        with self._readers_lock:
+            for reader in self._readers:
+                reader.close()
+            self._readers.clear()
+            self._idle_readers = queue.LifoQueue()
         with self._lock:
             self.conn.close()
 
-    def _setup(self) -> None:
+    def _apply_pragmas(self, conn: sqlite3.Connection) -> None:
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name}={value}")
+
+    @contextmanager
+    def _reader(self) -> Iterator[sqlite3.Connection]:
+        """Check out a read-only connection from the pool for one read.
+
+        Connections are opened on demand up to ``max_readers``; beyond that a
+        read waits for one to be returned.
+        """
+        try:
+            conn = self._idle_readers.get_nowait()
+        except queue.Empty:
+            conn = None
+            with self._readers_lock:
+                if len(self._readers) < self.max_readers:
+                    # Closed from whichever thread calls ``close``
+                    conn = sqlite3.connect(self.path, check_same_thread=False)
+                    self._apply_pragmas(conn)
+                    conn.execute("PRAGMA query_only=ON")
+                    self._readers.append(conn)
+            if conn is None:
+                conn = self._idle_readers.get()
+        try:
+            yield conn
+        finally:
+            self._idle_readers.put(conn)
+
+    def _read(self, sql: str, params: tuple = ()) -> list:
+        """Run a ``SELECT`` and return all rows."""
+        self.flush()
+        if self._shared_reads or self._batch_depth():
+            # Uncommitted rows of an open transaction are only visible to the writer
+            with self._lock:
+                return self.conn.execute(sql, params).fetchall()
+        with self._reader() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def _batch_depth(self) -> int:
+        """Return how many :meth:`transaction` blocks this thread has open."""
+        return getattr(self._local, "depth", 0)
+
+    def flush(self) -> None:
+        """Commit all queued writes in a single transaction.
+
+        If a statement fails the transaction is rolled back and every queued
+        write stays queued for the next flush before the error is re-raised.
+        Inside :meth:`transaction` the writes are applied but left for the
+        block to commit.
+        """
+        if not self._pending:
+            # Cheap unlocked check so readers never wait on an open transaction
+            return
         with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, []
             cur = self.conn.cursor()
-            cur.execute(
-                "CREATE TABLE IF NOT EXISTS memories (content TEXT, timestamp REAL, embedding TEXT, emotions TEXT, emotion_scores TEXT, metadata TEXT)"
-            )
-            cur.execute(
-                "CREATE TABLE IF NOT EXISTS semantic_memories (content TEXT, timestamp REAL, embedding TEXT, emotions TEXT, emotion_scores TEXT, metadata TEXT)"
-            )
-            cur.execute(
-                "CREATE TABLE IF NOT EXISTS procedural_memories (content TEXT, timestamp REAL, embedding TEXT, emotions TEXT, emotion_scores TEXT, metadata TEXT)"
-            )
-            self.conn.commit()
+            try:
+                for sql, params, many in pending:
+                    if many:
+                        cur.executemany(sql, params)
+                    else:
+                        cur.execute(sql, params)
+                if not self._batch_depth():
+                    self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                self._pending[:0] = pending
+                raise
 
-    def save(self, entry: MemoryEntry) -> None:
+    def _background_flush(self) -> None:
+        # An error must not end the flusher thread; the writes stay queued
+        try:
+            self.flush()
+        except Exception as exc:
+            logger.error(f"Write-behind flush failed, {len(self._pending)} writes kept: {exc}")
+
+    @contextmanager
+    def transaction(self) -> Iterator["Database"]:
+        """Group all writes made inside the block into one commit.
+
+        The writer connection is held for the whole block, so other threads'
+        writes wait for it instead of joining it. If the block raises, every
+        write made inside it is rolled back (or dropped from the write-behind
+        queue). Nested blocks commit with the outermost one, which also
+        applies the block's queued write-behind writes in that commit.
+        """
+        with self._lock:
+            depth = self._batch_depth()
+            if depth == 0:
+                # Earlier queued writes are not part of this block
+                self.flush()
+            mark = len(self._pending)
+            self._local.depth = depth + 1
+            try:
+                yield self
+            except BaseException:
+                if depth == 0:
+                    self.conn.rollback()
+                    del self._pending[mark:]
+                raise
+            else:
+                if depth == 0:
+                    try:
+                        # Still at depth 1, so this applies without committing
+                        self.flush()
+                    except BaseException:
+                        del self._pending[mark:]
+                        raise
+                    self.conn.commit()
+            finally:
+                self._local.depth = depth
+
+    def _write(self, sql: str, params, *, many: bool = False) -> None:
+        """Run a write statement now, or queue it in write-behind mode."""
         with self._lock:
+            if self.write_behind:
+                self._pending.append((sql, params, many))
+                return
             cur = self.conn.cursor()
-            cur.execute(
-                "INSERT INTO memories VALUES (?, ?, ?, ?, ?, ?)",
-                (
-                    entry.content,
-                    entry.timestamp.timestamp(),
-                    json.dumps(entry.embedding),
-                    ",".join(entry.emotions),
-                    json.dumps(entry.emotion_scores),
-                    json.dumps(entry.metadata),
-                ),
-            )
-            self.conn.commit()
+            if many:
+                cur.executemany(sql, params)
+            else:
+                cur.execute(sql, params)
+            if not self._batch_depth():
+                self.conn.commit()
 
-    def load_all(self) -> List[MemoryEntry]:
+    def _setup(self) -> None:
         with self._lock:
             cur = self.conn.cursor()
+            columns = ", ".join(f"{name} {kind}" for name, kind in _COLUMNS)
+            for table in _TABLES:
+                cur.execute(f"CREATE TABLE IF NOT EXISTS {table} (id TEXT PRIMARY KEY, {columns})")
+            version = cur.execute("PRAGMA user_version").fetchone()[0]
+            if version < 1:
+                self._migrate_v1(cur)
+            if version < 2:
+                self._migrate_v2(cur)
+            for table in _TABLES:
+                cur.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_timestamp ON {table}(timestamp)")
+            cur.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+            cur.execute("INSERT OR IGNORE INTO meta VALUES ('generation', 0)")
+            cur.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self.conn.commit()
+
+    def _migrate_v1(self, cur: sqlite3.Cursor) -> None:
+        """Move JSON-encoded dense embeddings into binary columns."""
+        for table in _TABLES:
+            existing = {row[1] for row in cur.execute(f"PRAGMA table_info({table})")}
+            for name, kind in _COLUMNS:
+                if name not in existing:
+                    cur.execute(f"ALTER TABLE {table} ADD COLUMN {name} {kind}")
             rows = cur.execute(
-                "SELECT content, timestamp, embedding, emotions, emotion_scores, metadata FROM memories"
+                f"SELECT rowid, embedding FROM {table} WHERE embedding_blob IS NULL AND embedding LIKE '[%'"
             ).fetchall()
-        entries: List[MemoryEntry] = []
-        for content, ts, emb, emotions, scores, metadata in rows:
-            entries.append(
-                MemoryEntry(
-                    content=content,
-                    embedding=json.loads(emb) if emb else [],
-                    timestamp=datetime.utcfromtimestamp(ts),
-                    emotions=emotions.split(",") if emotions else [],
-                    emotion_scores=json.loads(scores) if scores else {},
-                    metadata=json.loads(metadata) if metadata else {},
-                )
+            updates = []
+            for rowid, text in rows:
+                emb = json.loads(text)
+                if not is_dense(emb):
+                    continue
+                _, blob, dim, _ = _encode_embedding(emb, self.embedding_dtype)
+                updates.append((blob, dim, rowid))
+            cur.executemany(
+                f"UPDATE {table} SET embedding=NULL, embedding_blob=?, embedding_dim=? WHERE rowid=?",
+                updates,
             )
-        return entries
+
+    def _migrate_v2(self, cur: sqlite3.Cursor) -> None:
+        """Give every row of a pre-v2 table a unique ``id``."""
+        for table in _TABLES:
+            existing = {row[1] for row in cur.execute(f"PRAGMA table_info({table})")}
+            if "id" in existing:
+                continue
+            # SQLite cannot add a PRIMARY KEY column in place; a unique index
+            # gives the same lookup cost.
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN id TEXT")
+            cur.execute(f"UPDATE {table} SET id = lower(hex(randomblob(16)))")
+            cur.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{table}_id ON {table}(id)")
+
+    def save(self, entry: MemoryEntry) -> None:
+        self._save_to_table("memories", entry)
+
+    def bulk_save(self, entries: Iterable[MemoryEntry]) -> None:
+        """Insert many episodic entries with a single ``executemany``."""
+        self._bulk_save_to_table("memories", entries)
+
+    def load_all(self) -> List[MemoryEntry]:
+        return self._load_from_table("memories")
+
+    def iter_all(self, page_size: int = 500, *, by_time: bool = False) -> Iterator[MemoryEntry]:
+        """Yield episodic entries, fetching ``page_size`` rows per query.
+
+        Rows come in insertion order, or oldest first with ``by_time``.
+        """
+        return self._iter_table("memories", page_size, by_time=by_time)
+
+    def load_recent(self, limit: int) -> List[MemoryEntry]:
+        """Return the ``limit`` newest episodic entries, oldest first."""
+        rows = self._read(
+            f"SELECT {_SELECT} FROM memories ORDER BY timestamp DESC, rowid DESC LIMIT ?",
+            (limit,),
+        )
+        return [self._entry(row) for row in reversed(rows)]
 
     def clear(self) -> None:
         """Delete all stored memories."""
+        self.flush()
         with self._lock:
             cur = self.conn.cursor()
             cur.execute("DELETE FROM memories")
             cur.execute("DELETE FROM semantic_memories")
             cur.execute("DELETE FROM procedural_memories")
-            self.conn.commit()
+            cur.execute(_BUMP)
+            if not self._batch_depth():
+                self.conn.commit()
 
-    def delete(self, timestamp: datetime) -> None:
-        """Remove a memory entry by timestamp."""
-        with self._lock:
-            cur = self.conn.cursor()
-            cur.execute("DELETE FROM memories WHERE timestamp=?", (timestamp.timestamp(),))
-            self.conn.commit()
+    def count(self) -> int:
+        """Return the number of stored memories across all tables."""
+        return sum(self._read(f"SELECT COUNT(*) FROM {table}")[0][0] for table in _TABLES)
 
-    def update(self, timestamp: datetime, entry: MemoryEntry) -> None:
-        """Update a memory entry identified by ``timestamp`` with new values."""
-        with self._lock:
-            cur = self.conn.cursor()
-            cur.execute(
-                "UPDATE memories SET content=?, embedding=?, emotions=?, emotion_scores=?, metadata=? WHERE timestamp=?",
-                (
-                    entry.content,
-                    json.dumps(entry.embedding),
-                    ",".join(entry.emotions),
-                    json.dumps(entry.emotion_scores),
-                    json.dumps(entry.metadata),
-                    timestamp.timestamp(),
-                ),
+    def generation(self) -> int:
+        """Return a counter that changes whenever a stored row is modified or deleted."""
+        return self._read("SELECT value FROM meta WHERE key = 'generation'")[0][0]
+
+    def watermark(self) -> dict[str, int]:
+        """Return the highest ``rowid`` of each table."""
+        return {
+            table: self._read(f"SELECT COALESCE(MAX(rowid), 0) FROM {table}")[0][0]
+            for table in _TABLES
+        }
+
+    def ids_since(self, watermark: dict[str, int]) -> List[str]:
+        """Return ids of rows inserted after ``watermark`` (see :meth:`watermark`)."""
+        ids: List[str] = []
+        for table in _TABLES:
+            rows = self._read(
+                f"SELECT id FROM {table} WHERE rowid > ? ORDER BY rowid", (watermark.get(table, 0),)
             )
-            self.conn.commit()
+            ids.extend(row[0] for row in rows)
+        return ids
+
+    def delete(self, key: str | datetime) -> None:
+        """Remove a memory entry by ``id`` (or, for older callers, timestamp)."""
+        self._delete_from_table("memories", key)
+
+    def update(self, key: str | datetime, entry: MemoryEntry) -> None:
+        """Update the memory entry identified by ``key`` with new values."""
+        self._update_table("memories", key, entry)
 
     # --- Semantic memory operations ---
     def save_semantic(self, entry: MemoryEntry) -> None:
         self._save_to_table("semantic_memories", entry)
 
+    def bulk_save_semantic(self, entries: Iterable[MemoryEntry]) -> None:
+        self._bulk_save_to_table("semantic_memories", entries)
+
     def load_all_semantic(self) -> List[MemoryEntry]:
         return self._load_from_table("semantic_memories")
 
-    def delete_semantic(self, timestamp: datetime) -> None:
-        self._delete_from_table("semantic_memories", timestamp)
+    def iter_all_semantic(
+        self, page_size: int = 500, *, by_time: bool = False
+    ) -> Iterator[MemoryEntry]:
+        return self._iter_table("semantic_memories", page_size, by_time=by_time)
 
-    def update_semantic(self, timestamp: datetime, entry: MemoryEntry) -> None:
-        self._update_table("semantic_memories", timestamp, entry)
+    def delete_semantic(self, key: str | datetime) -> None:
+        self._delete_from_table("semantic_memories", key)
+
+    def update_semantic(self, key: str | datetime, entry: MemoryEntry) -> None:
+        self._update_table("semantic_memories", key, entry)
 
     # --- Procedural memory operations ---
     def save_procedural(self, entry: MemoryEntry) -> None:
         self._save_to_table("procedural_memories", entry)
 
+    def bulk_save_procedural(self, entries: Iterable[MemoryEntry]) -> None:
+        self._bulk_save_to_table("procedural_memories", entries)
+
     def load_all_procedural(self) -> List[MemoryEntry]:
         return self._load_from_table("procedural_memories")
 
-    def delete_procedural(self, timestamp: datetime) -> None:
-        self._delete_from_table("procedural_memories", timestamp)
+    def iter_all_procedural(
+        self, page_size: int = 500, *, by_time: bool = False
+    ) -> Iterator[MemoryEntry]:
+        return self._iter_table("procedural_memories", page_size, by_time=by_time)
+
+    def delete_procedural(self, key: str | datetime) -> None:
+        self._delete_from_table("procedural_memories", key)
 
-    def update_procedural(self, timestamp: datetime, entry: MemoryEntry) -> None:
-        self._update_table("procedural_memories", timestamp, entry)
+    def update_procedural(self, key: str | datetime, entry: MemoryEntry) -> None:
+        self._update_table("procedural_memories", key, entry)
 
     # --- Internal helpers ---
+    def _values(self, entry: MemoryEntry) -> tuple:
+        """Return column values for ``entry`` in ``_COLUMNS`` order minus timestamp."""
+        text, blob, dim, model = _encode_embedding(entry.embedding, self.embedding_dtype)
+        return (
+            entry.content,
+            text,
+            ",".join(entry.emotions),
+            json.dumps(entry.emotion_scores),
+            json.dumps(entry.metadata),
+            blob,
+            dim,
+            model,
+        )
+
+    def _row(self, entry: MemoryEntry) -> tuple:
+        content, *rest = self._values(entry)
+        return (entry.id, content, entry.timestamp.timestamp(), *rest)
+
+    @staticmethod
+    def _insert_sql(table: str) -> str:
+        names = ", ".join(name for name, _ in _COLUMNS)
+        marks = ", ".join("?" * (len(_COLUMNS) + 1))
+        return f"INSERT INTO {table} (id, {names}) VALUES ({marks})"
+
     def _save_to_table(self, table: str, entry: MemoryEntry) -> None:
-        with self._lock:
-            cur = self.conn.cursor()
-            cur.execute(
-                f"INSERT INTO {table} VALUES (?, ?, ?, ?, ?, ?)",
-                (
-                    entry.content,
-                    entry.timestamp.timestamp(),
-                    json.dumps(entry.embedding),
-                    ",".join(entry.emotions),
-                    json.dumps(entry.emotion_scores),
-                    json.dumps(entry.metadata),
-                ),
-            )
-            self.conn.commit()
+        self._write(self._insert_sql(table), self._row(entry))
+
+    def _bulk_save_to_table(self, table: str, entries: Iterable[MemoryEntry]) -> None:
+        rows = [self._row(entry) for entry in entries]
+        if rows:
+            self._write(self._insert_sql(table), rows, many=True)
+
+    @staticmethod
+    def _entry(row: tuple) -> MemoryEntry:
+        entry_id, content, ts, emb, emotions, scores, metadata, blob, dim = row
+        return MemoryEntry(
+            id=entry_id,
+            content=content,
+            embedding=_decode_embedding(emb, blob, dim),
+            timestamp=datetime.utcfromtimestamp(ts),
+            emotions=emotions.split(",") if emotions else [],
+            emotion_scores=json.loads(scores) if scores else {},
+            metadata=json.loads(metadata) if metadata else {},
+        )
 
     def _load_from_table(self, table: str) -> List[MemoryEntry]:
-        with self._lock:
-            cur = self.conn.cursor()
-            rows = cur.execute(
-                f"SELECT content, timestamp, embedding, emotions, emotion_scores, metadata FROM {table}"
-            ).fetchall()
-        entries: List[MemoryEntry] = []
-        for content, ts, emb, emotions, scores, metadata in rows:
-            entries.append(
-                MemoryEntry(
-                    content=content,
-                    embedding=json.loads(emb) if emb else [],
-                    timestamp=datetime.utcfromtimestamp(ts),
-                    emotions=emotions.split(",") if emotions else [],
-                    emotion_scores=json.loads(scores) if scores else {},
-                    metadata=json.loads(metadata) if metadata else {},
-                )
-            )
-        return entries
+        rows = self._read(f"SELECT {_SELECT} FROM {table}")
+        return [self._entry(row) for row in rows]
 
-    def _delete_from_table(self, table: str, timestamp: datetime) -> None:
-        with self._lock:
-            cur = self.conn.cursor()
-            cur.execute(
-                f"DELETE FROM {table} WHERE timestamp=?",
-                (timestamp.timestamp(),),
+    def _iter_table(
+        self, table: str, page_size: int, *, by_time: bool = False
+    ) -> Iterator[MemoryEntry]:
+        # Keyset pagination keeps each page an index seek: on rowid, or on
+        # (timestamp, rowid), the order the timestamp index stores rows in
+        key = "timestamp, rowid" if by_time else "rowid"
+        width = 2 if by_time else 1
+        where, last = "", ()
+        while True:
+            rows = self._read(
+                f"SELECT {key}, {_SELECT} FROM {table}{where} ORDER BY {key} LIMIT ?",
+                (*last, page_size),
             )
-            self.conn.commit()
+            for row in rows:
+                yield self._entry(row[width:])
+            if len(rows) < page_size:
+                return
+            where = f" WHERE ({key}) > ({', '.join('?' * width)})"
+            last = rows[-1][:width]
 
-    def _update_table(self, table: str, timestamp: datetime, entry: MemoryEntry) -> None:
-        with self._lock:
-            cur = self.conn.cursor()
-            cur.execute(
-                f"UPDATE {table} SET content=?, embedding=?, emotions=?, emotion_scores=?, metadata=? WHERE timestamp=?",
-                (
-                    entry.content,
-                    json.dumps(entry.embedding),
-                    ",".join(entry.emotions),
-                    json.dumps(entry.emotion_scores),
-                    json.dumps(entry.metadata),
-                    timestamp.timestamp(),
-                ),
+    @staticmethod
+    def _where(key: str | datetime) -> Tuple[str, object]:
+        """Return the ``WHERE`` column and value identifying ``key``."""
+        if isinstance(key, datetime):
+            return "timestamp", key.timestamp()
+        return "id", key
+
+    def _delete_from_table(self, table: str, key: str | datetime) -> None:
+        column, value = self._where(key)
+        with self.transaction():
+            self._write(f"DELETE FROM {table} WHERE {column}=?", (value,))
+            self._write(_BUMP, ())
+
+    def _update_table(self, table: str, key: str | datetime, entry: MemoryEntry) -> None:
+        values = self._values(entry)
+        column, value = self._where(key)
+        with self.transaction():
+            self._write(
+                f"UPDATE {table} SET content=?, embedding=?, emotions=?, emotion_scores=?, metadata=?, "
+                f"embedding_blob=?, embedding_dim=?, embedding_model=? WHERE {column}=?",
+                (*values, value),
             )
-            self.conn.commit()
+            self._write(_BUMP, ())
@@ -2,7 +2,11 @@
 
 from __future__ import annotations
 
-from typing import Iterable, List
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
 
 try:  # pragma: no cover - optional dependency
     import numpy as np
@@ -10,6 +14,7 @@ except Exception:  # pragma: no cover - numpy may not be installed
     np = None
 
 from core.memory_entry import MemoryEntry
+from encoding.encoder import is_dense
 
 try:  # pragma: no cover - optional dependency
     import faiss  # type: ignore
@@ -17,29 +22,305 @@ except Exception:  # pragma: no cover - faiss may not be installed
     faiss = None
 
 
+INDEX_TYPES = ("flat_ip", "flat_l2", "ivf_flat", "hnsw", "ivf_pq")
+# Bumped whenever the on-disk layout or label scheme changes
+INDEX_FORMAT_VERSION = 1
+_IVF_KINDS = ("ivf_flat", "ivf_pq")
+
+
+def _mmap_flags(kind: str) -> int:
+    """Return the ``read_index`` flags that memory-map an index of ``kind``."""
+    if kind in _IVF_KINDS:
+        # Maps the inverted lists only
+        return faiss.IO_FLAG_MMAP
+    # Flat codes and HNSW storage can only be mapped by newer FAISS releases
+    return getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+
+
+def memory_label(entry: MemoryEntry) -> int:
+    """Return a stable non-negative int64 label for ``entry``."""
+    return int(hashlib.sha1(entry.id.encode("utf-8")).hexdigest()[:15], 16)
+
+
 class FaissIndex:
-    """Wrapper around a FAISS index for memory retrieval."""
+    """Wrapper around a FAISS index for memory retrieval.
+
+    ``index_type`` selects the structure:
+
+    ``flat_ip``
+        Exact inner product on L2-normalized vectors, i.e. cosine (default).
+    ``flat_l2``
+        Exact Euclidean distance.
+    ``ivf_flat`` / ``ivf_pq``
+        Inverted lists over ``nlist`` centroids, storing full vectors or
+        ``pq_m`` x ``pq_bits`` product-quantized codes. Searched with
+        ``nprobe`` lists.
+    ``hnsw``
+        Graph index with ``hnsw_m`` links per node, searched with
+        ``ef_search`` candidates.
+
+    Vectors are stored under :func:`memory_label` ids through
+    ``IndexIDMap2`` so memories can be added and removed incrementally.
+    Trained types fall back to ``flat_ip`` until there are enough vectors to
+    train on.
 
-    def __init__(self, memories: Iterable[MemoryEntry]):
-        self._memories = list(memories)
+    :meth:`save` writes the index to ``path`` with a JSON header beside it
+    (``path + ".json"``) and :meth:`load` memory-maps it back where FAISS
+    supports it. A mapped index is read-only, so the first :meth:`add` or
+    :meth:`remove` reads the file into memory.
+    """
+
+    def __init__(
+        self,
+        memories: Iterable[MemoryEntry],
+        *,
+        index_type: str = "flat_ip",
+        nlist: int = 100,
+        nprobe: int = 8,
+        hnsw_m: int = 32,
+        ef_search: int = 64,
+        pq_m: int = 8,
+        pq_bits: int = 8,
+    ):
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type: {index_type}")
+        self.index_type = index_type
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.hnsw_m = hnsw_m
+        self.ef_search = ef_search
+        self.pq_m = pq_m
+        self.pq_bits = pq_bits
+        self._labels: Dict[int, MemoryEntry] = {}
         self._index = None
-        if faiss is None or np is None or not self._memories:
+        self._base = None
+        self._quantizer = None
+        # Set while the index is a read-only memory map of this file
+        self._mapped_path: str | None = None
+        self.kind = index_type
+        self.dim = 0
+        memories = list(memories)
+        if faiss is None or np is None or not memories:
             return
-        first = self._memories[0].embedding
-        if not first or not isinstance(first[0], (float, int)):
+        if not is_dense(memories[0].embedding):
             return
-        dim = len(first)
-        vectors = np.array([m.embedding for m in self._memories], dtype="float32")
-        self._index = faiss.IndexFlatL2(dim)
-        self._index.add(vectors)
+        self.dim = len(memories[0].embedding)
+        vectors = self._vectors(memories)
+        self._index = self._create(vectors)
+        self._insert(memories, vectors)
 
     @property
     def available(self) -> bool:
         return self._index is not None
 
-    def query(self, vector: List[float], top_k: int = 5) -> List[int]:
-        if self._index is None or np is None:
-            return []
-        vec = np.array([vector], dtype="float32")
-        _, indices = self._index.search(vec, top_k)
-        return [int(i) for i in indices[0]]
+    @property
+    def normalized(self) -> bool:
+        return self.index_type != "flat_l2"
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    def _min_train(self) -> int:
+        return {"ivf_flat": self.nlist, "ivf_pq": max(self.nlist, 2**self.pq_bits)}.get(
+            self.index_type, 0
+        )
+
+    @property
+    def needs_rebuild(self) -> bool:
+        """``True`` once a flat stand-in has enough vectors to train the real type."""
+        return self.kind != self.index_type and len(self._labels) >= self._min_train()
+
+    def options(self) -> Dict[str, Any]:
+        return {
+            "index_type": self.index_type,
+            "nlist": self.nlist,
+            "nprobe": self.nprobe,
+            "hnsw_m": self.hnsw_m,
+            "ef_search": self.ef_search,
+            "pq_m": self.pq_m,
+            "pq_bits": self.pq_bits,
+        }
+
+    def save(self, path: str | Path, **header: Any) -> None:
+        """Write the index to ``path`` and ``header`` fields to its JSON sidecar."""
+        if self._index is None:
+            return
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        faiss.write_index(self._index, str(tmp))
+        # Replacing keeps any existing memory map of the old file valid
+        os.replace(tmp, path)
+        meta = {
+            "version": INDEX_FORMAT_VERSION,
+            "options": self.options(),
+            "kind": self.kind,
+            "dim": self.dim,
+            "count": len(self._labels),
+            **header,
+        }
+        tmp_meta = path.with_name(path.name + ".json.tmp")
+        tmp_meta.write_text(json.dumps(meta))
+        os.replace(tmp_meta, path.with_name(path.name + ".json"))
+
+    @staticmethod
+    def read_header(path: str | Path) -> Dict[str, Any] | None:
+        """Return the sidecar header for ``path``, or ``None`` if unusable."""
+        path = Path(path)
+        meta_path = path.with_name(path.name + ".json")
+        if not path.exists() or not meta_path.exists():
+            return None
+        try:
+            meta = json.loads(meta_path.read_text())
+        except (OSError, ValueError):
+            return None
+        if meta.get("version") != INDEX_FORMAT_VERSION:
+            return None
+        return meta
+
+    @classmethod
+    def open(cls, path: str | Path, **options: Any) -> "FaissIndex | None":
+        """Read a saved index without labelling it (see :meth:`attach`).
+
+        Returns ``None`` if FAISS is missing, the file is absent or was built
+        with different ``options``.
+        """
+        if faiss is None or np is None:
+            return None
+        meta = cls.read_header(path)
+        if meta is None:
+            return None
+        index = cls([], **options)
+        if meta["options"] != index.options():
+            return None
+        flags = _mmap_flags(meta["kind"])
+        try:
+            index._index = faiss.read_index(str(path), flags)
+        except Exception:  # pragma: no cover - corrupt or foreign file
+            return None
+        if flags:
+            index._mapped_path = str(path)
+        index.kind = meta["kind"]
+        index.dim = meta["dim"]
+        index._base = faiss.downcast_index(index._index.index)
+        return index
+
+    def attach(self, memories: Iterable[MemoryEntry]) -> bool:
+        """Label an :meth:`open`-ed index with the matching ``memories``.
+
+        Returns ``False`` if the index references memories not given.
+        """
+        stored = {int(label) for label in faiss.vector_to_array(self._index.id_map)}
+        self._labels = {}
+        for memory in memories:
+            label = memory_label(memory)
+            if label in stored:
+                self._labels[label] = memory
+        return len(self._labels) == len(stored)
+
+    @classmethod
+    def load(
+        cls, path: str | Path, memories: Iterable[MemoryEntry], **options: Any
+    ) -> "FaissIndex | None":
+        """Open a saved index, labelling it with the matching ``memories``.
+
+        Returns ``None`` if :meth:`open` fails or the index references
+        memories not given.
+        """
+        index = cls.open(path, **options)
+        if index is None or not index.attach(memories):
+            return None
+        return index
+
+    def _vectors(self, memories: List[MemoryEntry]) -> "np.ndarray":
+        vectors = np.asarray([m.embedding for m in memories], dtype="float32")
+        if self.normalized:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.where(norms == 0, 1, norms)
+        return np.ascontiguousarray(vectors, dtype="float32")
+
+    def _create(self, vectors: "np.ndarray"):
+        """Build and, if needed, train the index structure for ``vectors``."""
+        dim = self.dim
+        kind = self.index_type
+        if len(vectors) < self._min_train():
+            kind = "flat_ip"
+        self.kind = kind
+        if kind == "flat_l2":
+            base = faiss.IndexFlatL2(dim)
+        elif kind == "flat_ip":
+            base = faiss.IndexFlatIP(dim)
+        elif kind == "hnsw":
+            base = faiss.IndexHNSWFlat(dim, self.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+            base.hnsw.efSearch = self.ef_search
+        else:
+            quantizer = faiss.IndexFlatIP(dim)
+            if kind == "ivf_flat":
+                base = faiss.IndexIVFFlat(quantizer, dim, self.nlist, faiss.METRIC_INNER_PRODUCT)
+            else:
+                base = faiss.IndexIVFPQ(
+                    quantizer, dim, self.nlist, self.pq_m, self.pq_bits, faiss.METRIC_INNER_PRODUCT
+                )
+            base.train(vectors)
+            base.nprobe = self.nprobe
+            # keep a reference so the quantizer is not garbage collected
+            self._quantizer = quantizer
+        self._base = base
+        return faiss.IndexIDMap2(base)
+
+    def _make_writable(self) -> None:
+        """Replace a memory-mapped index with an in-memory copy of its file."""
+        if self._mapped_path is None:
+            return
+        self._index = faiss.read_index(self._mapped_path)
+        self._base = faiss.downcast_index(self._index.index)
+        self._mapped_path = None
+
+    def _insert(self, memories: List[MemoryEntry], vectors: "np.ndarray") -> None:
+        self._make_writable()
+        labels = [memory_label(m) for m in memories]
+        self._index.add_with_ids(vectors, np.asarray(labels, dtype="int64"))
+        for label, memory in zip(labels, memories):
+            self._labels[label] = memory
+
+    def add(self, memories: Iterable[MemoryEntry]) -> None:
+        """Insert ``memories`` into the existing index."""
+        new = list(memories)
+        if self._index is None or not new:
+            return
+        self._insert(new, self._vectors(new))
+
+    def remove(self, memories: Iterable[MemoryEntry]) -> bool:
+        """Delete ``memories`` from the index.
+
+        Returns ``False`` when the index type cannot delete in place (HNSW),
+        in which case the caller should rebuild.
+        """
+        if self._index is None:
+            return True
+        if self.kind == "hnsw":
+            return False
+        labels = [memory_label(m) for m in memories]
+        labels = [label for label in labels if label in self._labels]
+        if labels:
+            self._make_writable()
+            self._index.remove_ids(np.asarray(labels, dtype="int64"))
+            for label in labels:
+                del self._labels[label]
+        return True
+
+    def query(self, vector: List[float], top_k: int = 5) -> List[MemoryEntry]:
+        """Return up to ``top_k`` nearest memories to ``vector``, best first."""
+        return self.query_many([vector], top_k)[0]
+
+    def query_many(self, vectors, top_k: int = 5) -> List[List[MemoryEntry]]:
+        """Return :meth:`query` results for every row of ``vectors`` from one search."""
+        vecs = np.asarray(vectors, dtype="float32") if np is not None else vectors
+        if self._index is None or not self._labels:
+            return [[] for _ in vecs]
+        if self.normalized:
+            norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+            vecs = vecs / np.where(norms == 0, 1, norms)
+        _, labels = self._index.search(
+            np.ascontiguousarray(vecs, dtype="float32"), min(top_k, len(self._labels))
+        )
+        return [[self._labels[int(i)] for i in row if int(i) in self._labels] for row in labels]
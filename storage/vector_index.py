@@ -0,0 +1,247 @@
+"""Built-in vector indexes used when FAISS is not installed.
+
+Both classes mirror the :class:`~storage.faiss_index.FaissIndex` interface
+(``index_type``, ``available``, ``add``, ``remove``, ``query``,
+``query_many``, ``needs_rebuild``) and rank by cosine similarity on L2-normalized
+``float32`` vectors.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import random
+from typing import Dict, Iterable, List
+
+try:  # pragma: no cover - optional dependency
+    import numpy as np
+except Exception:  # pragma: no cover - numpy may not be installed
+    np = None
+
+from core.memory_entry import MemoryEntry
+from encoding.encoder import is_dense
+from storage.faiss_index import memory_label
+
+
+def _normalize(vectors: "np.ndarray") -> "np.ndarray":
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class _MatrixIndex:
+    """Shared storage: a growable normalized matrix plus label bookkeeping."""
+
+    needs_rebuild = False
+
+    def __init__(self, memories: Iterable[MemoryEntry], **_: object) -> None:
+        self._matrix = None
+        self._memories: List[MemoryEntry] = []
+        self._rows: Dict[int, int] = {}
+        self.dim = 0
+        memories = list(memories)
+        if np is None or not memories or not is_dense(memories[0].embedding):
+            return
+        self.dim = len(memories[0].embedding)
+        self._matrix = np.zeros((max(len(memories), 16), self.dim), dtype=np.float32)
+        self.add(memories)
+
+    @property
+    def available(self) -> bool:
+        return self._matrix is not None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _append_rows(self, memories: List[MemoryEntry]) -> List[int]:
+        vectors = _normalize(np.asarray([m.embedding for m in memories], dtype=np.float32))
+        start = len(self._memories)
+        end = start + len(memories)
+        if end > self._matrix.shape[0]:
+            grown = np.zeros((max(end, 2 * self._matrix.shape[0]), self.dim), dtype=np.float32)
+            grown[:start] = self._matrix[:start]
+            self._matrix = grown
+        self._matrix[start:end] = vectors
+        for i, memory in enumerate(memories):
+            self._rows[memory_label(memory)] = start + i
+            self._memories.append(memory)
+        return list(range(start, end))
+
+    def _query_vector(self, vector) -> "np.ndarray":
+        return _normalize(np.asarray(vector, dtype=np.float32))
+
+
+class FlatIndex(_MatrixIndex):
+    """Exact search with one matrix-vector product per query."""
+
+    index_type = "flat"
+
+    def add(self, memories: Iterable[MemoryEntry]) -> None:
+        new = list(memories)
+        if self._matrix is None or not new:
+            return
+        self._append_rows(new)
+
+    def remove(self, memories: Iterable[MemoryEntry]) -> bool:
+        for memory in memories:
+            row = self._rows.pop(memory_label(memory), None)
+            if row is None:
+                continue
+            last = len(self._memories) - 1
+            if row != last:
+                # Move the last row into the gap so the live rows stay packed
+                moved = self._memories[last]
+                self._matrix[row] = self._matrix[last]
+                self._memories[row] = moved
+                self._rows[memory_label(moved)] = row
+            self._memories.pop()
+        return True
+
+    def query(self, vector: List[float], top_k: int = 5) -> List[MemoryEntry]:
+        return self.query_many([vector], top_k)[0]
+
+    def query_many(self, vectors, top_k: int = 5) -> List[List[MemoryEntry]]:
+        """Rank every row of ``vectors`` with one matrix-matrix product."""
+        n = len(self._memories)
+        if self._matrix is None or not n:
+            return [[] for _ in vectors]
+        scores = self._query_vector(vectors) @ self._matrix[:n].T
+        k = min(top_k, n)
+        results = []
+        for row in scores:
+            idx = np.argpartition(-row, k - 1)[:k]
+            idx = idx[np.argsort(-row[idx], kind="stable")]
+            results.append([self._memories[i] for i in idx])
+        return results
+
+
+class HNSWIndex(_MatrixIndex):
+    """Hierarchical navigable small-world graph for approximate search.
+
+    Each node links to up to ``hnsw_m`` neighbours per layer (twice that on
+    the bottom layer). Inserts search with ``ef_construction`` candidates and
+    queries with ``ef_search``. Removed memories stay in the graph as
+    tombstones so it remains navigable; ``needs_rebuild`` turns ``True`` once
+    they outnumber live nodes.
+    """
+
+    index_type = "hnsw"
+
+    def __init__(
+        self,
+        memories: Iterable[MemoryEntry],
+        *,
+        hnsw_m: int = 16,
+        ef_construction: int = 40,
+        ef_search: int = 64,
+        seed: int = 0,
+        **_: object,
+    ) -> None:
+        self.m = hnsw_m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self._level_mult = 1 / math.log(max(hnsw_m, 2))
+        self._rng = random.Random(seed)
+        self._links: List[List[List[int]]] = []  # node -> layer -> neighbours
+        self._deleted: set[int] = set()
+        self._entry: int | None = None
+        self._max_level = -1
+        super().__init__(memories)
+
+    @property
+    def needs_rebuild(self) -> bool:
+        return len(self._deleted) > len(self._rows)
+
+    def add(self, memories: Iterable[MemoryEntry]) -> None:
+        new = list(memories)
+        if self._matrix is None or not new:
+            return
+        for node in self._append_rows(new):
+            self._insert(node)
+
+    def remove(self, memories: Iterable[MemoryEntry]) -> bool:
+        for memory in memories:
+            node = self._rows.pop(memory_label(memory), None)
+            if node is not None:
+                self._deleted.add(node)
+        return True
+
+    def query(self, vector: List[float], top_k: int = 5) -> List[MemoryEntry]:
+        if self._matrix is None or self._entry is None or not self._rows:
+            return []
+        q = self._query_vector(vector)
+        entry = self._entry
+        for level in range(self._max_level, 0, -1):
+            entry = self._search_layer(q, [entry], 1, level)[0][1]
+        ef = max(self.ef_search, top_k + len(self._deleted))
+        found = self._search_layer(q, [entry], ef, 0)
+        live = [node for _, node in found if node not in self._deleted]
+        return [self._memories[node] for node in live[:top_k]]
+
+    def query_many(self, vectors, top_k: int = 5) -> List[List[MemoryEntry]]:
+        return [self.query(vector, top_k) for vector in vectors]
+
+    # --- Graph construction ---
+    def _similarity(self, q: "np.ndarray", nodes: List[int]) -> "np.ndarray":
+        return self._matrix[nodes] @ q
+
+    def _search_layer(
+        self, q: "np.ndarray", entries: List[int], ef: int, level: int
+    ) -> List[tuple[float, int]]:
+        """Return up to ``ef`` ``(similarity, node)`` pairs, best first."""
+        visited = set(entries)
+        sims = self._similarity(q, entries)
+        candidates = [(-float(s), n) for s, n in zip(sims, entries)]  # max-heap
+        heapq.heapify(candidates)
+        best = [(float(s), n) for s, n in zip(sims, entries)]  # min-heap of results
+        heapq.heapify(best)
+        while len(best) > ef:
+            heapq.heappop(best)
+        while candidates:
+            neg_sim, node = heapq.heappop(candidates)
+            if -neg_sim < best[0][0] and len(best) >= ef:
+                break
+            fresh = [n for n in self._links[node][level] if n not in visited]
+            if not fresh:
+                continue
+            visited.update(fresh)
+            for sim, n in zip(self._similarity(q, fresh), fresh):
+                sim = float(sim)
+                if len(best) < ef or sim > best[0][0]:
+                    heapq.heappush(candidates, (-sim, n))
+                    heapq.heappush(best, (sim, n))
+                    if len(best) > ef:
+                        heapq.heappop(best)
+        return sorted(best, reverse=True)
+
+    def _insert(self, node: int) -> None:
+        level = int(-math.log(1 - self._rng.random()) * self._level_mult)
+        self._links.append([[] for _ in range(level + 1)])
+        if self._entry is None:
+            self._entry, self._max_level = node, level
+            return
+        q = self._matrix[node]
+        entry = self._entry
+        for lvl in range(self._max_level, level, -1):
+            entry = self._search_layer(q, [entry], 1, lvl)[0][1]
+        entries = [entry]
+        for lvl in range(min(level, self._max_level), -1, -1):
+            found = self._search_layer(q, entries, self.ef_construction, lvl)
+            cap = self.m * 2 if lvl == 0 else self.m
+            neighbours = [n for _, n in found[: self.m]]
+            self._links[node][lvl] = neighbours
+            for n in neighbours:
+                links = self._links[n][lvl]
+                links.append(node)
+                if len(links) > cap:
+                    sims = self._similarity(self._matrix[n], links)
+                    keep = np.argsort(-sims, kind="stable")[:cap]
+                    self._links[n][lvl] = [links[i] for i in keep]
+            entries = [n for _, n in found]
+        if level > self._max_level:
+            self._entry, self._max_level = node, level
+
+
+INDEX_CLASSES = {"flat": FlatIndex, "hnsw": HNSWIndex}
+
+
+__all__ = ["FlatIndex", "HNSWIndex", "INDEX_CLASSES"]
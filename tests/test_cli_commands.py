@@ -221,8 +221,8 @@ def test_import_conversation(tmp_path, capsys, monkeypatch):
 
     monkeypatch.setattr(
         memory_cli.memory_constructor,
-        "analyze_emotions",
-        lambda text: [("neutral", 1.0)],
+        "analyze_emotions_batch",
+        lambda texts: [[("neutral", 1.0)] for _ in texts],
     )
 
     agent = str(tmp_path / "agent")
@@ -237,6 +237,24 @@ def test_import_conversation(tmp_path, capsys, monkeypatch):
     db.close()
 
 
+def test_import_conversation_commits_write_behind(tmp_path, monkeypatch):
+    conv_file = tmp_path / "conv.txt"
+    conv_file.write_text("Alice: Hello\nBob: Hi")
+    monkeypatch.setattr(
+        memory_cli.memory_constructor,
+        "analyze_emotions_batch",
+        lambda texts: [[("neutral", 1.0)] for _ in texts],
+    )
+    cfg = {"storage": {"write_behind": True, "flush_interval": 60}}
+    monkeypatch.setattr("core.memory_manager._load_config", lambda: cfg)
+
+    agent = str(tmp_path / "agent")
+    memory_cli.import_conversation(str(conv_file), agent)
+    db = Database(f"{agent}.db")
+    assert len(db.load_all()) == 2
+    db.close()
+
+
 def test_import_biography(tmp_path, capsys, monkeypatch):
     bio_file = tmp_path / "bio.txt"
     bio_file.write_text(
@@ -245,8 +263,8 @@ def test_import_biography(tmp_path, capsys, monkeypatch):
 
     monkeypatch.setattr(
         memory_cli.memory_constructor,
-        "analyze_emotions",
-        lambda text: [("neutral", 1.0)],
+        "analyze_emotions_batch",
+        lambda texts: [[("neutral", 1.0)] for _ in texts],
     )
 
     agent = str(tmp_path / "agent_bio")
@@ -271,7 +289,7 @@ def test_import_conversation_calls_constructor(tmp_path, monkeypatch, capsys):
 
     called = {}
 
-    def fake_ingest(text, manager):
+    def fake_ingest(text, manager, workers=None):
         called["text"] = text
         called["path"] = str(manager.db.path)
         return [object()]
@@ -292,7 +310,7 @@ def test_import_biography_calls_constructor(tmp_path, monkeypatch, capsys):
 
     called = {}
 
-    def fake_bio(text, manager):
+    def fake_bio(text, manager, workers=None):
         called["text"] = text
         called["path"] = str(manager.db.path)
         return [object()], [object()], [object()]
@@ -1,6 +1,9 @@
 import sys
+from datetime import datetime
 from pathlib import Path
 
+import pytest
+
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
 from storage.db_interface import Database
@@ -66,3 +69,322 @@ def test_manager_loads_semantic_and_procedural(tmp_path):
 
     assert "sky is blue" in sem_contents
     assert "breathing" in proc_contents
+
+
+def test_dense_embeddings_stored_as_blobs(tmp_path):
+    db = Database(tmp_path / "mem.db")
+    entry = MemoryEntry(content="vec", embedding=[0.5, -1.25, 2.0], emotions=[])
+    db.save(entry)
+    blob, dim, text = db.conn.execute(
+        "SELECT embedding_blob, embedding_dim, embedding FROM memories"
+    ).fetchone()
+    assert len(blob) == 12 and dim == 3 and text is None
+    assert list(db.load_all()[0].embedding) == [0.5, -1.25, 2.0]
+    db.close()
+
+
+def test_float16_embedding_storage(tmp_path):
+    db = Database(tmp_path / "mem.db", embedding_dtype="float16")
+    db.save(MemoryEntry(content="vec", embedding=[0.5, 1.0], emotions=[]))
+    blob = db.conn.execute("SELECT embedding_blob FROM memories").fetchone()[0]
+    assert len(blob) == 4
+    assert [float(x) for x in db.load_all()[0].embedding] == [0.5, 1.0]
+    db.close()
+
+
+def test_legacy_json_embeddings_migrated(tmp_path):
+    import json
+    import sqlite3
+
+    path = tmp_path / "legacy.db"
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE memories (content TEXT, timestamp REAL, embedding TEXT, emotions TEXT, emotion_scores TEXT, metadata TEXT)"
+    )
+    conn.execute(
+        "INSERT INTO memories VALUES (?, ?, ?, ?, ?, ?)",
+        ("old", 0.0, json.dumps([0.25, 0.75]), "", "{}", "{}"),
+    )
+    conn.execute(
+        "INSERT INTO memories VALUES (?, ?, ?, ?, ?, ?)",
+        ("tokens", 1.0, json.dumps(["a", "b"]), "", "{}", "{}"),
+    )
+    conn.commit()
+    conn.close()
+
+    db = Database(path)
+    assert db.conn.execute("PRAGMA user_version").fetchone()[0] >= 1
+    loaded = {m.content: m for m in db.load_all()}
+    assert list(loaded["old"].embedding) == [0.25, 0.75]
+    assert loaded["tokens"].embedding == ["a", "b"]
+    assert db.conn.execute(
+        "SELECT embedding FROM memories WHERE content='old'"
+    ).fetchone()[0] is None
+    db.close()
+
+
+def test_delete_and_update_keyed_by_id(tmp_path):
+    db = Database(tmp_path / "mem.db")
+    ts = datetime(2024, 1, 1)
+    first = MemoryEntry(content="a", embedding=[], timestamp=ts)
+    second = MemoryEntry(content="b", embedding=[], timestamp=ts)
+    db.save(first)
+    db.save(second)
+    assert first.id != second.id
+
+    second.content = "b2"
+    db.update(second.id, second)
+    db.delete(first.id)
+    loaded = db.load_all()
+    assert [(m.id, m.content) for m in loaded] == [(second.id, "b2")]
+    indexes = {row[1] for row in db.conn.execute("PRAGMA index_list(memories)")}
+    assert "idx_memories_timestamp" in indexes
+    db.close()
+
+
+def test_legacy_rows_receive_ids(tmp_path):
+    import sqlite3
+
+    path = tmp_path / "legacy.db"
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE memories (content TEXT, timestamp REAL, embedding TEXT, emotions TEXT, emotion_scores TEXT, metadata TEXT)"
+    )
+    conn.executemany(
+        "INSERT INTO memories VALUES (?, ?, '[]', '', '{}', '{}')",
+        [("x", 0.0), ("y", 0.0)],
+    )
+    conn.commit()
+    conn.close()
+
+    db = Database(path)
+    loaded = db.load_all()
+    assert len({m.id for m in loaded}) == 2
+    db.delete(loaded[0].id)
+    assert [m.content for m in db.load_all()] == [loaded[1].content]
+    db.close()
+
+
+def test_bulk_save_inserts_all(tmp_path):
+    db = Database(tmp_path / "mem.db")
+    entries = [MemoryEntry(content=f"m{i}", embedding=[]) for i in range(5)]
+    db.bulk_save(entries)
+    db.bulk_save_semantic(entries[:2])
+    assert [m.content for m in db.load_all()] == [f"m{i}" for i in range(5)]
+    assert len(db.load_all_semantic()) == 2
+    db.close()
+
+
+def test_write_behind_queues_until_flush(tmp_path):
+    import sqlite3
+
+    path = tmp_path / "mem.db"
+    db = Database(path, write_behind=True, flush_interval=60)
+    entry = MemoryEntry(content="queued", embedding=[])
+    db.save(entry)
+    other = sqlite3.connect(path)
+    assert other.execute("SELECT COUNT(*) FROM memories").fetchone()[0] == 0
+    db.flush()
+    assert other.execute("SELECT COUNT(*) FROM memories").fetchone()[0] == 1
+    db.delete(entry.id)
+    # reads see queued writes
+    assert db.load_all() == []
+    other.close()
+    db.close()
+
+
+def test_transaction_groups_commits(tmp_path):
+    import sqlite3
+
+    path = tmp_path / "mem.db"
+    db = Database(path)
+    other = sqlite3.connect(path)
+    with db.transaction():
+        db.save(MemoryEntry(content="a", embedding=[]))
+        db.save_semantic(MemoryEntry(content="b", embedding=[]))
+        assert other.execute("SELECT COUNT(*) FROM memories").fetchone()[0] == 0
+    assert other.execute("SELECT COUNT(*) FROM memories").fetchone()[0] == 1
+    other.close()
+    db.close()
+
+
+def test_transaction_rolls_back_on_error(tmp_path):
+    import threading
+
+    db = Database(tmp_path / "mem.db")
+    db.save(MemoryEntry(content="kept", embedding=[]))
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            db.save(MemoryEntry(content="lost", embedding=[]))
+            # another thread reads committed rows and its write waits for the block
+            seen = []
+            writer = threading.Thread(
+                target=lambda: (
+                    seen.append([m.content for m in db.load_all()]),
+                    db.save(MemoryEntry(content="later", embedding=[])),
+                )
+            )
+            writer.start()
+            writer.join(timeout=0.2)
+            assert seen == [["kept"]]
+            assert writer.is_alive()
+            raise RuntimeError("boom")
+    writer.join()
+    assert [m.content for m in db.load_all()] == ["kept", "later"]
+
+    wb = Database(tmp_path / "wb.db", write_behind=True, flush_interval=60)
+    wb.save(MemoryEntry(content="queued", embedding=[]))
+    with pytest.raises(RuntimeError):
+        with wb.transaction():
+            wb.save(MemoryEntry(content="lost", embedding=[]))
+            raise RuntimeError("boom")
+    assert [m.content for m in wb.load_all()] == ["queued"]
+    db.close()
+    wb.close()
+
+
+def test_write_behind_transaction_commits_on_exit(tmp_path):
+    import sqlite3
+
+    path = tmp_path / "mem.db"
+    db = Database(path, write_behind=True, flush_interval=60)
+    other = sqlite3.connect(path)
+    with db.transaction():
+        db.save(MemoryEntry(content="a", embedding=[]))
+        db.save(MemoryEntry(content="b", embedding=[]))
+    assert db._pending == []
+    assert other.execute("SELECT COUNT(*) FROM memories").fetchone()[0] == 2
+    other.close()
+    db.close()
+
+
+def test_write_behind_flushes_at_exit(tmp_path):
+    import sqlite3
+    import subprocess
+
+    path = tmp_path / "mem.db"
+    root = Path(__file__).resolve().parents[1]
+    script = (
+        "from storage.db_interface import Database\n"
+        "from core.memory_entry import MemoryEntry\n"
+        f"db = Database({str(path)!r}, write_behind=True, flush_interval=60)\n"
+        "db.save(MemoryEntry(content='unclosed', embedding=[]))\n"
+    )
+    subprocess.run([sys.executable, "-c", script], cwd=root, check=True, timeout=60)
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT content FROM memories").fetchall() == [("unclosed",)]
+    conn.close()
+
+
+def test_failed_flush_keeps_queued_writes(tmp_path):
+    db = Database(tmp_path / "mem.db", write_behind=True, flush_interval=60)
+    db.save(MemoryEntry(content="a", embedding=[]))
+    db._pending.append(("INSERT INTO missing VALUES (?)", (1,), False))
+    db.save(MemoryEntry(content="b", embedding=[]))
+    with pytest.raises(Exception):
+        db.flush()
+    assert len(db._pending) == 3
+    db._background_flush()
+    assert len(db._pending) == 3
+    del db._pending[1]
+    assert [m.content for m in db.load_all()] == ["a", "b"]
+    db.close()
+
+
+def test_wal_mode_and_pooled_readers(tmp_path):
+    import threading
+
+    db = Database(tmp_path / "mem.db", pragmas={"synchronous": "full"}, max_readers=2)
+    assert db.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert db.conn.execute("PRAGMA synchronous").fetchone()[0] == 2
+    db.save(MemoryEntry(content="a", embedding=[]))
+
+    seen = []
+
+    def read():
+        seen.append(len(db.load_all()))
+
+    # short-lived threads reuse pooled connections instead of opening their own
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert seen == [1] * 8
+    assert 1 <= len(db._readers) <= 2
+    with db._reader() as first, db._reader() as second:
+        assert first is not second
+    db.close()
+
+
+def test_in_memory_database_reads_through_writer():
+    db = Database(":memory:")
+    db.save(MemoryEntry(content="a", embedding=[]))
+    assert [m.content for m in db.load_all()] == ["a"]
+    db.close()
+
+
+def test_unknown_pragma_rejected(tmp_path):
+    import pytest
+
+    with pytest.raises(ValueError):
+        Database(tmp_path / "mem.db", pragmas={"foreign_keys; DROP": "on"})
+
+
+def test_iter_all_pages_through_rows(tmp_path):
+    db = Database(tmp_path / "mem.db")
+    db.bulk_save([MemoryEntry(content=str(i), embedding=[]) for i in range(5)])
+    assert [m.content for m in db.iter_all(page_size=2)] == [str(i) for i in range(5)]
+    assert [m.content for m in db.load_recent(2)] == ["3", "4"]
+    db.close()
+
+
+def test_iter_memories_orders_out_of_order_rows(tmp_path):
+    from datetime import timedelta
+
+    path = tmp_path / "mem.db"
+    base = datetime(2024, 1, 1)
+    db = Database(path)
+    # inserted newest first, with the tie broken by insertion order
+    for i, minutes in enumerate([5, 1, 3, 3]):
+        db.save(MemoryEntry(content=f"e{i}", embedding=[], timestamp=base + timedelta(minutes=minutes)))
+    for i, minutes in enumerate([4, 0]):
+        db.save_semantic(MemoryEntry(content=f"s{i}", embedding=[], timestamp=base + timedelta(minutes=minutes)))
+    assert [m.content for m in db.iter_all(page_size=2, by_time=True)] == ["e1", "e2", "e3", "e0"]
+    db.close()
+
+    expected = ["s1", "e1", "e2", "e3", "s0", "e0"]
+    lazy = MemoryManager(db_path=path, lazy=True)
+    assert [m.content for _, m in lazy.iter_memories(page_size=2)] == expected
+    lazy.db.close()
+    hydrated = MemoryManager(db_path=path)
+    assert [m.content for _, m in hydrated.iter_memories()] == expected
+    hydrated.db.close()
+
+
+def test_lazy_manager_defers_hydration(tmp_path):
+    path = tmp_path / "mem.db"
+    mgr1 = MemoryManager(db_path=path)
+    mgr1.add_many([f"event {i}" for i in range(15)])
+    mgr1.add_semantic("a fact")
+    mgr1.db.close()
+
+    mgr2 = MemoryManager(db_path=path, lazy=True)
+    assert len(mgr2.episodic) == 0
+    assert [m.content for m in mgr2.working.contents()] == [f"event {i}" for i in range(5, 15)]
+    new = mgr2.add("event new")
+    assert mgr2._retriever is None
+    assert mgr2.working.contents()[-1] is new
+
+    # browsing pages from the database without hydrating
+    assert mgr2.count() == 17
+    listed = list(mgr2.iter_memories(page_size=4))
+    assert [kind for kind, _ in listed].count("semantic") == 1
+    assert listed[-1][1].content == "event new"
+    assert mgr2._retriever is None and len(mgr2.episodic) == 1
+
+    assert mgr2.retriever.query("fact", top_k=1)[0].content == "a fact"
+    contents = [m.content for m in mgr2.all()]
+    assert contents == [f"event {i}" for i in range(15)] + ["event new"]
+    assert mgr2.all()[-1] is new
+    mgr2.db.close()
@@ -0,0 +1,128 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+np = pytest.importorskip("numpy")
+
+from core.embedding_store import EmbeddingStore
+from core.memory_entry import MemoryEntry
+from core.memory_types.semantic import SemanticMemory
+
+
+def test_entries_are_slotted():
+    entry = MemoryEntry(content="x", embedding=[])
+    assert not hasattr(entry, "__dict__")
+
+
+def test_assign_packs_vectors_into_shared_chunks():
+    store = EmbeddingStore(chunk_rows=2)
+    entries = [MemoryEntry(content=str(i), embedding=[float(i), 1.0]) for i in range(5)]
+    for entry in entries:
+        store.assign(entry)
+    assert len(store._chunks) == 3
+    assert entries[0].embedding.base is entries[1].embedding.base
+    # earlier views survive chunk growth
+    assert [float(e.embedding[0]) for e in entries] == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+
+def test_release_detaches_and_reuses_row():
+    store = EmbeddingStore()
+    a = MemoryEntry(content="a", embedding=[1.0, 2.0])
+    b = MemoryEntry(content="b", embedding=[3.0, 4.0])
+    store.assign(a)
+    store.release(a)
+    store.assign(b)
+    assert len(store) == 1
+    assert a.embedding.tolist() == [1.0, 2.0]
+    assert b.embedding.tolist() == [3.0, 4.0]
+
+
+def test_tokens_and_other_dims_left_alone():
+    store = EmbeddingStore()
+    store.assign(MemoryEntry(content="a", embedding=[1.0, 2.0]))
+    tokens = MemoryEntry(content="t", embedding=["t"])
+    odd = MemoryEntry(content="o", embedding=[1.0, 2.0, 3.0])
+    store.assign(tokens)
+    store.assign(odd)
+    assert tokens.embedding == ["t"]
+    assert odd.embedding.tolist() == [1.0, 2.0, 3.0]
+    assert len(store) == 1
+
+
+def test_memory_store_assigns_embeddings():
+    mem = SemanticMemory()
+    entry = mem.add("fact", embedding=[0.5, 0.25])
+    assert entry.embedding.dtype == np.float32
+    assert len(mem.embeddings) == 1
+
+
+def test_dot_reads_rows_from_chunks():
+    store = EmbeddingStore(chunk_rows=2)
+    entries = [MemoryEntry(content=str(i), embedding=[float(i), 1.0]) for i in range(5)]
+    for entry in entries:
+        store.assign(entry, bind=False)
+    assert isinstance(entries[0].embedding, list)
+    rows = [store.row(e.id) for e in entries[::-1]]
+    q = np.array([[1.0, 0.0], [0.0, 2.0]], dtype=np.float32)
+    assert store.dot(q, rows).tolist() == [[4.0, 3.0, 2.0, 1.0, 0.0], [2.0] * 5]
+
+
+def test_retriever_scores_through_shared_store():
+    from unittest.mock import patch
+
+    from core.memory_manager import MemoryManager
+
+    with patch("core.memory_types.base.encode_texts", side_effect=lambda t: [[1.0, 0.0]] * len(t)):
+        manager = MemoryManager(db_path=":memory:")
+        manager.add_many(["a", "b"])
+        manager.add_semantic("fact", embedding=[0.0, 1.0])
+    retriever = manager.retriever
+    assert retriever._embeddings is manager.embeddings
+    assert manager.semantic.embeddings is manager.episodic.embeddings
+    # rows are read from the manager's store rather than copied
+    assert not retriever._own_rows
+    assert len(manager.embeddings) == 3
+    with patch("retrieval.retriever.encode_text", return_value=[0.0, 1.0]):
+        assert retriever.query("q", top_k=1)[0].content == "fact"
+    manager.db.close()
+
+
+def test_standalone_retriever_copies_and_releases_rows():
+    from retrieval.retriever import Retriever
+
+    mems = [MemoryEntry(content=str(i), embedding=[float(i), 1.0]) for i in range(3)]
+    retriever = Retriever(mems)
+    assert len(retriever._embeddings) == 3
+    assert isinstance(mems[0].embedding, list)
+    retriever.remove(mems[0])
+    assert len(retriever._embeddings) == 2
+
+
+def test_concurrent_assign_and_release_keep_rows_distinct():
+    import threading
+
+    store = EmbeddingStore(chunk_rows=8)
+    batches = [
+        [MemoryEntry(content=f"{t}-{i}", embedding=[float(t), float(i)]) for i in range(200)]
+        for t in range(4)
+    ]
+
+    def churn(entries):
+        for entry in entries:
+            store.assign(entry)
+        for entry in entries[::2]:
+            store.release(entry)
+
+    threads = [threading.Thread(target=churn, args=(b,)) for b in batches]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    kept = [e for b in batches for e in b[1::2]]
+    assert len(store) == len(kept)
+    assert len({store.row(e.id) for e in kept}) == len(kept)
+    for entry in kept:
+        assert entry.embedding.tolist() == [float(x) for x in entry.content.split("-")]
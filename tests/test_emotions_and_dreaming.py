@@ -42,3 +42,42 @@ def test_dream_engine_summarize(tmp_path):
 
     reloaded = MemoryManager(db_path=tmp_path / "mem.db")
     assert any(m.content == summary for m in reloaded.semantic.all())
+
+
+def test_analyze_emotions_batch_single_pipeline_call():
+    fake_clf = MagicMock(
+        return_value=[
+            [{"label": "joy", "score": 0.9}, {"label": "sadness", "score": 0.1}],
+            [{"label": "sadness", "score": 0.7}, {"label": "joy", "score": 0.3}],
+        ]
+    )
+    with patch.object(emotion_model, "_load_classifier", return_value=fake_clf):
+        result = emotion_model.analyze_emotions_batch(["yay", "oh no"], batch_size=8)
+    assert [r[0][0] for r in result] == ["happy", "sad"]
+    fake_clf.assert_called_once_with(["yay", "oh no"], batch_size=8, truncation=True, padding=True)
+    assert emotion_model.analyze_emotions_batch([]) == []
+
+
+def test_analyze_emotions_caches_by_text():
+    fake_clf = MagicMock(return_value=[[{"label": "fear", "score": 0.8}]])
+    emotion_model.clear_cache()
+    with patch.object(emotion_model, "_load_classifier", return_value=fake_clf):
+        first = emotion_model.analyze_emotions("a dark and stormy night")
+        again = emotion_model.analyze_emotions("a dark and stormy night")
+        batch = emotion_model.analyze_emotions_batch(["a dark and stormy night"])
+    assert first == again == batch[0] == [("fear", 0.8)]
+    assert fake_clf.call_count == 1
+    assert emotion_model.cache_stats()["hits"] == 2
+
+
+def test_lexicon_backend():
+    emotion_model.set_backend("lexicon")
+    try:
+        with patch.object(emotion_model, "_load_classifier", side_effect=AssertionError):
+            assert emotion_model.analyze_emotions("I am so happy and excited!")[0] == ("happy", 1.0)
+            assert emotion_model.analyze_emotions("I am not happy, just scared")[0][0] == "fear"
+            assert emotion_model.analyze_emotions("the meeting is at noon") == [("neutral", 1.0)]
+            labels = [r[0][0] for r in emotion_model.analyze_emotions_batch(["I love you", "gross"])]
+            assert labels == ["love", "disgust"]
+    finally:
+        emotion_model.set_backend("transformer")
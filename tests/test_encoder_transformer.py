@@ -2,6 +2,8 @@ import sys
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
+import pytest
+
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
 from encoding import encoder
@@ -10,7 +12,115 @@ from encoding import encoder
 def test_encode_text_with_transformer():
     fake_model = MagicMock()
     fake_model.encode.return_value = [0.1, 0.2, 0.3]
+    encoder.clear_cache()
     with patch.object(encoder, "_load_model", return_value=fake_model):
         result = encoder.encode_text("hello world")
-        assert result == [0.1, 0.2, 0.3]
+        # cached and returned as float32
+        assert result == pytest.approx([0.1, 0.2, 0.3])
         fake_model.encode.assert_called_once_with("hello world")
+
+
+def test_encode_texts_batches_model_calls():
+    np = pytest.importorskip("numpy")
+    fake_model = MagicMock()
+    fake_model.encode.side_effect = lambda texts, batch_size: np.ones((len(texts), 3))
+    encoder.clear_cache()
+    with patch.object(encoder, "_load_model", return_value=fake_model):
+        result = encoder.encode_texts(["a", "b", "c"], batch_size=2)
+    assert result.shape == (3, 3)
+    assert result.dtype == np.float32
+    assert fake_model.encode.call_count == 2
+    assert fake_model.encode.call_args_list[0][0][0] == ["a", "b"]
+
+
+def test_encode_texts_token_fallback():
+    with patch.object(encoder, "_load_model", return_value=None):
+        assert encoder.encode_texts(["Hello world", "Bye"]) == [["hello", "world"], ["bye"]]
+
+
+def test_encode_text_cache_hits_and_invalidation():
+    fake_model = MagicMock()
+    fake_model.encode.return_value = [0.1, 0.2]
+    encoder.clear_cache()
+    with patch.object(encoder, "_load_model", return_value=fake_model):
+        first = encoder.encode_text("same")
+        assert first == pytest.approx([0.1, 0.2])
+        assert encoder.encode_text("same") == first
+        assert fake_model.encode.call_count == 1
+        assert encoder.cache_stats()["hits"] == 1
+        assert encoder.cache_stats()["misses"] == 1
+
+        name = encoder._model_name
+        encoder.set_model_name("other-model")
+        try:
+            assert encoder.cache_stats()["size"] == 0
+            encoder.encode_text("same")
+            assert fake_model.encode.call_count == 2
+        finally:
+            encoder.set_model_name(name)
+
+
+def test_encode_text_persistent_cache(tmp_path):
+    fake_model = MagicMock()
+    fake_model.encode.return_value = [0.5, 0.25]
+    encoder.clear_cache()
+    encoder.set_cache_path(tmp_path / "emb.db")
+    try:
+        with patch.object(encoder, "_load_model", return_value=fake_model):
+            encoder.encode_text("persist me")
+            encoder.clear_cache()
+            assert encoder.encode_text("persist me") == [0.5, 0.25]
+        assert fake_model.encode.call_count == 1
+        assert encoder.cache_stats()["hits"] == 1
+    finally:
+        encoder.set_cache_path(None)
+        encoder.clear_cache()
+
+
+def test_encode_texts_persists_batch_with_one_commit(tmp_path):
+    np = pytest.importorskip("numpy")
+    fake_model = MagicMock()
+    fake_model.encode.side_effect = lambda texts, batch_size: np.ones((len(texts), 2))
+    encoder.clear_cache()
+    encoder.set_cache_path(tmp_path / "emb.db")
+    try:
+        conn = MagicMock(wraps=encoder._disk_conn)
+        with patch.object(encoder, "_load_model", return_value=fake_model), patch.object(
+            encoder, "_disk_conn", conn
+        ):
+            encoder.encode_texts(["a", "b", "c"])
+        assert conn.commit.call_count == 1
+        count = encoder._disk_conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        assert count == 3
+    finally:
+        encoder.set_cache_path(None)
+        encoder.clear_cache()
+
+
+def test_cache_holds_read_only_float32_and_reads_disk_unlocked(tmp_path):
+    np = pytest.importorskip("numpy")
+    fake_model = MagicMock()
+    fake_model.encode.return_value = [0.5, 0.25]
+    encoder.clear_cache()
+    encoder.set_cache_path(tmp_path / "emb.db")
+    try:
+        with patch.object(encoder, "_load_model", return_value=fake_model):
+            encoder.encode_text("frozen")
+            (vec,) = encoder._cache.values()
+            assert vec.dtype == np.float32 and not vec.flags.writeable
+            encoder.clear_cache()
+
+            real = encoder._disk_conn
+
+            def execute(*args):
+                assert not encoder._cache_lock.locked()
+                return real.execute(*args)
+
+            conn = MagicMock(execute=MagicMock(side_effect=execute))
+            with patch.object(encoder, "_disk_conn", conn):
+                assert encoder.encode_text("frozen") == [0.5, 0.25]
+        assert conn.execute.call_count == 1
+        assert fake_model.encode.call_count == 1
+    finally:
+        encoder.set_cache_path(None)
+        encoder.clear_cache()
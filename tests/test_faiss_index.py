@@ -1,38 +1,91 @@
+import pickle
 import sys
 from pathlib import Path
 from types import SimpleNamespace
 from unittest.mock import patch
 
+import pytest
+
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
+np = pytest.importorskip("numpy")
+
+from core.memory_entry import MemoryEntry
 from core.memory_manager import MemoryManager
 from retrieval.retriever import Retriever
 import storage.faiss_index as fi
 from encoding import encoder
 
 
-def test_retriever_with_faiss_index():
-    class FakeIndex:
-        def __init__(self, dim):
-            self.vectors = []
+class FakeFlat:
+    def __init__(self, dim, *args):
+        self.dim = dim
+        self.trained = False
+        self.hnsw = SimpleNamespace(efSearch=0)
+        self.nprobe = 0
+
+    def train(self, arr):
+        self.trained = True
+
+
+class FakeIDMap:
+    def __init__(self, base):
+        self.index = base
+        self.rows = {}
+
+    @property
+    def id_map(self):
+        return list(self.rows)
+
+    def add_with_ids(self, arr, ids):
+        for row, label in zip(arr, ids):
+            self.rows[int(label)] = np.asarray(row)
+
+    def remove_ids(self, ids):
+        for label in ids:
+            self.rows.pop(int(label), None)
+
+    def search(self, arr, k):
+        labels = list(self.rows)
+        dists, ids = [], []
+        for q in arr:
+            scores = [float(self.rows[label] @ q) for label in labels]
+            order = sorted(range(len(labels)), key=lambda i: -scores[i])[:k]
+            dists.append([scores[i] for i in order])
+            ids.append([labels[i] for i in order])
+        return np.array(dists), np.array(ids)
 
-        def add(self, arr):
-            for row in arr:
-                self.vectors.append(list(row))
 
-        def search(self, arr, k):
-            q = arr[0]
-            dists = [sum((v_i - q_i) ** 2 for v_i, q_i in zip(v, q)) for v in self.vectors]
-            idxs = sorted(range(len(dists)), key=dists.__getitem__)[:k]
-            return [[dists[i] for i in idxs]], [idxs]
+def fake_write_index(index, path):
+    with open(path, "wb") as fh:
+        pickle.dump(index, fh)
 
-    fake_faiss = SimpleNamespace(IndexFlatL2=FakeIndex)
 
-    class FakeNP:
-        @staticmethod
-        def array(data, dtype=None):
-            return [list(row) for row in data]
+def fake_read_index(path, flags=0):
+    fake_faiss.read_flags.append(flags)
+    with open(path, "rb") as fh:
+        return pickle.load(fh)
 
+
+fake_faiss = SimpleNamespace(
+    IndexFlatIP=FakeFlat,
+    IndexFlatL2=FakeFlat,
+    IndexIVFFlat=lambda quantizer, dim, nlist, metric: FakeFlat(dim),
+    IndexIVFPQ=lambda quantizer, dim, nlist, m, bits, metric: FakeFlat(dim),
+    IndexHNSWFlat=FakeFlat,
+    IndexIDMap2=FakeIDMap,
+    METRIC_INNER_PRODUCT=0,
+    IO_FLAG_MMAP=1,
+    IO_FLAG_MMAP_IFC=512,
+    write_index=fake_write_index,
+    read_index=fake_read_index,
+    read_flags=[],
+    vector_to_array=np.asarray,
+    downcast_index=lambda index: index,
+)
+
+
+def test_retriever_with_faiss_index():
     def fake_encode(text):
         mapping = {
             "the cat sat on the mat": [1.0, 0.0],
@@ -42,15 +95,133 @@ def test_retriever_with_faiss_index():
         return mapping[text]
 
     with patch.object(fi, "faiss", fake_faiss):
-        with patch.object(fi, "np", FakeNP):
-            with patch.object(encoder, "encode_text", side_effect=fake_encode):
-                with patch("core.memory_types.episodic.encode_text", side_effect=fake_encode):
-                    with patch("retrieval.retriever.encode_text", side_effect=fake_encode):
-                        manager = MemoryManager(db_path=":memory:")
-                        manager.add("the cat sat on the mat")
-                        manager.add("dogs are wonderful companions")
-
-                        retriever = Retriever(manager.all())
-                        results = retriever.query("cat", top_k=1)
-                        assert results
-                        assert results[0].content == "the cat sat on the mat"
+        with patch.object(encoder, "encode_text", side_effect=fake_encode):
+            with patch("core.memory_types.base.encode_text", side_effect=fake_encode):
+                with patch("retrieval.retriever.encode_text", side_effect=fake_encode):
+                    manager = MemoryManager(db_path=":memory:")
+                    manager.add("the cat sat on the mat")
+                    manager.add("dogs are wonderful companions")
+
+                    retriever = Retriever(manager.all(), index_options={"index_type": "hnsw"})
+                    assert retriever._index is not None
+                    results = retriever.query("cat", top_k=1)
+                    assert results
+                    assert results[0].content == "the cat sat on the mat"
+
+                    # an exact index would only repeat the matrix scan
+                    exact = Retriever(manager.all(), index_options={"index_type": "flat_ip"})
+                    assert exact.vector_index is None
+                    assert exact.query("cat", top_k=1)[0].content == "the cat sat on the mat"
+
+
+def _memories(n, dim=4):
+    rng = np.random.default_rng(0)
+    return [MemoryEntry(content=str(i), embedding=rng.standard_normal(dim).tolist()) for i in range(n)]
+
+
+def test_index_types_train_and_fall_back():
+    mems = _memories(20)
+    with patch.object(fi, "faiss", fake_faiss):
+        ivf = fi.FaissIndex(mems, index_type="ivf_flat", nlist=8, nprobe=3)
+        assert ivf.kind == "ivf_flat"
+        assert ivf._base.trained and ivf._base.nprobe == 3
+
+        hnsw = fi.FaissIndex(mems, index_type="hnsw", ef_search=99)
+        assert hnsw._base.hnsw.efSearch == 99
+        assert hnsw.remove(mems[:1]) is False
+
+        small = fi.FaissIndex(mems[:4], index_type="ivf_pq", nlist=8, pq_bits=2)
+        assert small.kind == "flat_ip"
+        small.add(mems[4:8])
+        assert small.needs_rebuild
+
+        with pytest.raises(ValueError):
+            fi.FaissIndex(mems, index_type="bogus")
+
+
+def test_index_incremental_add_and_remove():
+    mems = _memories(5)
+    with patch.object(fi, "faiss", fake_faiss):
+        index = fi.FaissIndex(mems[:3])
+        index.add(mems[3:])
+        assert index.query(mems[4].embedding, top_k=1) == [mems[4]]
+        batch = index.query_many([mems[1].embedding, mems[3].embedding], top_k=1)
+        assert batch == [[mems[1]], [mems[3]]]
+        assert index.remove([mems[4]])
+        assert mems[4] not in index.query(mems[4].embedding, top_k=5)
+        assert len(index) == 4
+
+
+def test_manager_persists_and_reloads_index(tmp_path):
+    path = tmp_path / "mem.db"
+    vecs = np.eye(4, dtype="float32")
+    cfg = {"retrieval": {"index_type": "hnsw"}}
+    with patch.object(fi, "faiss", fake_faiss), \
+            patch("core.memory_manager._load_config", return_value=cfg):
+        manager = MemoryManager(db_path=path)
+        manager.add_many([f"e{i}" for i in range(3)], embeddings=vecs[:3])
+        manager.close()
+        header = fi.FaissIndex.read_header(manager.index_path)
+        assert header["count"] == 3
+        assert header["watermark"]["memories"] == 3
+
+        # a row written by another process after the save
+        from storage.db_interface import Database
+
+        db = Database(path)
+        db.save(MemoryEntry(content="late", embedding=vecs[3].tolist()))
+        db.close()
+
+        fake_faiss.read_flags.clear()
+        with patch.object(fi.FaissIndex, "_create", side_effect=AssertionError("rebuilt")):
+            reloaded = MemoryManager(db_path=path)
+            index = reloaded.retriever.vector_index
+        # mapped read-only, then read into memory to append the late row
+        assert fake_faiss.read_flags == [fake_faiss.IO_FLAG_MMAP_IFC, 0]
+        assert index._mapped_path is None
+        assert len(index) == 4
+        assert index.query(vecs[3].tolist(), top_k=1)[0].content == "late"
+
+        # a lazy start reads the file up front and labels it on first use
+        fake_faiss.read_flags.clear()
+        lazy = MemoryManager(db_path=path, lazy=True)
+        assert fake_faiss.read_flags == [fake_faiss.IO_FLAG_MMAP_IFC]
+        assert lazy._retriever is None
+        with patch.object(fi.FaissIndex, "_create", side_effect=AssertionError("rebuilt")):
+            assert len(lazy.retriever.vector_index) == 4
+        lazy.db.close()
+
+        # deletes bump the generation, so the next start rebuilds
+        reloaded.delete(reloaded.all()[0])
+        generation = reloaded.db.generation()
+        reloaded.db.close()
+        assert fi.FaissIndex.read_header(reloaded.index_path)["generation"] != generation
+        rebuilt = MemoryManager(db_path=path)
+        assert len(rebuilt.retriever.vector_index) == 3
+        rebuilt.close()
+
+
+def test_load_maps_by_index_kind(tmp_path):
+    mems = _memories(20)
+    with patch.object(fi, "faiss", fake_faiss):
+        for kind, flag in (("ivf_flat", fake_faiss.IO_FLAG_MMAP), ("hnsw", fake_faiss.IO_FLAG_MMAP_IFC)):
+            path = tmp_path / f"{kind}.faiss"
+            fi.FaissIndex(mems[:10], index_type=kind, nlist=4).save(path)
+            fake_faiss.read_flags.clear()
+            index = fi.FaissIndex.load(path, mems, index_type=kind, nlist=4)
+            assert fake_faiss.read_flags == [flag]
+            assert index._mapped_path == str(path)
+            assert index.query(mems[2].embedding, top_k=1) == [mems[2]]
+            # the first write swaps the read-only map for an in-memory copy
+            index.add(mems[10:12])
+            assert fake_faiss.read_flags == [flag, 0]
+            assert index._mapped_path is None and len(index) == 12
+
+        # without IO_FLAG_MMAP_IFC flat indexes are read normally
+        old = SimpleNamespace(**{k: v for k, v in vars(fake_faiss).items() if k != "IO_FLAG_MMAP_IFC"})
+        with patch.object(fi, "faiss", old):
+            path = tmp_path / "flat.faiss"
+            fi.FaissIndex(mems).save(path)
+            fake_faiss.read_flags.clear()
+            assert fi.FaissIndex.load(path, mems)._mapped_path is None
+            assert fake_faiss.read_flags == [0]
@@ -0,0 +1,70 @@
+import sys
+from pathlib import Path
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from core.memory_entry import MemoryEntry
+import retrieval.retriever as retriever_mod
+from retrieval.retriever import Retriever
+
+
+def _retriever(dense):
+    now = datetime.utcnow()
+
+    def entry(content, hours, vec, **metadata):
+        return MemoryEntry(
+            content=content,
+            embedding=vec if dense else content.split(),
+            timestamp=now - timedelta(hours=hours),
+            metadata=metadata,
+        )
+
+    episodic = [
+        entry("user asks about cats", 1, [1.0, 0.0], role="user"),
+        entry("assistant answers about cats", 2, [0.9, 0.1], role="assistant", tags=["plan"]),
+        entry("user asked about cats long ago", 72, [1.0, 0.0], role="user"),
+    ]
+    semantic = [entry("cats are mammals", 5, [1.0, 0.0], tags=["plan"])]
+    procedural = [entry("feed the cats daily", 3, [0.8, 0.2], tags=["plan"])]
+    return Retriever(episodic, semantic=semantic, procedural=procedural)
+
+
+@pytest.mark.parametrize("dense", [True, False])
+def test_filters_cut_candidates(dense):
+    cue = [1.0, 0.0] if dense else ["cats"]
+    with patch.object(retriever_mod, "FaissIndex", None), \
+            patch.object(retriever_mod, "encode_text", return_value=cue):
+        retriever = _retriever(dense)
+        day_ago = datetime.utcnow() - timedelta(days=1)
+
+        results = retriever.query("cats", top_k=5, memory_type="procedural")
+        assert [m.content for m in results] == ["feed the cats daily"]
+
+        results = retriever.query("cats", top_k=5, role="user", since=day_ago)
+        assert [m.content for m in results] == ["user asks about cats"]
+
+        results = retriever.query("cats", top_k=5, require_tags=["plan"])
+        assert {m.content for m in results} == {
+            "assistant answers about cats",
+            "cats are mammals",
+            "feed the cats daily",
+        }
+
+        results = retriever.query(
+            "cats", top_k=5, memory_type=["episodic", "semantic"], until=day_ago
+        )
+        assert [m.content for m in results] == ["user asked about cats long ago"]
+
+        assert retriever.query("cats", top_k=5, role="system") == []
+
+
+def test_filters_follow_removal():
+    with patch.object(retriever_mod, "encode_text", return_value=["cats"]):
+        retriever = _retriever(False)
+        user = retriever.query("cats", top_k=5, role="user")
+        retriever.remove(user[0])
+        assert retriever.query("cats", top_k=5, role="user") == user[1:]
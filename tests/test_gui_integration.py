@@ -33,27 +33,26 @@ def test_gui_handle_submit_updates_panels():
     app = QApplication.instance() or QApplication([])
 
     mock_agent = MagicMock()
-    mock_agent.receive.return_value = "reply"
+    retrieved = [MemoryEntry(content="cats purr", embedding=[])]
+    mock_agent.receive.return_value = ("reply", retrieved)
     mock_agent.working_memory.return_value = ["fact1", "fact2"]
     mock_agent.memory.all.return_value = [
         MemoryEntry(content="Dream: something", embedding=[], timestamp=datetime.utcnow())
     ]
+    mock_query = mock_agent.memory.retriever.query
 
     gui = MemorySystemGUI(mock_agent)
     gui.input_box.setPlainText("hello")
-    with patch("retrieval.cue_builder.build_cue", return_value="cue") as mock_cue:
-        with patch("retrieval.retriever.Retriever.query", return_value=[] ) as mock_query:
-            gui.handle_submit()
-            _, kwargs = mock_cue.call_args
-            assert kwargs.get("tags") == ["greeting"]
-            _, q_kwargs = mock_query.call_args
-            assert q_kwargs.get("tags") == ["greeting"]
-
-    assert mock_agent.receive.called
+    gui.handle_submit()
+
+    mock_agent.receive.assert_called_once_with("hello", with_context=True)
+    # The agent's own retrieval is shown; no second query is made
+    assert not mock_query.called
     bubbles = gui.dialogue_scroll.widget().findChildren(QLabel)
     assert bubbles[-1].text() == "reply"
     mem_bubbles = gui.memory_layout.parentWidget().findChildren(QLabel)
     assert "fact1" in mem_bubbles[-1].text()
+    assert "cats purr" in mem_bubbles[-1].text()
 
     app.quit()
 
@@ -85,14 +84,17 @@ def test_update_countdown_refreshes_dream_box():
     ]
 
     mock_agent = MagicMock()
-    mock_agent.memory.all.return_value = entries
+    mock_agent.memory.generation = 1
+    mock_agent.memory.iter_memories.side_effect = lambda: [("episodic", e) for e in entries]
     mock_agent.memory.time_until_dream.return_value = 10
     mock_agent.memory.time_until_think.return_value = 5
 
     gui = MemorySystemGUI(mock_agent)
 
-    # Simulate new dream added to memory
-    entries.append(MemoryEntry(content="Dream: second", embedding=[], timestamp=datetime.utcnow()))
+    gui.update_countdown()
+    # Simulate a new dream replacing a pruned memory, so the count is unchanged
+    entries[:] = [MemoryEntry(content="Dream: second", embedding=[], timestamp=datetime.utcnow())]
+    mock_agent.memory.generation = 2
 
     gui.update_countdown()
 
@@ -119,7 +121,8 @@ def test_update_countdown_refreshes_think_box():
     ]
 
     mock_agent = MagicMock()
-    mock_agent.memory.all.return_value = entries
+    mock_agent.memory.generation = 1
+    mock_agent.memory.iter_memories.side_effect = lambda: [("episodic", e) for e in entries]
     mock_agent.memory.time_until_dream.return_value = None
     mock_agent.memory.time_until_think.return_value = 7
 
@@ -134,6 +137,7 @@ def test_update_countdown_refreshes_think_box():
             metadata={"tags": ["introspection"]},
         )
     )
+    mock_agent.memory.generation = 2
 
     gui.update_countdown()
 
@@ -492,6 +496,29 @@ def test_memory_table_shows_all_memory_types(tmp_path):
     app.quit()
 
 
+def test_memory_table_does_not_hydrate_lazy_manager(tmp_path):
+    app = QApplication.instance() or QApplication([])
+
+    path = tmp_path / "mem.db"
+    first = MemoryManager(db_path=path)
+    first.add("hello")
+    first.add_semantic("fact")
+    first.close()
+
+    manager = MemoryManager(db_path=path, lazy=True)
+    agent = MagicMock()
+    agent.memory = manager
+
+    gui = MemorySystemGUI(agent)
+    gui.update_countdown()
+
+    assert gui.table.rowCount() == 2
+    assert gui.table.item(1, 1).text() == "semantic"
+    assert manager._retriever is None
+
+    app.quit()
+
+
 def test_memory_browser_edits_and_deletes_non_episodic(tmp_path, monkeypatch):
     app = QApplication.instance() or QApplication([])
 
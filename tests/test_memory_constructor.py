@@ -2,6 +2,8 @@ import sys
 from pathlib import Path
 from unittest.mock import patch
 
+import pytest
+
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
 from addons import memory_constructor
@@ -11,10 +13,10 @@ from core.memory_manager import MemoryManager
 def test_ingest_transcript(monkeypatch):
     manager = MemoryManager(db_path=':memory:')
 
-    def fake_analyze(text):
-        return [('neutral', 1.0)]
+    def fake_analyze(texts, batch_size=32):
+        return [[('neutral', 1.0)] for _ in texts]
 
-    monkeypatch.setattr(memory_constructor, 'analyze_emotions', fake_analyze)
+    monkeypatch.setattr(memory_constructor, 'analyze_emotions_batch', fake_analyze)
 
     text = 'Alice: Hello.\nBob: Hi there.'
     entries = memory_constructor.ingest_transcript(text, manager)
@@ -29,10 +31,10 @@ def test_ingest_transcript(monkeypatch):
 def test_ingest_biography(monkeypatch):
     manager = MemoryManager(db_path=':memory:')
 
-    def fake_analyze(text):
-        return [('neutral', 1.0)]
+    def fake_analyze(texts, batch_size=32):
+        return [[('neutral', 1.0)] for _ in texts]
 
-    monkeypatch.setattr(memory_constructor, 'analyze_emotions', fake_analyze)
+    monkeypatch.setattr(memory_constructor, 'analyze_emotions_batch', fake_analyze)
 
     bio = (
         'John was born in 1990. '
@@ -47,3 +49,73 @@ def test_ingest_biography(monkeypatch):
     for entry in sem + epis + proc:
         assert entry.metadata['source'] == 'biography'
     assert proc[0] in manager.procedural.all()
+
+
+def test_parallel_ingest_keeps_order(tmp_path):
+    manager = MemoryManager(db_path=tmp_path / 'mem.db')
+    lines = [f'Speaker{i % 3}: line number {i}' for i in range(23)]
+
+    entries = memory_constructor.ingest_transcript(
+        '\n'.join(lines), manager, workers=2, chunk_size=5
+    )
+    assert [e.content for e in entries] == [f'line number {i}' for i in range(23)]
+    assert entries[4].metadata['speaker'] == 'Speaker1'
+    assert [e.content for e in manager.db.load_all()] == [e.content for e in entries]
+
+    sem, epis, proc = memory_constructor.ingest_biography(
+        'He was born in 1990. He learned to swim. He likes tea. He met Ann in 2001.',
+        manager,
+        workers=2,
+        chunk_size=1,
+    )
+    assert [e.content for e in epis] == ['He was born in 1990', 'He met Ann in 2001']
+    assert [e.content for e in proc] == ['He learned to swim']
+    assert [e.content for e in sem] == ['He likes tea']
+    manager.close()
+
+
+def test_analysis_runs_outside_the_writer(tmp_path, monkeypatch):
+    manager = MemoryManager(db_path=tmp_path / 'mem.db')
+    real = memory_constructor._analyze_chunk
+    depths = []
+
+    def analyze(texts):
+        depths.append(manager.db._batch_depth())
+        return real(texts)
+
+    monkeypatch.setattr(memory_constructor, '_analyze_chunk', analyze)
+    with patch.object(manager.db, 'transaction', wraps=manager.db.transaction) as txn:
+        memory_constructor.ingest_biography(
+            'He likes tea. He was born in 1990. He learned to swim.', manager, workers=1, chunk_size=1
+        )
+    # one commit per chunk, none of them open while a chunk is analyzed
+    assert txn.call_count == 3
+    assert depths == [0, 0, 0]
+    manager.close()
+
+
+def test_failed_ingest_stores_nothing(tmp_path, monkeypatch):
+    manager = MemoryManager(db_path=tmp_path / 'mem.db')
+    manager.add('kept')
+    real = memory_constructor._analyze_chunk
+    calls = []
+
+    def flaky(texts):
+        calls.append(texts)
+        if len(calls) == 2:
+            raise RuntimeError('model failed')
+        return real(texts)
+
+    monkeypatch.setattr(memory_constructor, '_analyze_chunk', flaky)
+    with pytest.raises(RuntimeError):
+        memory_constructor.ingest_transcript('A: one\nB: two\nC: three', manager, workers=1, chunk_size=1)
+    calls.clear()
+    with pytest.raises(RuntimeError):
+        memory_constructor.ingest_biography('He likes tea. He was born in 1990.', manager, workers=1, chunk_size=1)
+
+    assert [m.content for m in manager.db.load_all()] == ['kept']
+    assert manager.db.load_all_semantic() == []
+    assert [m.content for m in manager.all_memories()] == ['kept']
+    assert [m.content for m in manager.working.contents()] == ['kept']
+    assert [m.content for m in manager.retriever.query('one tea', top_k=5)] == ['kept']
+    manager.close()
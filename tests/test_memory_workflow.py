@@ -44,3 +44,77 @@ def test_semantic_and_procedural_retrieval():
 
     res_proc = retriever.query("knot", top_k=1)
     assert res_proc and res_proc[0] is proc
+
+
+def test_manager_retriever_tracks_writes():
+    manager = MemoryManager(db_path=":memory:")
+    cat = manager.add("the cat sat on the mat")
+    dog = manager.add("dogs are wonderful companions")
+    fact = manager.add_semantic("Paris is in France")
+
+    assert manager.retriever.query("cat", top_k=1)[0] is cat
+    assert manager.retriever.query("France", top_k=1)[0] is fact
+
+    manager.update(dog, "parrots can talk")
+    assert manager.retriever.query("parrots", top_k=1)[0] is dog
+
+    manager.delete(cat)
+    manager.delete_semantic(fact)
+    assert manager.retriever.query("cat", top_k=3) == [dog]
+
+    manager.add("a new memory")
+    manager.prune(1)
+    assert dog not in manager.retriever.query("parrots", top_k=3)
+
+
+def test_generation_changes_when_count_does_not():
+    manager = MemoryManager(db_path=":memory:")
+    manager.add("first")
+    before = (manager.count(), manager.generation)
+    manager.add("Dream: second")
+    manager.prune(1)
+    assert manager.count() == before[0]
+    assert manager.generation != before[1]
+
+
+def test_manager_id_maps_classify_entries():
+    manager = MemoryManager(db_path=":memory:")
+    event = manager.add("went to the park")
+    fact = manager.add_semantic("water boils at 100C")
+    skill = manager.add_procedural("to boil water, heat it")
+
+    assert manager.get(fact.id) is fact
+    assert [manager.memory_type(m) for m in (event, fact, skill)] == [
+        "episodic",
+        "semantic",
+        "procedural",
+    ]
+
+    # a wrong-type delete is ignored
+    manager.delete(fact)
+    assert manager.memory_type(fact) == "semantic"
+
+    manager.delete_semantic(fact)
+    assert manager.get(fact.id) is None
+    assert manager.memory_type(fact) is None
+    assert fact not in manager.semantic
+    manager.prune(0)
+    assert manager.get(event.id) is None
+
+
+def test_working_memory_follows_episodic_events():
+    from core.memory_types.episodic import EpisodicMemory
+    from core.working_memory import WorkingMemory
+
+    store = EpisodicMemory()
+    working = WorkingMemory(3)
+    working.attach(store)
+    entries = [store.add(f"event {i}", embedding=[]) for i in range(5)]
+    assert working.contents() == entries[2:]
+
+    store.remove(entries[0])
+    assert working.contents() == entries[2:]
+    store.remove(entries[3])
+    assert working.contents() == [entries[1], entries[2], entries[4]]
+    store.prune(1)
+    assert working.contents() == [entries[4]]
@@ -0,0 +1,52 @@
+import sys
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core import emotion_model
+from core.agent import Agent
+from encoding import encoder
+from ms_utils.warmup import ModelWarmup
+
+
+def test_warmup_loads_concurrently_and_reports_timings():
+    started = threading.Barrier(2, timeout=5)
+
+    def loader():
+        # both loaders must be running at the same time to pass the barrier
+        started.wait()
+        time.sleep(0.01)
+
+    warmup = ModelWarmup({"a": loader, "b": loader})
+    timings = warmup.wait(timeout=5)
+    assert warmup.ready
+    assert set(timings) == {"a", "b"}
+    assert all(t > 0 for t in timings.values())
+
+
+def test_first_use_blocks_on_warming_model_instead_of_reloading():
+    built = []
+
+    class SlowModel:
+        def __init__(self, name):
+            time.sleep(0.05)
+            built.append(name)
+
+    fake_module = SimpleNamespace(SentenceTransformer=SlowModel)
+    with patch.dict(sys.modules, {"sentence_transformers": fake_module}), \
+            patch.object(encoder, "_model", None), \
+            patch.object(encoder, "_model_failed", False), \
+            patch.object(emotion_model, "_load_classifier", return_value=None):
+        agent = Agent("local", db_path=":memory:", warm_up=True)
+        model = encoder._load_model()
+        assert isinstance(model, SlowModel)
+        assert set(agent.warmup.wait(timeout=5)) == {"encoder", "emotion"}
+        assert len(built) == 1
+
+
+def test_warmup_is_opt_in():
+    assert Agent("local", db_path=":memory:").warmup is None
@@ -0,0 +1,141 @@
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+np = pytest.importorskip("numpy")
+
+from core import emotion_model
+from encoding import encoder
+import encoding.onnx_models as om
+
+
+class FakeTokenizer:
+    truncation = None
+    padding = None
+    vocab = {"[PAD]": 0, "<pad>": 1}
+
+    @classmethod
+    def from_file(cls, path):
+        return cls()
+
+    def enable_truncation(self, max_length):
+        self.truncation = {"max_length": max_length}
+
+    def enable_padding(self, pad_id=0, pad_token="[PAD]"):
+        self.padding = {"pad_id": pad_id, "pad_token": pad_token}
+
+    def token_to_id(self, token):
+        return self.vocab.get(token)
+
+    def id_to_token(self, token_id):
+        return {v: k for k, v in self.vocab.items()}.get(token_id)
+
+    def encode_batch(self, texts):
+        # one token per word, padded to the longest text
+        longest = max(len(t.split()) for t in texts)
+        out = []
+        for text in texts:
+            n = len(text.split())
+            out.append(
+                SimpleNamespace(
+                    ids=[len(w) for w in text.split()] + [0] * (longest - n),
+                    attention_mask=[1] * n + [0] * (longest - n),
+                    type_ids=[0] * longest,
+                )
+            )
+        return out
+
+
+class FakeSession:
+    """Token state ``[id, 1]`` per token; logits are ``[sum(ids), 0]``."""
+
+    def __init__(self, path, options, providers):
+        self.providers = providers
+
+    def get_inputs(self):
+        return [SimpleNamespace(name="input_ids"), SimpleNamespace(name="attention_mask")]
+
+    def run(self, names, feeds):
+        ids = feeds["input_ids"].astype(np.float32)
+        if self.kind == "encoder":
+            return [np.stack([ids, np.ones_like(ids)], axis=-1)]
+        return [np.stack([ids.sum(axis=1), np.zeros(len(ids))], axis=1)]
+
+
+fake_ort = SimpleNamespace(
+    SessionOptions=lambda: SimpleNamespace(graph_optimization_level=None),
+    GraphOptimizationLevel=SimpleNamespace(ORT_ENABLE_ALL=99),
+    InferenceSession=FakeSession,
+)
+
+
+@pytest.fixture
+def onnx_env(tmp_path):
+    (tmp_path / "model.onnx").write_bytes(b"")
+    (tmp_path / "config.json").write_text(json.dumps({"id2label": {"0": "joy", "1": "sadness"}}))
+    with patch.object(om, "ort", fake_ort), patch.object(om, "Tokenizer", FakeTokenizer):
+        yield tmp_path
+
+
+def test_onnx_encoder_mean_pools_and_normalizes(onnx_env):
+    with patch.object(FakeSession, "kind", "encoder", create=True):
+        model = om.OnnxEncoder(onnx_env)
+        single = model.encode("hi there")
+        batch = model.encode(["hi there", "a"], batch_size=1)
+    # mean of [2, 1] and [5, 1] is [3.5, 1]; padding must not count
+    expected = np.array([3.5, 1.0]) / np.linalg.norm([3.5, 1.0])
+    assert np.allclose(single, expected)
+    assert batch.shape == (2, 2) and batch.dtype == np.float32
+    assert np.allclose(batch[0], expected)
+    assert np.allclose(batch[1], np.array([1.0, 1.0]) / np.sqrt(2))
+
+
+def test_onnx_models_truncate_and_pad_like_the_originals(onnx_env):
+    with patch.object(FakeSession, "kind", "encoder", create=True):
+        model = om.OnnxEncoder(onnx_env)
+        assert model.tokenizer.truncation == {"max_length": 256}
+        (onnx_env / "sentence_bert_config.json").write_text(json.dumps({"max_seq_length": 128}))
+        assert om.OnnxEncoder(onnx_env).tokenizer.truncation == {"max_length": 128}
+        assert om.OnnxEncoder(onnx_env, max_length=64).max_length == 64
+    # RoBERTa's pad id comes from config.json, not the tokenizers default of 0
+    (onnx_env / "config.json").write_text(
+        json.dumps({"id2label": {"0": "joy", "1": "sadness"}, "pad_token_id": 1})
+    )
+    with patch.object(FakeSession, "kind", "classifier", create=True):
+        clf = om.OnnxClassifier(onnx_env)
+    assert clf.tokenizer.truncation == {"max_length": 512}
+    assert clf.tokenizer.padding == {"pad_id": 1, "pad_token": "<pad>"}
+
+
+def test_onnx_classifier_matches_pipeline_contract(onnx_env):
+    with patch.object(FakeSession, "kind", "classifier", create=True):
+        clf = om.OnnxClassifier(onnx_env / "model.onnx")
+        result = clf(["hello", "no"])
+    assert [r[0]["label"] for r in result] == ["joy", "joy"]
+    assert all(abs(sum(s["score"] for s in r) - 1.0) < 1e-6 for r in result)
+    assert emotion_model._pairs(result[0])[0][0] == "happy"
+
+
+def test_backends_select_onnx_models(tmp_path):
+    fake_model = object()
+    with patch("encoding.onnx_models.OnnxEncoder", return_value=fake_model) as enc_cls:
+        encoder.set_backend("onnx", tmp_path)
+        try:
+            assert encoder._load_model() is fake_model
+            enc_cls.assert_called_once_with(str(tmp_path))
+        finally:
+            encoder.set_backend("sentence_transformers")
+    with patch("encoding.onnx_models.OnnxClassifier", return_value=fake_model):
+        emotion_model.set_backend("onnx", str(tmp_path))
+        try:
+            assert emotion_model._load_classifier() is fake_model
+        finally:
+            emotion_model.set_backend("transformer")
+    with pytest.raises(ValueError):
+        encoder.set_backend("onnx")
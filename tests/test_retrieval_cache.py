@@ -0,0 +1,41 @@
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from core.agent import Agent
+from core.memory_manager import MemoryManager
+import retrieval.retriever as retriever_mod
+
+
+def test_repeated_query_hits_cache_until_write():
+    manager = MemoryManager(db_path=":memory:")
+    manager.add("cats like milk")
+    retriever = manager.retriever
+    with patch.object(retriever_mod, "encode_text", wraps=retriever_mod.encode_text) as enc:
+        first = retriever.query("cats", top_k=2, tags=["animal"])
+        again = retriever.query("cats", top_k=2, tags=["animal"])
+        assert again == first
+        assert enc.call_count == 1
+        assert retriever.cache_stats()["hits"] == 1
+
+        # a different mood is a different key
+        retriever.query("cats", top_k=2, tags=["animal"], mood="happy")
+        assert enc.call_count == 2
+
+        generation = retriever.generation
+        entry = manager.add("cats chase mice")
+        assert retriever.generation > generation
+        assert retriever.cache_stats()["size"] == 0
+        assert entry in retriever.query("cats", top_k=2, tags=["animal"])
+        assert enc.call_count == 3
+
+
+def test_agent_receive_returns_retrieved_context():
+    agent = Agent("local", db_path=":memory:")
+    agent.memory.add_semantic("cats like milk")
+    response, retrieved = agent.receive("tell me about cats", with_context=True)
+    assert isinstance(response, str) and response
+    assert any(m.content == "cats like milk" for m in retrieved)
+    assert isinstance(agent.receive("hello"), str)
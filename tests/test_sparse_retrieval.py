@@ -0,0 +1,62 @@
+import sys
+from pathlib import Path
+from datetime import datetime, timedelta
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from core.memory_entry import MemoryEntry
+from retrieval.retriever import Retriever
+
+
+def _entry(text, *, days=0, tags=None):
+    return MemoryEntry(
+        content=text,
+        embedding=text.split(),
+        timestamp=datetime(2020, 1, 1) - timedelta(days=days),
+        metadata={"tags": tags or []},
+    )
+
+
+def test_only_documents_sharing_terms_are_scored():
+    mems = [_entry("red apple"), _entry("green pear"), _entry("red car")]
+    retriever = Retriever(mems)
+    sims = retriever._token_similarities(["red"])
+    assert set(sims) == {0, 2}
+    assert retriever.query("red", top_k=2) == [mems[0], mems[2]]
+
+
+def test_recent_memories_fill_results_without_overlap():
+    mems = [_entry("old note", days=5), _entry("new note", days=1)]
+    retriever = Retriever(mems)
+    assert retriever.query("unrelated", top_k=2) == [mems[1], mems[0]]
+
+
+@pytest.mark.parametrize("weighting", ["tf", "tfidf", "bm25"])
+def test_weightings_rank_matching_memory_first(weighting):
+    mems = [
+        _entry("the cat sat on the mat"),
+        _entry("the dog ran in the park"),
+        _entry("the bird sang"),
+    ]
+    retriever = Retriever(mems, weighting=weighting)
+    assert retriever.query("the cat", top_k=1)[0] is mems[0]
+
+
+def test_postings_follow_removal_and_update():
+    mems = [_entry("red apple"), _entry("green pear"), _entry("blue sky")]
+    retriever = Retriever(mems)
+    retriever.remove(mems[0])
+    assert "apple" not in retriever._postings
+    assert retriever.query("sky", top_k=1)[0] is mems[2]
+
+    mems[1].embedding = ["yellow", "banana"]
+    retriever.update(mems[1])
+    assert "pear" not in retriever._postings
+    assert retriever.query("banana", top_k=1)[0] is mems[1]
+
+
+def test_unknown_weighting_rejected():
+    with pytest.raises(ValueError):
+        Retriever([], weighting="bogus")
@@ -0,0 +1,112 @@
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+np = pytest.importorskip("numpy")
+
+from core.memory_entry import MemoryEntry
+from retrieval.retriever import Retriever
+import storage.faiss_index as fi
+from storage.vector_index import FlatIndex, HNSWIndex
+
+
+def _memories(n, dim=8, seed=0):
+    rng = np.random.default_rng(seed)
+    return [MemoryEntry(content=str(i), embedding=rng.standard_normal(dim).tolist()) for i in range(n)]
+
+
+def _brute_force(memories, vector, top_k):
+    mat = np.asarray([m.embedding for m in memories])
+    sims = mat @ vector / (np.linalg.norm(mat, axis=1) * np.linalg.norm(vector))
+    return [memories[i] for i in np.argsort(-sims, kind="stable")[:top_k]]
+
+
+def test_flat_index_matches_brute_force_and_removes():
+    mems = _memories(50)
+    index = FlatIndex(mems[:30])
+    index.add(mems[30:])
+    query = np.random.default_rng(1).standard_normal(8)
+    assert index.query(query, top_k=5) == _brute_force(mems, query, 5)
+
+    assert index.remove(mems[:10])
+    assert len(index) == 40
+    assert index.query(query, top_k=5) == _brute_force(mems[10:], query, 5)
+    assert index.query(mems[45].embedding, top_k=1) == [mems[45]]
+
+
+def test_hnsw_index_recall_and_tombstones():
+    mems = _memories(300)
+    index = HNSWIndex(mems, hnsw_m=8, ef_search=64)
+    rng = np.random.default_rng(2)
+    hits = 0
+    for _ in range(20):
+        query = rng.standard_normal(8)
+        hits += len(set(index.query(query, top_k=5)) & set(_brute_force(mems, query, 5)))
+    assert hits / 100 >= 0.9
+
+    index.remove(mems[:100])
+    assert len(index) == 200
+    assert not index.needs_rebuild
+    found = index.query(mems[0].embedding, top_k=10)
+    assert len(found) == 10 and mems[0] not in found
+    index.remove(mems[100:200])
+    assert index.needs_rebuild
+
+
+def test_indexes_skip_token_embeddings():
+    tokens = [MemoryEntry(content="a", embedding=["a"])]
+    assert not FlatIndex(tokens).available
+    assert not HNSWIndex(tokens).available
+
+
+def test_retriever_uses_fallback_without_faiss():
+    mems = _memories(40)
+    with patch.object(fi, "faiss", None):
+        plain = Retriever(mems)
+        assert plain.vector_index is None
+
+        retriever = Retriever(mems, fallback_index="hnsw")
+        assert isinstance(retriever.vector_index, HNSWIndex)
+        with patch("retrieval.retriever.encode_text", return_value=mems[7].embedding):
+            assert retriever.query("seven", top_k=1) == [mems[7]]
+            retriever.remove(mems[7])
+            assert mems[7] not in retriever.query("seven", top_k=5)
+
+        with pytest.raises(ValueError):
+            Retriever(mems, fallback_index="bogus")
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{}, {"mood": "happy"}, {"tags": ["rare"]}, {"mood": "sad", "tags": ["rare"]}],
+)
+def test_two_stage_ranking_matches_brute_force(kwargs):
+    rng = np.random.default_rng(3)
+    mems = _memories(200)
+    for i, memory in enumerate(mems):
+        memory.emotion_scores = {"happy": float(rng.random()), "sad": 0.9 * (i % 50 == 0)}
+        memory.metadata = {"tags": ["rare"]} if i % 40 == 0 else {}
+    query = rng.standard_normal(8).tolist()
+    with patch.object(fi, "faiss", None), \
+            patch("retrieval.retriever.encode_text", return_value=query):
+        brute = Retriever(mems)
+        indexed = Retriever(mems, fallback_index="flat", candidate_factor=3)
+        # Not built beside the matrix; force it in to exercise the two stages
+        assert indexed.vector_index is None
+        indexed._index = FlatIndex(mems)
+        assert indexed.query("q", top_k=5, **kwargs) == brute.query("q", top_k=5, **kwargs)
+
+
+def test_mood_candidates_skip_low_scores():
+    mems = _memories(4)
+    mems[0].emotion_scores = {"happy": 0.9, "sad": 0.1}
+    mems[1].emotion_scores = {"happy": 0.2, "sad": 0.8}
+    retriever = Retriever(mems, mood_threshold=0.5)
+    assert retriever._mood_positions["happy"] == {0}
+    assert retriever._mood_positions["sad"] == {1}
+    # top_k=0 leaves out the newest-of-each-type candidates
+    assert retriever._candidates([], 0, mood="happy", q_tags=set()) == [0]
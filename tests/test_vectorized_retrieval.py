@@ -0,0 +1,85 @@
+import sys
+from pathlib import Path
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from core.memory_entry import MemoryEntry
+import retrieval.retriever as retriever_mod
+from retrieval.retriever import Retriever
+
+
+def _memories():
+    now = datetime.utcnow()
+    return [
+        MemoryEntry(
+            content="cat",
+            embedding=[1.0, 0.0, 0.0],
+            timestamp=now - timedelta(days=1),
+            emotion_scores={"happy": 0.2},
+            metadata={"tags": ["animal"]},
+        ),
+        MemoryEntry(
+            content="dog",
+            embedding=[0.8, 0.6, 0.0],
+            timestamp=now,
+            emotion_scores={"sad": 0.9},
+            metadata={"tags": ["animal"]},
+        ),
+        MemoryEntry(
+            content="pizza",
+            embedding=[0.0, 0.0, 1.0],
+            timestamp=now - timedelta(hours=1),
+            emotion_scores={"happy": 0.7},
+            metadata={"tags": ["food"]},
+        ),
+    ]
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{}, {"mood": "happy"}, {"mood": "sad", "tags": ["food"]}, {"tags": ["animal"]}],
+)
+def test_matrix_path_matches_python_loop(kwargs):
+    pytest.importorskip("numpy")
+    mems = _memories()
+    with patch.object(retriever_mod, "FaissIndex", None), \
+            patch.object(retriever_mod, "encode_text", return_value=[1.0, 0.1, 0.0]):
+        fast = Retriever(mems[:2], semantic=mems[2:])
+        assert fast._dim is not None
+        with patch.object(retriever_mod, "np", None):
+            slow = Retriever(mems[:2], semantic=mems[2:])
+        assert slow._dim is None
+        assert fast.query("q", top_k=3, **kwargs) == slow.query("q", top_k=3, **kwargs)
+
+
+def test_matrix_rows_follow_removal():
+    pytest.importorskip("numpy")
+    mems = _memories()
+    with patch.object(retriever_mod, "FaissIndex", None), \
+            patch.object(retriever_mod, "encode_text", return_value=[0.0, 0.0, 1.0]):
+        retriever = Retriever(mems)
+        retriever.remove(mems[0])
+        assert retriever.query("q", top_k=1)[0] is mems[2]
+        assert retriever.query("q", top_k=5) == [mems[2], mems[1]]
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"mood": "happy", "tags": ["food"]}, {"memory_type": "episodic"}])
+def test_query_many_matches_single_queries(kwargs):
+    np = pytest.importorskip("numpy")
+    mems = _memories()
+    cues = {"a": [1.0, 0.1, 0.0], "b": [0.0, 0.2, 1.0], "c": [0.5, 0.5, 0.5]}
+
+    def fake_encode_texts(texts):
+        return np.asarray([cues[t] for t in texts], dtype=np.float32)
+
+    with patch.object(retriever_mod, "FaissIndex", None), \
+            patch.object(retriever_mod, "encode_texts", side_effect=fake_encode_texts), \
+            patch.object(retriever_mod, "encode_text", side_effect=cues.get):
+        for fallback in ("none", "flat"):
+            retriever = Retriever(mems[:2], semantic=mems[2:], fallback_index=fallback)
+            batch = retriever.query_many(["a", "b", "c"], top_k=2, **kwargs)
+            assert batch == [retriever.query(t, top_k=2, **kwargs) for t in "abc"]
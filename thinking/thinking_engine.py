@@ -7,7 +7,6 @@ import time
 from typing import Iterable, List, TYPE_CHECKING
 
 from retrieval.cue_builder import build_cue
-from retrieval.retriever import Retriever
 from reconstruction.reconstructor import Reconstructor
 from llm import llm_router
 from ms_utils import Scheduler
@@ -54,12 +53,7 @@ class ThinkingEngine:
         """Internal helper to generate and store a single thought."""
 
         cue = build_cue(prompt, state={"mood": mood})
-        retriever = Retriever(
-            manager.all(),
-            semantic=manager.semantic.all(),
-            procedural=manager.procedural.all(),
-        )
-        memories = retriever.query(cue, top_k=5, mood=mood)
+        memories = manager.retriever.query(cue, top_k=5, mood=mood)
         reconstructor = Reconstructor()
         context = reconstructor.build_context(memories, mood=mood)
         full_prompt = f"{context}\n{prompt}" if context else prompt